@@ -40,6 +40,24 @@ const ReasoningStep = ({ step, expanded, onToggle }) => (
   </div>
 );
 
+// Labels for node-level progress events from /invoke/stream
+const STEP_TITLES = {
+  speculative_retrieve: 'Retrieval + Web Search',
+  retrieve: 'Retrieval',
+  web_search: 'Web Search Fallback',
+  grade_documents: 'Relevance Grading',
+  compress_context: 'Context Compression',
+  generate: 'Generation',
+  refine_query: 'Query Refinement',
+  hallucination_monitor: 'Hallucination Check',
+};
+
+const describeStep = (summary = {}) =>
+  Object.entries(summary)
+    .filter(([, value]) => value !== null && value !== undefined)
+    .map(([key, value]) => `${key}: ${value}`)
+    .join('\n');
+
 function App() {
   const [input, setInput] = useState('');
   const [messages, setMessages] = useState([]);
@@ -73,28 +91,52 @@ function App() {
         loading: true
       }]);
 
-      const res = await fetch(`http://localhost:8000/invoke?question=${encodeURIComponent(question)}`, {
+      const res = await fetch(`http://localhost:8000/invoke/stream?question=${encodeURIComponent(question)}`, {
         method: 'POST'
       });
 
-      if (!res.ok) throw new Error("API Error");
+      if (!res.ok || !res.body) throw new Error("API Error");
 
-      const data = await res.json();
+      const updateAgent = (update) => setMessages(prev => prev.map(msg =>
+        msg.id === agentMsgId ? { ...msg, ...update(msg) } : msg
+      ));
 
-      // Update Agent Message
-      setMessages(prev => prev.map(msg =>
-        msg.id === agentMsgId
-          ? {
-            ...msg,
-            content: data.generation,
-            loading: false,
-            reasoning: [
-              { title: 'Retrieval', content: `Found ${data.documents?.length || 0} documents.` },
-              { title: 'Hallucination Check', content: 'Verified: Grounded in context.' }
-            ]
+      // Parse Server-Sent Events as they arrive
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        const frames = buffer.split('\n\n');
+        buffer = frames.pop();
+
+        for (const frame of frames) {
+          const event = frame.match(/^event: (.*)$/m)?.[1];
+          const raw = frame.match(/^data: (.*)$/m)?.[1];
+          if (!event || raw === undefined) continue;
+          const data = JSON.parse(raw);
+
+          if (event === 'start' && data.node === 'generate') {
+            // A retry regenerates the answer from scratch
+            updateAgent(() => ({ content: '' }));
+          } else if (event === 'node') {
+            updateAgent(msg => ({
+              reasoning: [...msg.reasoning, { title: STEP_TITLES[data.node] || data.node, content: describeStep(data.summary) }]
+            }));
+          } else if (event === 'token') {
+            updateAgent(msg => ({ content: msg.content + data.content, loading: false }));
+          } else if (event === 'done') {
+            updateAgent(msg => ({ content: data?.generation ?? msg.content, loading: false }));
+          } else if (event === 'error') {
+            updateAgent(() => ({ content: "Error connecting to Agentic Engine.", loading: false }));
+            return;
           }
-          : msg
-      ));
+        }
+      }
     } catch (err) {
       setMessages(prev => prev.map(msg =>
         msg.loading
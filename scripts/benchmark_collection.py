@@ -0,0 +1,170 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+from dataclasses import replace
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from qdrant_client.http import models
+from src.collection import CollectionLayout, create_collection
+from src.vectorstore import client, COLLECTION_NAME, DENSE_VECTOR_SIZE, layout as base_layout
+
+
+def sample_vectors(name: str, limit: int) -> np.ndarray:
+    """Dense vectors of up to `limit` points of an existing collection."""
+    vectors, offset = [], None
+    while len(vectors) < limit:
+        points, offset = client.scroll(
+            collection_name=name, limit=min(256, limit - len(vectors)),
+            offset=offset, with_payload=False, with_vectors=[""]
+        )
+        vectors.extend(p.vector[""] if isinstance(p.vector, dict) else p.vector for p in points)
+        if offset is None:
+            break
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def synthetic_vectors(count: int, dim: int, clusters: int = 64, seed: int = 0) -> np.ndarray:
+    """Clustered Gaussian vectors; uniform random ones make HNSW look unrealistically bad."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(clusters, size=count)] + 0.5 * rng.normal(size=(count, dim))
+    return vectors.astype(np.float32)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> list:
+    """Brute-force cosine ground truth (row indices double as point IDs)."""
+    corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    scores = queries @ corpus.T
+    return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+
+def estimated_ram_mb(layout: CollectionLayout, points: int, dim: int) -> float:
+    """Rough resident size of vectors, quantized copies and HNSW links (payload excluded)."""
+    size = 0 if layout.vectors_on_disk else points * dim * 4
+    if layout.quantization == "scalar" and layout.quantization_always_ram:
+        size += points * dim
+    elif layout.quantization == "binary" and layout.quantization_always_ram:
+        size += points * dim / 8
+    if not layout.hnsw_on_disk:
+        # Level-0 links: 2 * m neighbours per point, 4 bytes each
+        size += points * layout.hnsw_m * 2 * 4
+    return size / 1024 / 1024
+
+
+def parse_layout(spec: str, m: int) -> CollectionLayout:
+    """'scalar', 'binary+disk', 'none' ... on top of the configured layout."""
+    quantization, _, suffix = spec.partition("+")
+    return replace(
+        base_layout,
+        quantization=quantization,
+        vectors_on_disk=suffix == "disk",
+        hnsw_m=m,
+        # Make sure a benchmark-sized sample actually gets an HNSW index
+        indexing_threshold=base_layout.indexing_threshold or 1000,
+    )
+
+
+def load(name: str, layout: CollectionLayout, corpus: np.ndarray, wait_seconds: float):
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    create_collection(client, name, corpus.shape[1], layout)
+    for start in range(0, len(corpus), 256):
+        batch = corpus[start:start + 256]
+        client.upsert(
+            collection_name=name, wait=True,
+            points=[models.PointStruct(id=start + i, vector=v.tolist()) for i, v in enumerate(batch)],
+        )
+
+    # Searching before the optimizer finishes would measure a full scan
+    deadline = time.time() + wait_seconds
+    while time.time() < deadline:
+        info = client.get_collection(name)
+        if info.status == models.CollectionStatus.GREEN and (info.indexed_vectors_count or 0) >= len(corpus) * 0.99:
+            return
+        time.sleep(0.5)
+    print(f"  WARNING: {name} still indexing after {wait_seconds:.0f}s; results include unindexed segments")
+
+
+def measure(name: str, layout: CollectionLayout, queries: np.ndarray, truth: list, k: int, ef: int):
+    quantization = None
+    if layout.quantization != "none":
+        quantization = models.QuantizationSearchParams(rescore=layout.rescore, oversampling=layout.oversampling)
+    params = models.SearchParams(hnsw_ef=ef, quantization=quantization)
+
+    def search(vector):
+        return client.query_points(
+            collection_name=name, query=vector.tolist(), limit=k, search_params=params, with_payload=False
+        ).points
+
+    for vector in queries[:5]:
+        search(vector)
+
+    latencies, recalls = [], []
+    for vector, expected in zip(queries, truth):
+        start = time.perf_counter()
+        points = search(vector)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len({p.id for p in points} & expected) / k)
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return statistics.mean(recalls), statistics.median(latencies), p99
+
+
+def run(args):
+    if args.synthetic:
+        vectors = synthetic_vectors(args.points + args.queries, DENSE_VECTOR_SIZE)
+    else:
+        vectors = sample_vectors(args.collection, args.points + args.queries)
+        if len(vectors) <= args.queries:
+            print(f"Error: {args.collection} has only {len(vectors)} points; ingest data or use --synthetic")
+            return
+    # Held-out queries: they are never in the index, like real questions
+    corpus, queries = vectors[:-args.queries], vectors[-args.queries:]
+    truth = exact_top_k(corpus, queries, args.k)
+    print(f"--- {len(corpus)} vectors x {corpus.shape[1]}d, {len(queries)} queries, recall@{args.k} ---")
+
+    rows = []
+    for spec in args.layouts.split(","):
+        for m in (int(value) for value in args.m.split(",")):
+            layout = parse_layout(spec, m)
+            name = f"bench-{spec.replace('+', '-')}-m{m}"
+            print(f"Loading {name}...")
+            load(name, layout, corpus, args.index_timeout)
+            ram = estimated_ram_mb(layout, args.project_points, corpus.shape[1])
+            for ef in (int(value) for value in args.ef.split(",")):
+                recall, p50, p99 = measure(name, layout, queries, truth, args.k, ef)
+                rows.append((f"{spec} m={m}", ef, recall, p50, p99, ram))
+            if not args.keep:
+                client.delete_collection(name)
+
+    print(f"\n{'layout':<20}{'ef':>6}{'recall':>9}{'p50 ms':>9}{'p99 ms':>9}  RAM MB @ {args.project_points:,} pts")
+    for label, ef, recall, p50, p99, ram in rows:
+        print(f"{label:<20}{ef:>6}{recall:>9.3f}{p50:>9.2f}{p99:>9.2f}  {ram:,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall vs latency of candidate collection layouts")
+    parser.add_argument("--collection", default=COLLECTION_NAME, help="Collection to sample vectors from")
+    parser.add_argument("--synthetic", action="store_true", help="Use clustered random vectors instead")
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=int(os.getenv("RETRIEVER_TOP_K", "4")))
+    parser.add_argument("--layouts", default="none,scalar,binary,scalar+disk",
+                        help="Quantization per scratch collection; '+disk' keeps originals on disk")
+    parser.add_argument("--m", default="16", help="Comma-separated HNSW m values")
+    parser.add_argument("--ef", default="32,64,128,256", help="Comma-separated search-time hnsw_ef values")
+    parser.add_argument("--project-points", type=int, default=1_000_000, help="Corpus size for the RAM estimate")
+    parser.add_argument("--index-timeout", type=float, default=300)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch collections")
+    run(parser.parse_args())
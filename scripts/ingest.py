@@ -1,6 +1,6 @@
-
 import os
 import sys
+import argparse
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -8,45 +8,39 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from dotenv import load_dotenv
 load_dotenv()
 
-from langchain_community.document_loaders import TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from src.vectorstore import get_vectorstore
+from src.vectorstore import ensure_collection
+from src.ingest_pipeline import find_files, get_pipeline
 import asyncio
 
-async def ingest():
-    data_dir = "data"
-    if not os.path.exists(data_dir):
-        print(f"Error: Directory not found at {data_dir}")
+async def ingest(args):
+    if not os.path.exists(args.data_dir):
+        print(f"Error: Directory not found at {args.data_dir}")
         return
 
-    vectorstore = get_vectorstore()
-    
-    # Loop over all markdown files
-    for filename in os.listdir(data_dir):
-        if not filename.endswith(".md"):
-            continue
-            
-        file_path = os.path.join(data_dir, filename)
-        print(f"--- Ingesting {file_path} ---")
-        
-        # 1. Load
-        loader = TextLoader(file_path, encoding="utf-8")
-        docs = loader.load()
-        print(f"Loaded {len(docs)} document(s).")
-        
-        # 2. Split
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=50
-        )
-        splits = text_splitter.split_documents(docs)
-        print(f"Split into {len(splits)} chunks.")
-        
-        # 3. Store
-        print("Indexing to Qdrant...")
-        await vectorstore.aadd_documents(splits)
-    
-    print("✅ Ingestion Complete!")
+    ensure_collection()
+    pipeline = get_pipeline(
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        batch_size=args.batch_size,
+        loader_workers=args.loader_workers,
+        embed_concurrency=args.embed_concurrency,
+        upsert_concurrency=args.upsert_concurrency,
+    )
+
+    print(f"--- Syncing {args.pattern} from {args.data_dir}{' (full re-ingest)' if args.full else ''} ---")
+    stats = await pipeline.run(find_files(args.data_dir, args.pattern), prune=not args.no_prune, full=args.full)
+    print(f"✅ Ingestion Complete! {stats.report()}")
 
 if __name__ == "__main__":
-    asyncio.run(ingest())
+    parser = argparse.ArgumentParser(description="Incrementally sync documents into Qdrant")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--pattern", default="*.md", help="Filename glob, matched recursively")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, help="Chunks per embedding call and upsert")
+    parser.add_argument("--loader-workers", type=int)
+    parser.add_argument("--embed-concurrency", type=int, help="Embedding calls in flight")
+    parser.add_argument("--upsert-concurrency", type=int)
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and re-embed every chunk")
+    parser.add_argument("--no-prune", action="store_true", help="Keep points of files that no longer exist")
+    asyncio.run(ingest(parser.parse_args()))
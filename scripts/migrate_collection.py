@@ -0,0 +1,21 @@
+import os
+import sys
+import argparse
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from src.vectorstore import COLLECTION_NAME, ensure_collection, layout
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Create the collection, or update an existing one to the COLLECTION_* layout in place"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Print the changes without applying them")
+    args = parser.parse_args()
+
+    print(f"--- Provisioning {COLLECTION_NAME}: {layout} ---")
+    ensure_collection(migrate=True, dry_run=args.dry_run)
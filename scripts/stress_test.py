@@ -10,17 +10,20 @@ import os
 # Add project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.graph.nodes.local_grader import LocalHallucinationGrader, GradeRequest
+from src.graph.nodes.local_grader import LocalHallucinationGrader, MicroBatcher, GradeRequest
 
 def load_dataset():
     with open("data/golden_dataset.json", "r") as f:
         data = json.load(f)
     return data
 
-def run_stress_test(num_requests=1000, concurrency=10):
-    print(f"--- Starting Stress Test: {num_requests} requests, {concurrency} threads ---")
+def run_stress_test(num_requests=1000, concurrency=10, batching=False):
+    print(f"--- Starting Stress Test: {num_requests} requests, {concurrency} threads, batching={batching} ---")
     
     grader = LocalHallucinationGrader()
+    if batching:
+        # Concurrent threads share forward passes instead of fighting over the model
+        grader = MicroBatcher(grader, max_batch_size=concurrency)
     dataset = load_dataset()
     
     latencies = []
@@ -79,3 +82,4 @@ if __name__ == "__main__":
     print("WARNING: This test will stress your system.")
     time.sleep(2)
     run_stress_test(num_requests=500, concurrency=4)
+    run_stress_test(num_requests=500, concurrency=16, batching=True)
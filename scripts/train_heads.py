@@ -0,0 +1,172 @@
+"""
+train_heads.py - Relevance / Usefulness Head Training
+
+Adds the `heads.relevance` and `heads.usefulness` classifiers to existing
+guardrail weights. The ModernBERT encoder and the groundedness head stay
+frozen, so groundedness verdicts are unchanged; only the small linear heads
+are fitted, on [CLS] features computed once up front.
+
+Training data is JSONL, one labelled pair per line, in the grader's own
+request layout (see TASK_PREFIXES in src/graph/nodes/local_grader.py):
+
+    {"task": "relevance",  "context": "<document chunk>", "answer": "<question>",   "label": 1}
+    {"task": "usefulness", "context": "<question>",       "answer": "<generation>", "label": 0}
+
+label 1 is the positive class (relevant / useful). Verdicts from the Gemini
+graders make good labels: log a few thousand (question, document) and
+(question, answer) pairs with their API verdicts.
+
+Usage:
+    python scripts/train_heads.py --data heads_dataset.jsonl
+    python scripts/train_heads.py --data heads_dataset.jsonl --tasks relevance --output models/guardrail_v2.pt
+
+Only the heads trained here (plus any already in the input weights) are
+saved, so the grader never serves an untrained head.
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import torch
+import torch.nn as nn
+from dotenv import load_dotenv
+load_dotenv()
+
+from src.graph.nodes.local_grader import TASKS, GradeRequest, LocalHallucinationGrader, grader_settings_from_env
+
+TRAINABLE_TASKS = [task for task in TASKS if task != "groundedness"]
+
+
+def load_examples(path: str, tasks):
+    examples = {task: [] for task in tasks}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if item["task"] in examples:
+                examples[item["task"]].append(item)
+    return examples
+
+
+def encode_features(grader: LocalHallucinationGrader, task: str, examples, batch_size: int) -> torch.Tensor:
+    """[CLS] features of the frozen encoder, with the exact prompt layout used at inference."""
+    features = []
+    with torch.no_grad():
+        for start in range(0, len(examples), batch_size):
+            batch = examples[start:start + batch_size]
+            encoded = [grader._encode(GradeRequest(context=e["context"], answer=e["answer"], task=task)) for e in batch]
+            input_ids, attention_mask = grader._collate(encoded)
+            outputs = grader.model.bert(input_ids=input_ids, attention_mask=attention_mask)
+            features.append(outputs.last_hidden_state[:, 0, :].float())
+            print(f"  [{task}] encoded {min(start + batch_size, len(examples))}/{len(examples)}", end="\r")
+    print()
+    return torch.cat(features)
+
+
+def accuracy(head: nn.Module, features: torch.Tensor, labels: torch.Tensor) -> float:
+    with torch.no_grad():
+        return (head(features).argmax(dim=-1) == labels).float().mean().item()
+
+
+def train_head(grader: LocalHallucinationGrader, task: str, examples, args):
+    random.Random(args.seed).shuffle(examples)
+    split = max(1, int(len(examples) * (1 - args.val_split)))
+    features = encode_features(grader, task, examples, args.batch_size)
+    labels = torch.tensor([int(e["label"]) for e in examples], device=features.device)
+    train_x, train_y = features[:split], labels[:split]
+    val_x, val_y = features[split:], labels[split:]
+
+    head = grader.model.heads[task].float()
+    dropout = grader.model.dropout
+    optimizer = torch.optim.AdamW(head.parameters(), lr=args.lr)
+    criterion = nn.CrossEntropyLoss()
+
+    best_acc, best_state = -1.0, None
+    for epoch in range(args.epochs):
+        head.train()
+        dropout.train()
+        order = torch.randperm(len(train_x), device=train_x.device)
+        for start in range(0, len(order), args.batch_size):
+            rows = order[start:start + args.batch_size]
+            optimizer.zero_grad()
+            loss = criterion(head(dropout(train_x[rows])), train_y[rows])
+            loss.backward()
+            optimizer.step()
+
+        head.eval()
+        val_acc = accuracy(head, val_x, val_y) if len(val_x) else accuracy(head, train_x, train_y)
+        print(f"  [{task}] epoch {epoch + 1}/{args.epochs}: loss {loss.item():.4f}, val acc {val_acc:.4f}")
+        if val_acc > best_acc:
+            best_acc, best_state = val_acc, {k: v.clone() for k, v in head.state_dict().items()}
+
+    head.load_state_dict(best_state)
+    print(f"✅ {task}: best val acc {best_acc:.4f} on {len(val_x)} held-out examples")
+
+
+def main(args):
+    if not os.path.exists(args.model_path):
+        # The encoder and groundedness head come from these weights; without them we would save random ones
+        print(f"Error: guardrail weights not found at {args.model_path} (train them with notebooks/train_guardrail.ipynb)")
+        return
+
+    tasks = args.tasks or TRAINABLE_TASKS
+    examples = load_examples(args.data, tasks)
+    for task in tasks:
+        print(f"{task}: {len(examples[task])} examples")
+
+    # The serving configuration (token budget, buckets), so features match what the heads
+    # will see at inference; full precision and no cache for training
+    settings = {**grader_settings_from_env(), "model_path": args.model_path, "max_tokens": args.max_tokens}
+    grader = LocalHallucinationGrader(**settings, use_quantization=False, use_flash_attn=False, use_cache=False)
+    grader.model.eval()
+    for param in grader.model.parameters():
+        param.requires_grad = False
+
+    trained = set()
+    for task in tasks:
+        if len(examples[task]) < 2:
+            print(f"Skipping {task}: not enough examples")
+            continue
+        for param in grader.model.heads[task].parameters():
+            param.requires_grad = True
+        train_head(grader, task, examples[task], args)
+        trained.add(task)
+
+    if not trained:
+        print("Nothing trained; weights left unchanged")
+        return
+
+    # Keep the encoder, the groundedness head and every head that has real weights
+    keep = (trained | grader.tasks) - {"groundedness"}
+    state_dict = {
+        name: value for name, value in grader.model.state_dict().items()
+        if not name.startswith("heads.") or name.split(".")[1] in keep
+    }
+    output = args.output or args.model_path
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    torch.save(state_dict, output)
+    print(f"✅ Saved {output} (heads: {sorted(keep | {'groundedness'})})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the local grader's relevance/usefulness heads")
+    parser.add_argument("--data", required=True, help="JSONL of {task, context, answer, label}")
+    defaults = grader_settings_from_env()
+    parser.add_argument("--model-path", default=defaults["model_path"], help="Existing guardrail weights")
+    parser.add_argument("--output", help="Where to save the weights (default: overwrite --model-path)")
+    parser.add_argument("--tasks", nargs="+", choices=TRAINABLE_TASKS)
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-tokens", type=int, default=defaults["max_tokens"],
+                        help="Token budget per example (default: LOCAL_GRADER_MAX_TOKENS, as at inference)")
+    parser.add_argument("--val-split", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
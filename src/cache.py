@@ -0,0 +1,384 @@
+"""
+cache.py - Content-Addressed Caches
+
+In-memory LRU with TTL, optionally backed by an on-disk SQLite tier that
+survives restarts. Keys are stable hashes of the normalized inputs plus the
+grader/model version, so a model or prompt change never serves stale results.
+"""
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# Keys per SQLite `IN (...)` query, safely below the default bound-parameter limit
+SQLITE_MAX_PARAMS = 500
+
+
+def normalize(text: Any) -> str:
+    """Collapse whitespace so formatting noise does not fragment the cache."""
+    return " ".join(str(text).split())
+
+
+def make_key(*parts: Any) -> str:
+    """Stable content hash of the given parts (include the grader/model version)."""
+    payload = json.dumps([normalize(p) for p in parts], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TieredCache:
+    """
+    Thread-safe LRU cache with TTL and an optional SQLite tier.
+
+    Values must be JSON-serializable. Memory hits are promoted to
+    most-recently-used; disk hits are promoted into memory. Async callers use
+    aget/aset, which keep SQLite I/O off the event loop. The disk tier is
+    purged of expired rows and capped at `max_disk_rows` (oldest rows go
+    first), checked at startup and then every few thousand writes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int = 4096,
+        ttl_seconds: Optional[float] = None,
+        db_path: Optional[str] = None,
+        max_disk_rows: Optional[int] = None
+    ):
+        """
+        Args:
+            name: Namespace for this cache (also the SQLite table partition)
+            max_size: Maximum in-memory entries; 0 disables the cache entirely
+            ttl_seconds: Entry lifetime; None or 0 means entries never expire
+            db_path: SQLite file for the persistent tier; None keeps it in memory only
+            max_disk_rows: Approximate row cap for this namespace on disk; None or 0 means unbounded
+        """
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds or None
+        self.max_disk_rows = max_disk_rows or None
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        self._writes_since_purge = 0
+        # Purging costs a scan of the namespace, so it is amortized over many writes
+        self._purge_every = max(1000, (self.max_disk_rows or 0) // 10)
+        if db_path and max_size > 0:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, created REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS cache_entries_age ON cache_entries (namespace, created)")
+            self._purge()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    @property
+    def persistent(self) -> bool:
+        """Whether lookups and writes touch the SQLite tier (i.e. may block on disk I/O)."""
+        return self._db is not None
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created > self.ttl_seconds
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.get_many([key], default)[0]
+
+    def get_many(self, keys: List[str], default: Any = None) -> List[Any]:
+        """Look up several keys at once; disk misses from memory are read in one query per batch."""
+        if not self.enabled:
+            return [default] * len(keys)
+
+        values = [default] * len(keys)
+        with self._lock:
+            missing = []
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None:
+                    value, created = entry
+                    if not self._expired(created):
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        values[i] = value
+                        continue
+                    del self._entries[key]
+                missing.append(i)
+
+            if self._db is not None and missing:
+                rows = self._select({keys[i] for i in missing})
+                still_missing = []
+                for i in missing:
+                    row = rows.get(keys[i])
+                    if row is None or self._expired(row[1]):
+                        still_missing.append(i)
+                        continue
+                    value = json.loads(row[0])
+                    self._remember(keys[i], value, row[1])
+                    self.disk_hits += 1
+                    values[i] = value
+                missing = still_missing
+
+            self.misses += len(missing)
+        return values
+
+    def set(self, key: str, value: Any):
+        self.set_many([(key, value)])
+
+    def set_many(self, items: List[Tuple[str, Any]]):
+        """Store several (key, value) pairs; the disk tier gets one executemany and one commit."""
+        if not self.enabled or not items:
+            return
+
+        created = time.time()
+        with self._lock:
+            for key, value in items:
+                self._remember(key, value, created)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO cache_entries (namespace, key, value, created) VALUES (?, ?, ?, ?)",
+                    [(self.name, key, json.dumps(value), created) for key, value in items]
+                )
+                self._db.commit()
+                self._writes_since_purge += len(items)
+                if self._writes_since_purge >= self._purge_every:
+                    self._purge()
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        return (await self.aget_many([key], default))[0]
+
+    async def aget_many(self, keys: List[str], default: Any = None) -> List[Any]:
+        """get_many for async callers: a SQLite tier is read in a worker thread."""
+        return await self._off_loop(self.get_many, keys, default)
+
+    async def aset(self, key: str, value: Any):
+        await self.aset_many([(key, value)])
+
+    async def aset_many(self, items: List[Tuple[str, Any]]):
+        """set_many for async callers: a SQLite tier is written in a worker thread."""
+        await self._off_loop(self.set_many, items)
+
+    async def _off_loop(self, func, *args):
+        # Memory-only caches never block, so they skip the thread hop
+        if self.persistent:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    def _select(self, keys) -> Dict[str, tuple]:
+        keys = list(keys)
+        rows = {}
+        for start in range(0, len(keys), SQLITE_MAX_PARAMS):
+            batch = keys[start:start + SQLITE_MAX_PARAMS]
+            rows.update(
+                (key, (value, created)) for key, value, created in self._db.execute(
+                    "SELECT key, value, created FROM cache_entries "
+                    f"WHERE namespace = ? AND key IN ({', '.join('?' * len(batch))})",
+                    (self.name, *batch)
+                )
+            )
+        return rows
+
+    def _purge(self):
+        """Drop expired rows, then the oldest rows beyond `max_disk_rows`."""
+        if self.ttl_seconds is not None:
+            self._db.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND created < ?",
+                (self.name, time.time() - self.ttl_seconds)
+            )
+        if self.max_disk_rows is not None:
+            self._db.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+                "SELECT key FROM cache_entries WHERE namespace = ? ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                (self.name, self.name, self.max_disk_rows)
+            )
+        self._db.commit()
+        self._writes_since_purge = 0
+
+    def _remember(self, key: str, value: Any, created: float):
+        self._entries[key] = (value, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry (both tiers) and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.name,))
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "persistent": self.persistent,
+        }
+
+
+class SemanticCache:
+    """
+    Response cache matched by embedding similarity instead of exact keys.
+
+    A lookup embeds the question and returns the stored value of the most
+    similar cached question if its cosine similarity clears `threshold`.
+    Cached questions are kept as rows of a unit-vector matrix, so scoring
+    them all is a single matrix-vector product rather than a Python loop.
+    Entries are bounded by `max_size` (oldest evicted first) and `ttl_seconds`.
+    """
+
+    def __init__(self, embeddings, threshold: float = 0.95, max_size: int = 512, ttl_seconds: Optional[float] = 3600):
+        """
+        Args:
+            embeddings: Any LangChain Embeddings (ideally cache-backed)
+            threshold: Minimum cosine similarity for a hit
+            max_size: Maximum stored responses
+            ttl_seconds: Entry lifetime; None or 0 means entries never expire
+        """
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds or None
+        # Row i of the unit-vector matrix belongs to entry i, so a lookup is one matmul
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[tuple] = []  # (question, value, created)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _keep(self, rows):
+        self._entries = [self._entries[i] for i in rows]
+        self._vectors = self._vectors[rows] if self._entries else None
+
+    def _evict_expired(self):
+        if self.ttl_seconds is not None:
+            now = time.time()
+            fresh = [i for i, e in enumerate(self._entries) if now - e[2] <= self.ttl_seconds]
+            if len(fresh) < len(self._entries):
+                self._keep(fresh)
+
+    async def lookup(self, question: str) -> Optional[Any]:
+        self._evict_expired()
+        if not self._entries:
+            self.misses += 1
+            return None
+
+        query = self._unit(await self.embeddings.aembed_query(question))
+        # Entries may have changed while the query was being embedded
+        if not self._entries:
+            self.misses += 1
+            return None
+        scores = self._vectors @ query
+        best = int(np.argmax(scores))
+        best_score = float(scores[best])
+
+        if best_score >= self.threshold:
+            self.hits += 1
+            print(f"---RESPONSE CACHE HIT: similarity {best_score:.4f} to '{self._entries[best][0]}'---")
+            return self._entries[best][1]
+        self.misses += 1
+        return None
+
+    async def store(self, question: str, value: Any):
+        vector = self._unit(await self.embeddings.aembed_query(question))
+        self._entries.append((question, value, time.time()))
+        self._vectors = vector[None, :] if self._vectors is None else np.vstack([self._vectors, vector])
+        if len(self._entries) > self.max_size:
+            self._keep(list(range(len(self._entries) - self.max_size, len(self._entries))))
+
+    def clear(self):
+        self._entries = []
+        self._vectors = None
+        self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "threshold": self.threshold,
+        }
+
+
+# Registry so /cache/stats can report every cache in the process
+_caches: Dict[str, Any] = {}
+
+
+def get_cache(
+    name: str,
+    env_prefix: str,
+    default_size: int = 4096,
+    default_ttl: float = 0,
+    default_db: str = "",
+    default_db_rows: int = 100000
+) -> TieredCache:
+    """
+    Get or create a named cache configured from `<env_prefix>_SIZE`,
+    `<env_prefix>_TTL` (seconds), `<env_prefix>_DB` (SQLite path, empty to disable)
+    and `<env_prefix>_DB_MAX_ROWS` (disk row cap, 0 for unbounded).
+    """
+    if name not in _caches:
+        _caches[name] = TieredCache(
+            name,
+            max_size=int(os.getenv(f"{env_prefix}_SIZE", str(default_size))),
+            ttl_seconds=float(os.getenv(f"{env_prefix}_TTL", str(default_ttl))),
+            db_path=os.getenv(f"{env_prefix}_DB", default_db) or None,
+            max_disk_rows=int(os.getenv(f"{env_prefix}_DB_MAX_ROWS", str(default_db_rows)))
+        )
+    return _caches[name]
+
+
+def get_verdict_cache() -> TieredCache:
+    """Shared cache for grader verdicts (relevance, groundedness, usefulness)."""
+    return get_cache("verdicts", "VERDICT_CACHE", default_ttl=3600)
+
+
+def get_embedding_cache() -> TieredCache:
+    """Shared cache for query and document embeddings (persisted to disk by default)."""
+    return get_cache("embeddings", "EMBEDDING_CACHE", default_size=10000, default_db=".cache/embeddings.sqlite")
+
+
+def get_response_cache(embeddings) -> SemanticCache:
+    """Semantic /invoke response cache configured from RESPONSE_CACHE_* settings."""
+    if "responses" not in _caches:
+        _caches["responses"] = SemanticCache(
+            embeddings,
+            threshold=float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95")),
+            max_size=int(os.getenv("RESPONSE_CACHE_SIZE", "512")),
+            ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+        )
+    return _caches["responses"]
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in _caches.items()}
@@ -0,0 +1,225 @@
+"""
+collection.py - Qdrant Collection Layout
+
+Owns how the collection is laid out on the server:
+
+    HNSW graph        m / ef_construct at build time, ef at search time
+    Quantization      none | scalar (int8, 4x smaller) | binary (32x smaller),
+                      kept in RAM and rescored against the original vectors
+    Storage           original vectors and payload in RAM or memory-mapped on disk
+    Segments          segment count/size and indexing thresholds
+
+The usual large-corpus layout is quantized vectors in RAM with the
+originals on disk: searches walk the compact copy and only the oversampled
+candidates touch disk for rescoring. Every setting comes from COLLECTION_*
+environment variables; migrate_collection applies a changed layout to an
+existing collection in place (Qdrant rebuilds indexes in the background).
+Use scripts/benchmark_collection.py to pick values.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+QUANTIZATION_KINDS = ("none", "scalar", "binary")
+
+
+def _optional_int(name: str) -> Optional[int]:
+    value = os.getenv(name, "")
+    return int(value) if value else None
+
+
+@dataclass
+class CollectionLayout:
+    """Build- and search-time settings for the dense vector of a collection."""
+
+    quantization: str = "none"
+    quantization_always_ram: bool = True
+    # Re-score quantized candidates with the original vectors; oversampling
+    # fetches limit * oversampling candidates so rescoring has spares
+    rescore: bool = True
+    oversampling: float = 2.0
+    vectors_on_disk: bool = False
+    payload_on_disk: bool = True
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    hnsw_on_disk: bool = False
+    # Search-time beam width; None uses Qdrant's default (ef_construct)
+    hnsw_ef: Optional[int] = None
+    # 0 lets Qdrant pick (one segment per CPU); fewer, larger segments search faster
+    segment_number: int = 0
+    # Sizes in KB, None keeps the server defaults
+    max_segment_size: Optional[int] = None
+    indexing_threshold: Optional[int] = None
+    memmap_threshold: Optional[int] = None
+
+    def __post_init__(self):
+        if self.quantization not in QUANTIZATION_KINDS:
+            raise ValueError(f"quantization must be one of {QUANTIZATION_KINDS}, got {self.quantization!r}")
+
+    @classmethod
+    def from_env(cls) -> "CollectionLayout":
+        return cls(
+            quantization=os.getenv("COLLECTION_QUANTIZATION", "none").lower(),
+            quantization_always_ram=os.getenv("COLLECTION_QUANTIZATION_ALWAYS_RAM", "true").lower() == "true",
+            rescore=os.getenv("COLLECTION_RESCORE", "true").lower() == "true",
+            oversampling=float(os.getenv("COLLECTION_OVERSAMPLING", "2.0")),
+            vectors_on_disk=os.getenv("COLLECTION_VECTORS_ON_DISK", "false").lower() == "true",
+            payload_on_disk=os.getenv("COLLECTION_PAYLOAD_ON_DISK", "true").lower() == "true",
+            hnsw_m=int(os.getenv("COLLECTION_HNSW_M", "16")),
+            hnsw_ef_construct=int(os.getenv("COLLECTION_HNSW_EF_CONSTRUCT", "100")),
+            hnsw_on_disk=os.getenv("COLLECTION_HNSW_ON_DISK", "false").lower() == "true",
+            hnsw_ef=_optional_int("COLLECTION_HNSW_EF"),
+            segment_number=int(os.getenv("COLLECTION_SEGMENT_NUMBER", "0")),
+            max_segment_size=_optional_int("COLLECTION_MAX_SEGMENT_SIZE_KB"),
+            indexing_threshold=_optional_int("COLLECTION_INDEXING_THRESHOLD_KB"),
+            memmap_threshold=_optional_int("COLLECTION_MEMMAP_THRESHOLD_KB"),
+        )
+
+    def vector_params(self, size: int) -> models.VectorParams:
+        return models.VectorParams(size=size, distance=models.Distance.COSINE, on_disk=self.vectors_on_disk)
+
+    def hnsw_config(self) -> models.HnswConfigDiff:
+        return models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct, on_disk=self.hnsw_on_disk)
+
+    def quantization_config(self):
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8, quantile=0.99, always_ram=self.quantization_always_ram
+            ))
+        if self.quantization == "binary":
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(
+                always_ram=self.quantization_always_ram
+            ))
+        return None
+
+    def optimizers_config(self) -> models.OptimizersConfigDiff:
+        return models.OptimizersConfigDiff(
+            default_segment_number=self.segment_number,
+            max_segment_size=self.max_segment_size,
+            indexing_threshold=self.indexing_threshold,
+            memmap_threshold=self.memmap_threshold,
+        )
+
+    def search_params(self) -> Optional[models.SearchParams]:
+        """Per-query params for dense searches, or None when the defaults apply."""
+        quantization = None
+        if self.quantization != "none":
+            quantization = models.QuantizationSearchParams(rescore=self.rescore, oversampling=self.oversampling)
+        if quantization is None and self.hnsw_ef is None:
+            return None
+        return models.SearchParams(hnsw_ef=self.hnsw_ef, quantization=quantization)
+
+
+def create_collection(
+    client: QdrantClient,
+    name: str,
+    size: int,
+    layout: CollectionLayout,
+    sparse_vectors_config: Optional[Dict[str, models.SparseVectorParams]] = None
+):
+    """Create `name` with the layout's dense vector, index, quantization and segment settings."""
+    client.create_collection(
+        collection_name=name,
+        vectors_config=layout.vector_params(size),
+        sparse_vectors_config=sparse_vectors_config,
+        hnsw_config=layout.hnsw_config(),
+        quantization_config=layout.quantization_config(),
+        optimizers_config=layout.optimizers_config(),
+        on_disk_payload=layout.payload_on_disk,
+    )
+
+
+def _quantization_of(config) -> Tuple[str, Optional[bool]]:
+    if isinstance(config, models.ScalarQuantization):
+        return "scalar", config.scalar.always_ram
+    if isinstance(config, models.BinaryQuantization):
+        return "binary", config.binary.always_ram
+    return "none", None
+
+
+def plan_migration(info, size: int, layout: CollectionLayout) -> Tuple[List[str], dict]:
+    """
+    Compare a collection's config with `layout`.
+
+    Returns human-readable changes and the update_collection arguments that
+    apply them. Raises ValueError for changes Qdrant cannot make in place
+    (vector size or distance): those need a new collection and a full re-ingest.
+    """
+    config = info.config
+    vectors = config.params.vectors
+    if isinstance(vectors, dict):
+        vectors = vectors.get("")
+    if vectors is None or vectors.size != size or vectors.distance != models.Distance.COSINE:
+        raise ValueError(
+            f"Dense vector is {getattr(vectors, 'size', None)}-d {getattr(vectors, 'distance', None)}, expected "
+            f"{size}-d Cosine; recreate the collection and re-ingest with --full"
+        )
+
+    changes: List[str] = []
+    update: dict = {}
+
+    def compare(label: str, current, desired) -> bool:
+        # None means "server default": only an explicit setting counts as a change
+        if desired is not None and current != desired:
+            changes.append(f"{label}: {current} -> {desired}")
+            return True
+        return False
+
+    if compare("vectors on_disk", bool(vectors.on_disk), layout.vectors_on_disk):
+        update["vectors_config"] = {"": models.VectorParamsDiff(on_disk=layout.vectors_on_disk)}
+    if compare("payload on_disk", bool(config.params.on_disk_payload), layout.payload_on_disk):
+        update["collection_params"] = models.CollectionParamsDiff(on_disk_payload=layout.payload_on_disk)
+
+    hnsw = config.hnsw_config
+    if any([
+        compare("hnsw m", hnsw.m, layout.hnsw_m),
+        compare("hnsw ef_construct", hnsw.ef_construct, layout.hnsw_ef_construct),
+        compare("hnsw on_disk", bool(hnsw.on_disk), layout.hnsw_on_disk),
+    ]):
+        update["hnsw_config"] = layout.hnsw_config()
+
+    optimizer = config.optimizer_config
+    if any([
+        compare("segment number", optimizer.default_segment_number, layout.segment_number),
+        compare("max segment size", optimizer.max_segment_size, layout.max_segment_size),
+        compare("indexing threshold", optimizer.indexing_threshold, layout.indexing_threshold),
+        compare("memmap threshold", optimizer.memmap_threshold, layout.memmap_threshold),
+    ]):
+        update["optimizers_config"] = layout.optimizers_config()
+
+    kind, always_ram = _quantization_of(config.quantization_config)
+    desired_ram = layout.quantization_always_ram if layout.quantization != "none" else None
+    if any([
+        compare("quantization", kind, layout.quantization),
+        compare("quantization always_ram", always_ram, desired_ram),
+    ]):
+        update["quantization_config"] = layout.quantization_config() or models.Disabled.DISABLED
+
+    return changes, update
+
+
+def migrate_collection(
+    client: QdrantClient,
+    name: str,
+    size: int,
+    layout: CollectionLayout,
+    dry_run: bool = False
+) -> List[str]:
+    """Bring an existing collection in line with `layout`; returns the changes (applied unless dry_run)."""
+    changes, update = plan_migration(client.get_collection(name), size, layout)
+    if not changes:
+        print(f"Collection {name} already matches the configured layout.")
+        return changes
+
+    for change in changes:
+        print(f"  {name}: {change}")
+    if dry_run:
+        print("Dry run: no changes applied.")
+    else:
+        client.update_collection(collection_name=name, **update)
+        print(f"Collection {name} updated; Qdrant re-optimizes segments in the background.")
+    return changes
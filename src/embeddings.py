@@ -0,0 +1,110 @@
+"""
+embeddings.py - Cache-Backed Embeddings
+
+Wraps an embedding model with the tiered cache so repeated queries and
+unchanged chunks never make another embedding round trip. The model itself is
+selected by EMBEDDING_BACKEND: "google" (text-embedding-004 API) or "local"
+(in-process CPU encoder, see src/local_embeddings.py).
+"""
+
+import os
+import hashlib
+from typing import List, Optional
+from langchain_core.embeddings import Embeddings
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from src.cache import TieredCache, get_embedding_cache
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "google").lower()
+EMBEDDING_BACKENDS = ("google", "local")
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings keyed by (model name, query/document, text hash).
+
+    Queries and documents are keyed separately because the underlying model
+    may embed them with different task types.
+    """
+
+    def __init__(self, underlying: Embeddings, model_name: str, cache: TieredCache, dimensions: int = 768):
+        self.underlying = underlying
+        self.model_name = model_name
+        self.cache = cache
+        self.dimensions = dimensions
+
+    def _key(self, kind: str, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{kind}:{digest}"
+
+    def _document_keys(self, texts: List[str]) -> List[str]:
+        return [self._key("document", t) for t in texts]
+
+    @staticmethod
+    def _fill(keys, vectors, missing, fresh):
+        """Put freshly embedded vectors in place; returns the new cache entries."""
+        for i, vector in zip(missing, fresh):
+            vectors[i] = vector
+        return [(keys[i], vectors[i]) for i in missing]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = self._document_keys(texts)
+        vectors = self.cache.get_many(keys)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        # One batched call for every chunk we have not seen before
+        fresh = self.underlying.embed_documents([texts[i] for i in missing]) if missing else []
+        # One transaction for the whole batch instead of a commit per chunk
+        self.cache.set_many(self._fill(keys, vectors, missing, fresh))
+        return vectors
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = self._document_keys(texts)
+        vectors = await self.cache.aget_many(keys)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        fresh = await self.underlying.aembed_documents([texts[i] for i in missing]) if missing else []
+        await self.cache.aset_many(self._fill(keys, vectors, missing, fresh))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key("query", text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.underlying.embed_query(text)
+            self.cache.set(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._key("query", text)
+        vector = await self.cache.aget(key)
+        if vector is None:
+            vector = await self.underlying.aembed_query(text)
+            await self.cache.aset(key, vector)
+        return vector
+
+def get_embeddings(cache: Optional[TieredCache] = None, backend: Optional[str] = None) -> CachedEmbeddings:
+    """Embeddings for the configured backend, behind the shared embedding cache."""
+    backend = (backend or EMBEDDING_BACKEND).lower()
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"EMBEDDING_BACKEND must be one of {EMBEDDING_BACKENDS}, got {backend!r}")
+
+    if backend == "local":
+        from src.local_embeddings import LocalEmbeddings, DEFAULT_LOCAL_MODEL
+        threads = os.getenv("LOCAL_EMBEDDING_THREADS")
+        underlying = LocalEmbeddings(
+            model_name=os.getenv("LOCAL_EMBEDDING_MODEL", DEFAULT_LOCAL_MODEL),
+            batch_size=int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "32")),
+            num_threads=int(threads) if threads else None,
+            pooling=os.getenv("LOCAL_EMBEDDING_POOLING", "cls")
+        )
+        return CachedEmbeddings(
+            underlying,
+            model_name=f"local:{underlying.model_name}",
+            cache=cache or get_embedding_cache(),
+            dimensions=underlying.dimensions
+        )
+
+    return CachedEmbeddings(
+        GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL),
+        model_name=EMBEDDING_MODEL,
+        cache=cache or get_embedding_cache()
+    )
@@ -0,0 +1,151 @@
+"""
+compressor.py - Extractive Context Compression
+
+Runs between grade_documents and generate. Each graded document is split
+into passages (vector chunks, web snippets) and sentences; sentences are
+scored against the question with BM25 (the hybrid-retrieval encoder, with
+IDF computed over the candidate sentences) and the best ones are kept, in
+their original order, until the token budget is spent. Titles and sources
+are kept so the answer can still cite them.
+
+No model call: scoring a few dozen sentences takes well under a
+millisecond, while every prompt token saved is saved twice (generation and
+the hallucination monitor's groundedness check).
+"""
+
+import os
+import re
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from src.graph.state import AgentState
+from src.sparse import BM25SparseEmbeddings
+
+# Off by default: the context is then the graded documents joined as plain text
+CONTEXT_COMPRESSION = os.getenv("CONTEXT_COMPRESSION", "false").lower() == "true"
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "512"))
+# Rough English average; good enough for a budget, no tokenizer needed
+CHARS_PER_TOKEN = 4
+
+# "Content: ...\nSource: ..." (vectorstore) and "Title: ...\nSnippet: ...\nSource: ..." (web_search)
+PASSAGE_PATTERN = re.compile(
+    r"(?:Title: (?P<title>[^\n]*)\n)?(?:Content|Snippet): (?P<body>.*?)\nSource: (?P<source>[^\n]*)", re.S
+)
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Sentences are ~15 tokens, not the ~80 of a chunk the encoder defaults to
+_encoder = BM25SparseEmbeddings(avg_doc_length=15.0)
+
+
+@dataclass
+class _Passage:
+    sentences: List[str]
+    title: Optional[str] = None
+    source: Optional[str] = None
+    kept: List[int] = field(default_factory=list)
+
+    def header(self, number: int) -> str:
+        lines = [f"[{number}]" + (f" {self.title}" if self.title else "")]
+        if self.source:
+            lines.append(f"Source: {self.source}")
+        return "\n".join(lines)
+
+
+def _split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in SENTENCE_BOUNDARY.split(text) if s and s.strip()]
+
+
+def _passages(documents: List[str]) -> List[_Passage]:
+    passages = []
+    for doc in documents:
+        matches = list(PASSAGE_PATTERN.finditer(doc))
+        if not matches:
+            # e.g. the web search "no results" notice
+            passages.append(_Passage(_split_sentences(doc)))
+        for match in matches:
+            passages.append(_Passage(_split_sentences(match["body"]), match["title"], match["source"]))
+    return [p for p in passages if p.sentences]
+
+
+def _scores(question: str, sentences: List[str]) -> List[float]:
+    """BM25 score of every sentence, with IDF over the sentences themselves."""
+    query = set(_encoder.embed_query(question).indices)
+    vectors = _encoder.embed_documents(sentences)
+    df = Counter(i for vector in vectors for i in query.intersection(vector.indices))
+    n = len(sentences)
+    idf = {i: math.log(1 + (n - count + 0.5) / (count + 0.5)) for i, count in df.items()}
+    return [
+        sum(idf[i] * weight for i, weight in zip(vector.indices, vector.values) if i in idf)
+        for vector in vectors
+    ]
+
+
+def _tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def format_context(documents) -> str:
+    """Documents as plain text (a Python list repr wastes prompt tokens on quotes and escapes)."""
+    if isinstance(documents, (list, tuple)):
+        return "\n\n".join(str(doc) for doc in documents)
+    return str(documents or "")
+
+
+def compress(question: str, documents: List[str], token_budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """
+    Keep the sentences most relevant to `question` within `token_budget`.
+
+    Sentences without any question term are only used when no sentence has
+    one (then the leading sentences win). At least one sentence is always
+    kept, even if it alone exceeds the budget.
+    """
+    passages = _passages(documents)
+    candidates = [(p, s) for p, passage in enumerate(passages) for s in range(len(passage.sentences))]
+    if not candidates:
+        return format_context(documents)
+
+    scores = _scores(question, [passages[p].sentences[s] for p, s in candidates])
+    ranked = sorted(range(len(candidates)), key=lambda c: (-scores[c], c))
+    if scores[ranked[0]] > 0:
+        ranked = [c for c in ranked if scores[c] > 0]
+
+    used = 0
+    for c in ranked:
+        p, s = candidates[c]
+        passage = passages[p]
+        # A passage's header is paid for with its first kept sentence
+        cost = _tokens(passage.sentences[s]) + (0 if passage.kept else _tokens(passage.header(p + 1)))
+        if used and used + cost > token_budget:
+            continue
+        passage.kept.append(s)
+        used += cost
+
+    blocks = []
+    for passage in (p for p in passages if p.kept):
+        text = " ".join(passage.sentences[s] for s in sorted(passage.kept))
+        blocks.append(f"{passage.header(len(blocks) + 1)}\n{text}")
+    return "\n\n".join(blocks)
+
+
+def compress_context(state: AgentState) -> AgentState:
+    """
+    Builds the generation context from the graded documents.
+    """
+    print("---COMPRESS CONTEXT---")
+    documents = state.get("documents") or []
+    if not CONTEXT_COMPRESSION or not documents:
+        return {"context": format_context(documents)}
+
+    original = format_context(documents)
+    context = compress(state["question"], documents)
+    print(f"---COMPRESS CONTEXT: ~{_tokens(original)} -> ~{_tokens(context)} tokens---")
+    return {"context": context}
+
+
+async def acompress_context(state: AgentState) -> AgentState:
+    """
+    Async variant of compress_context (pure CPU and fast, so it runs inline).
+    """
+    return compress_context(state)
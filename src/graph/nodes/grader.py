@@ -4,10 +4,35 @@ grader.py - Document Relevance Grader
 Determines if retrieved documents are relevant to the question.
 """
 
-from typing import Literal
+import os
+import asyncio
+import logging
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from src.cache import get_verdict_cache, make_key
 from src.graph.state import AgentState
-from src.llm import llm
+from src.llm import llm, MODEL_NAME
+
+# Upper bound on concurrent Gemini grading calls per node invocation
+GRADER_MAX_CONCURRENCY = int(os.getenv("GRADER_MAX_CONCURRENCY", "4"))
+# Vector chunks at or above this retrieval similarity are accepted without grading (unset = grade all)
+GRADER_SKIP_SCORE = float(os.getenv("GRADER_SKIP_SCORE")) if os.getenv("GRADER_SKIP_SCORE") else None
+
+# Hot-swap configuration (same switch as the hallucination monitor)
+USE_LOCAL_GRADER = os.getenv("USE_LOCAL_GRADER", "false").lower() == "true"
+# Relevance head confidence threshold; below it the API decides
+RELEVANCE_THRESHOLD = float(os.getenv("LOCAL_GRADER_THRESHOLD_RELEVANCE", "0.8"))
+
+# Lazy load local grader
+_local_grader = None
+
+def _get_local_grader():
+    global _local_grader
+    if _local_grader is None:
+        from src.graph.nodes.local_grader import get_shared_grader
+        _local_grader = get_shared_grader()
+    return _local_grader
 
 class GradeDocuments(BaseModel):
     """Binary score for relevance check on retrieved documents."""
@@ -16,45 +41,200 @@ class GradeDocuments(BaseModel):
     )
 
 
+def _relevance_system(route: str) -> str:
+    if route == "web_search":
+        return """You are a grader assessing relevance of a web search result snippet to a user question. \n
+        The snippet might be short/incomplete. If the snippet mentions keywords related to the question or seems to talk about the right topic, grade it as 'yes'. \n
+        Give a binary score 'yes' or 'no'."""
+    return """You are a grader assessing relevance of a retrieved document to a user question. \n 
+        If the document contains keyword(s) or semantic meaning related to the question, grade it as relevant. \n
+        Give a binary score 'yes' or 'no' score to indicate whether the document is relevant to the question."""
+
+
+def _grade_with_local(question: str, doc: str) -> str:
+    """Grade relevance with the local relevance head, or None when the API should decide."""
+    from src.graph.nodes.local_grader import GradeRequest
+    try:
+        grader = _get_local_grader()
+        if "relevance" not in grader.tasks:
+            # No trained relevance head in the loaded weights: quietly leave it to the API
+            return None
+        # The question is the part that must survive truncation
+        result = grader.grade_sync(GradeRequest(context=doc, answer=question, task="relevance"))
+        print(f"---LOCAL GRADER: Latency {result.latency_ms:.2f}ms | Confidence {result.confidence:.4f}---")
+
+        if result.confidence < RELEVANCE_THRESHOLD:
+            logging.warning(f"Local grader low confidence ({result.confidence:.2f}), falling back to API")
+            return None
+        return "yes" if result.is_faithful else "no"
+    except Exception as e:
+        logging.error(f"Local grader error: {e}, falling back to API")
+        return None
+
+
+async def _agrade_with_local(question: str, doc: str) -> str:
+    """Async variant of _grade_with_local (inference runs off the event loop)."""
+    from src.graph.nodes.local_grader import GradeRequest
+    try:
+        grader = _get_local_grader()
+        if "relevance" not in grader.tasks:
+            return None
+        result = await grader.grade_async(GradeRequest(context=doc, answer=question, task="relevance"))
+        print(f"---LOCAL GRADER: Latency {result.latency_ms:.2f}ms | Confidence {result.confidence:.4f}---")
+
+        if result.confidence < RELEVANCE_THRESHOLD:
+            logging.warning(f"Local grader low confidence ({result.confidence:.2f}), falling back to API")
+            return None
+        return "yes" if result.is_faithful else "no"
+    except Exception as e:
+        logging.error(f"Local grader error: {e}, falling back to API")
+        return None
+
+
+def _grade_with_api(question: str, doc: str, system: str) -> str:
+    """Grade a single document with Gemini (verdicts are cached per prompt and model)."""
+    prompt = f"System: {system}\nQuestion: {question}\nDocument: {doc}"
+    cache = get_verdict_cache()
+    key = make_key(GradeDocuments.__name__, MODEL_NAME, prompt)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    score_gen = llm.with_structured_output(GradeDocuments)
+    try:
+        grade = score_gen.invoke(prompt)
+        cache.set(key, grade.binary_score)
+        return grade.binary_score
+    except Exception as e:
+        # Fallback: assume relevant if grading fails to avoid excessive filtering
+        print(f"---GRADE ERROR: {e}---")
+        return "yes"
+
+
+async def _agrade_with_api(question: str, doc: str, system: str) -> str:
+    """Async variant of _grade_with_api (shares the same verdict cache)."""
+    prompt = f"System: {system}\nQuestion: {question}\nDocument: {doc}"
+    cache = get_verdict_cache()
+    key = make_key(GradeDocuments.__name__, MODEL_NAME, prompt)
+    cached = await cache.aget(key)
+    if cached is not None:
+        return cached
+
+    score_gen = llm.with_structured_output(GradeDocuments)
+    try:
+        grade = await score_gen.ainvoke(prompt)
+        await cache.aset(key, grade.binary_score)
+        return grade.binary_score
+    except Exception as e:
+        print(f"---GRADE ERROR: {e}---")
+        return "yes"
+
+
+def _grade_document(question: str, doc: str, system: str) -> str:
+    """Local relevance head first (if enabled), Gemini otherwise."""
+    score = _grade_with_local(question, doc) if USE_LOCAL_GRADER else None
+    if score is None:
+        if USE_LOCAL_GRADER:
+            print("---LOCAL GRADER FALLBACK: Calling API---")
+        score = _grade_with_api(question, doc, system)
+    return score
+
+
+async def _agrade_document(question: str, doc: str, system: str) -> str:
+    score = await _agrade_with_local(question, doc) if USE_LOCAL_GRADER else None
+    if score is None:
+        if USE_LOCAL_GRADER:
+            print("---LOCAL GRADER FALLBACK: Calling API---")
+        score = await _agrade_with_api(question, doc, system)
+    return score
+
+
+def _retrieval_scores(state: AgentState) -> List[Optional[float]]:
+    """Retrieval similarity per document; None for web results or when the state has none."""
+    documents = state["documents"]
+    scores = state.get("document_scores")
+    if state.get("route") == "web_search" or not scores or len(scores) != len(documents):
+        return [None] * len(documents)
+    return list(scores)
+
+
+def _to_grade(retrieval_scores: List[Optional[float]]) -> List[int]:
+    """Indexes of documents that need a grader call (the rest clear GRADER_SKIP_SCORE)."""
+    indexes = [
+        i for i, score in enumerate(retrieval_scores)
+        if GRADER_SKIP_SCORE is None or score is None or score < GRADER_SKIP_SCORE
+    ]
+    if len(indexes) < len(retrieval_scores):
+        print(f"---GRADE: {len(retrieval_scores) - len(indexes)} DOCUMENT(S) ACCEPTED BY SCORE ≥ {GRADER_SKIP_SCORE}---")
+    return indexes
+
+
+def _filter_documents(documents: List[str], scores: List[str], retrieval_scores: List[Optional[float]]) -> dict:
+    """Keep relevant documents (and their retrieval scores) in their original order."""
+    filtered_docs, filtered_scores = [], []
+    for doc, score, retrieval_score in zip(documents, scores, retrieval_scores):
+        if score == "yes":
+            print("---GRADE: DOCUMENT RELEVANT---")
+            filtered_docs.append(doc)
+            filtered_scores.append(retrieval_score)
+        else:
+            print("---GRADE: DOCUMENT NOT RELEVANT---")
+    return {"documents": filtered_docs, "document_scores": filtered_scores}
+
+
 def grade_documents(state: AgentState) -> AgentState:
     """
     Determines whether the retrieved documents are relevant to the question.
+
+    Documents are graded concurrently (up to GRADER_MAX_CONCURRENCY calls in
+    flight), so k retrieved chunks cost roughly one round trip instead of k.
+    Vector chunks whose retrieval score clears GRADER_SKIP_SCORE are kept
+    without a grader call.
     """
     print("---CHECK RELEVANCE---")
-    
+
     documents = state["documents"]
     question = state["question"]
     route = state.get("route")
-    
-    # System prompt
-    if route == "web_search":
-        system = """You are a grader assessing relevance of a web search result snippet to a user question. \n
-        The snippet might be short/incomplete. If the snippet mentions keywords related to the question or seems to talk about the right topic, grade it as 'yes'. \n
-        Give a binary score 'yes' or 'no'."""
-    else:
-        system = """You are a grader assessing relevance of a retrieved document to a user question. \n 
-        If the document contains keyword(s) or semantic meaning related to the question, grade it as relevant. \n
-        Give a binary score 'yes' or 'no' score to indicate whether the document is relevant to the question."""
-    
-    score_gen = llm.with_structured_output(GradeDocuments)
-    
-    filtered_docs = []
-    for doc in documents:
-        prompt = f"System: {system}\nQuestion: {question}\nDocument: {doc}"
-        try:
-            grade = score_gen.invoke(prompt)
-            score = grade.binary_score
-            
-            if score == "yes":
-                print("---GRADE: DOCUMENT RELEVANT---")
-                filtered_docs.append(doc)
-            else:
-                print("---GRADE: DOCUMENT NOT RELEVANT---")
-                continue
-                
-        except Exception as e:
-             # Fallback: assume relevant if grading fails to avoid excessive filtering
-            print(f"---GRADE ERROR: {e}---")
-            filtered_docs.append(doc)
-            
-    return {"documents": filtered_docs, "question": question}
+
+    system = _relevance_system(route)
+    retrieval_scores = _retrieval_scores(state)
+    indexes = _to_grade(retrieval_scores)
+
+    scores = ["yes"] * len(documents)
+    if indexes:
+        # ContextThreadPoolExecutor keeps callbacks (tracing) attached to each call
+        with ContextThreadPoolExecutor(max_workers=max(1, min(GRADER_MAX_CONCURRENCY, len(indexes)))) as executor:
+            grades = executor.map(lambda i: _grade_document(question, documents[i], system), indexes)
+            for i, verdict in zip(indexes, grades):
+                scores[i] = verdict
+
+    return {**_filter_documents(documents, scores, retrieval_scores), "question": question}
+
+
+async def agrade_documents(state: AgentState) -> AgentState:
+    """
+    Async variant of grade_documents: grades run as coroutines on the event
+    loop, bounded by a semaphore of GRADER_MAX_CONCURRENCY.
+    """
+    print("---CHECK RELEVANCE---")
+
+    documents = state["documents"]
+    question = state["question"]
+    route = state.get("route")
+
+    system = _relevance_system(route)
+    retrieval_scores = _retrieval_scores(state)
+    indexes = _to_grade(retrieval_scores)
+    semaphore = asyncio.Semaphore(max(1, GRADER_MAX_CONCURRENCY))
+
+    async def grade(doc: str) -> str:
+        async with semaphore:
+            return await _agrade_document(question, doc, system)
+
+    scores = ["yes"] * len(documents)
+    grades = await asyncio.gather(*(grade(documents[i]) for i in indexes))
+    for i, verdict in zip(indexes, grades):
+        scores[i] = verdict
+
+    return {**_filter_documents(documents, scores, retrieval_scores), "question": question}
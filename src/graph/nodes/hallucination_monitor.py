@@ -1,45 +1,97 @@
 import os
+import asyncio
 import logging
 from typing import Literal
 from pydantic import BaseModel, Field
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from src.cache import get_verdict_cache, make_key
 from src.graph.state import AgentState
-from src.llm import llm
+from src.llm import llm, MODEL_NAME
 
 # Hot-swap configuration
 USE_LOCAL_GRADER = os.getenv("USE_LOCAL_GRADER", "false").lower() == "true"
 
-# Lazy load local grader
+# Run the groundedness and usefulness checks concurrently (latency ~ max instead of sum,
+# at the cost of a wasted usefulness call whenever the generation is not grounded)
+PARALLEL_CHECKS = os.getenv("HALLUCINATION_PARALLEL_CHECKS", "false").lower() == "true"
+
+# Lazy load local grader (shared with the document grader)
 _local_grader = None
 
 def _get_local_grader():
     global _local_grader
     if _local_grader is None:
-        from src.graph.nodes.local_grader import LocalHallucinationGrader
-        _local_grader = LocalHallucinationGrader()
+        from src.graph.nodes.local_grader import get_shared_grader
+        _local_grader = get_shared_grader()
     return _local_grader
 
-def _grade_with_local(documents: str, generation: str) -> str:
-    """Grade groundedness using local ModernBERT (Hallucination Detection)."""
+# Per-head confidence thresholds; below them the API decides
+CONFIDENCE_THRESHOLD = float(os.getenv("LOCAL_GRADER_THRESHOLD_GROUNDEDNESS", "0.7"))
+USEFULNESS_THRESHOLD = float(os.getenv("LOCAL_GRADER_THRESHOLD_USEFULNESS", "0.7"))
+
+def _local_verdict(result, threshold: float = CONFIDENCE_THRESHOLD) -> str:
+    """Map a local GradeResponse to 'yes'/'no', or None when the API should decide."""
+    print(f"---LOCAL GRADER: Latency {result.latency_ms:.2f}ms | Confidence {result.confidence:.4f}---")
+    
+    if result.confidence < threshold:
+         logging.warning(f"Local grader low confidence ({result.confidence:.2f}), falling back to API")
+         return None
+    
+    print("---SUCCESS: USING LOCAL GUARDRAIL (LOW LATENCY)---")
+    return "yes" if result.is_faithful else "no"
+
+def _documents_text(documents) -> str:
+    """Join documents as plain text; a Python list repr wastes the local grader's token budget."""
+    if isinstance(documents, (list, tuple)):
+        return "\n\n".join(str(doc) for doc in documents)
+    return str(documents)
+
+def _groundedness_request(documents, generation: str):
+    from src.graph.nodes.local_grader import GradeRequest
+    # Context is the set of documents, Answer is the generation
+    return GradeRequest(context=_documents_text(documents), answer=generation, task="groundedness")
+
+def _usefulness_request(question: str, generation: str):
     from src.graph.nodes.local_grader import GradeRequest
-    CONFIDENCE_THRESHOLD = 0.7
+    return GradeRequest(context=question, answer=generation, task="usefulness")
+
+def _run_local(request, threshold: float) -> str:
     try:
         grader = _get_local_grader()
-        # Context is the set of documents, Answer is the generation
-        request = GradeRequest(context=str(documents), answer=generation)
-        result = grader.grade_sync(request)
-        
-        print(f"---LOCAL GRADER: Latency {result.latency_ms:.2f}ms | Confidence {result.confidence:.4f}---")
-        
-        if result.confidence < CONFIDENCE_THRESHOLD:
-             logging.warning(f"Local grader low confidence ({result.confidence:.2f}), falling back to API")
-             return None
-        
-        print("---SUCCESS: USING LOCAL GUARDRAIL (LOW LATENCY)---")
-        return "yes" if result.is_faithful else "no"
+        if request.task not in grader.tasks:
+            # No trained head for this check in the loaded weights: quietly leave it to the API
+            return None
+        return _local_verdict(grader.grade_sync(request), threshold)
     except Exception as e:
         logging.error(f"Local grader error: {e}, falling back to API")
         return None
 
+async def _arun_local(request, threshold: float) -> str:
+    try:
+        grader = _get_local_grader()
+        if request.task not in grader.tasks:
+            return None
+        return _local_verdict(await grader.grade_async(request), threshold)
+    except Exception as e:
+        logging.error(f"Local grader error: {e}, falling back to API")
+        return None
+
+def _grade_with_local(documents, generation: str) -> str:
+    """Grade groundedness using local ModernBERT (Hallucination Detection)."""
+    return _run_local(_groundedness_request(documents, generation), CONFIDENCE_THRESHOLD)
+
+async def _agrade_with_local(documents, generation: str) -> str:
+    """Async variant of _grade_with_local; inference runs off the event loop."""
+    return await _arun_local(_groundedness_request(documents, generation), CONFIDENCE_THRESHOLD)
+
+def _grade_answer_with_local(question: str, generation: str) -> str:
+    """Grade answer usefulness using the local usefulness head."""
+    return _run_local(_usefulness_request(question, generation), USEFULNESS_THRESHOLD)
+
+async def _agrade_answer_with_local(question: str, generation: str) -> str:
+    """Async variant of _grade_answer_with_local."""
+    return await _arun_local(_usefulness_request(question, generation), USEFULNESS_THRESHOLD)
+
 class GradeHallucinations(BaseModel):
     """Binary score for hallucination check in generation text."""
     binary_score: Literal["yes", "no"] = Field(
@@ -52,75 +104,192 @@ class GradeAnswer(BaseModel):
         description="Answer resolves the question, 'yes' or 'no'"
     )
 
-def check_hallucination(state: AgentState) -> dict:
-    """
-    Checks if the generation is a hallucination or not supported by documents.
-    """
-    print("---CHECK HALLUCINATION---")
-    documents = state["documents"]
-    generation = state["generation"]
-    question = state["question"]
+def _api_verdict(schema, prompt: str) -> str:
+    """Structured Gemini verdict, served from the verdict cache when possible."""
+    cache = get_verdict_cache()
+    key = make_key(schema.__name__, MODEL_NAME, prompt)
+    score = cache.get(key)
+    if score is None:
+        score = llm.with_structured_output(schema).invoke(prompt).binary_score
+        cache.set(key, score)
+    return score
+
+async def _aapi_verdict(schema, prompt: str) -> str:
+    """Async variant of _api_verdict."""
+    cache = get_verdict_cache()
+    key = make_key(schema.__name__, MODEL_NAME, prompt)
+    score = await cache.aget(key)
+    if score is None:
+        score = (await llm.with_structured_output(schema).ainvoke(prompt)).binary_score
+        await cache.aset(key, score)
+    return score
+
+def _hallucination_prompt(documents, generation: str, route: str) -> str:
+    if USE_LOCAL_GRADER:
+         print("---LOCAL GRADER FALLBACK: Calling API---")
     
-    route = state.get("route", "vectorstore")
+    if route == "web_search":
+        print("---HALLUCINATION CHECK: WEB SEARCH MODE (LENIENT)---")
+        system = """You are a lenient grader assessing whether an LLM generation is grounded in a set of web search snippets.
+        The snippets may be partial or incomplete. 
+        If the answer is reasonable given the context, grade it as 'yes'.
+        Only grade 'no' if the answer directly contradicts the snippets or is completely unrelated."""
+    else:
+        print("---HALLUCINATION CHECK: DOCUMENT MODE (STRICT)---")
+        system = """You are a grader assessing whether an LLM generation is grounded in / supported by a set of retrieved facts. \n 
+        Give a binary score 'yes' or 'no'. 'yes' means that the answer is grounded in and supported by the set of facts."""
     
+    return f"System: {system}\nSet of Facts: {documents}\nLLM Generation: {generation}"
+
+def _answer_prompt(question: str, generation: str, route: str) -> str:
+    if route == "web_search":
+         system_answer = """You are a lenient grader. The snippets might not contain the full answer.
+         If the generation addresses the question partially or provides a summary based on available info, grade as 'yes'."""
+    else:
+        system_answer = """You are a grader assessing whether an answer addresses / resolves a question \n 
+        Give a binary score 'yes' or 'no'. 'yes' means that the answer resolves the question."""
+        
+    return f"System: {system_answer}\nUser Question: {question}\nLLM Generation: {generation}"
+
+def _answer_result(answer_score: str, retry_count: int) -> dict:
+    if answer_score == "yes":
+         print("---DECISION: GENERATION ADDRESSES QUESTION---")
+         return {"hallucination_grade": "useful", "retry_count": 0} # Reset on success? Or keep?
+    else:
+         print("---DECISION: GENERATION DOES NOT ADDRESS QUESTION---")
+         return {"hallucination_grade": "not useful", "retry_count": retry_count + 1}
+
+def _not_grounded_result(retry_count: int) -> dict:
+    print("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS (HALLUCINATION)---")
+    return {"hallucination_grade": "not useful", "retry_count": retry_count + 1}
+
+def _grade_groundedness(documents, generation: str, route: str) -> str:
+    """Local groundedness head first (if enabled), Gemini otherwise; errors count as 'no'."""
     score = None
     
     # Try Local Grader first if enabled (only for non-web search usually, or if we trust it for web too)
     # The training data was general, so it might work for web snippets too.
     if USE_LOCAL_GRADER:
-        score = _grade_with_local(str(documents), generation)
+        score = _grade_with_local(documents, generation)
     
     if score is None:
-        if USE_LOCAL_GRADER:
-             print("---LOCAL GRADER FALLBACK: Calling API---")
-        
         # API Grading Logic
-        structured_llm_grader = llm.with_structured_output(GradeHallucinations)
+        hallucination_prompt = _hallucination_prompt(documents, generation, route)
         
-        if route == "web_search":
-            print("---HALLUCINATION CHECK: WEB SEARCH MODE (LENIENT)---")
-            system = """You are a lenient grader assessing whether an LLM generation is grounded in a set of web search snippets.
-            The snippets may be partial or incomplete. 
-            If the answer is reasonable given the context, grade it as 'yes'.
-            Only grade 'no' if the answer directly contradicts the snippets or is completely unrelated."""
-        else:
-            print("---HALLUCINATION CHECK: DOCUMENT MODE (STRICT)---")
-            system = """You are a grader assessing whether an LLM generation is grounded in / supported by a set of retrieved facts. \n 
-            Give a binary score 'yes' or 'no'. 'yes' means that the answer is grounded in and supported by the set of facts."""
-        
-        hallucination_prompt = f"System: {system}\nSet of Facts: {documents}\nLLM Generation: {generation}"
+        try:
+            score = _api_verdict(GradeHallucinations, hallucination_prompt)
+        except Exception as e:
+            print(f"Hallucination grading error: {e}")
+            score = "no"
+    return score
+
+async def _agrade_groundedness(documents, generation: str, route: str) -> str:
+    score = None
+    
+    if USE_LOCAL_GRADER:
+        score = await _agrade_with_local(documents, generation)
+    
+    if score is None:
+        hallucination_prompt = _hallucination_prompt(documents, generation, route)
         
         try:
-            grade = structured_llm_grader.invoke(hallucination_prompt)
-            score = grade.binary_score
+            score = await _aapi_verdict(GradeHallucinations, hallucination_prompt)
         except Exception as e:
             print(f"Hallucination grading error: {e}")
             score = "no"
+    return score
+
+def _grade_usefulness(question: str, generation: str, route: str) -> str:
+    """Local usefulness head first (if enabled), Gemini otherwise."""
+    answer_score = _grade_answer_with_local(question, generation) if USE_LOCAL_GRADER else None
+    if answer_score is None:
+        answer_score = _api_verdict(GradeAnswer, _answer_prompt(question, generation, route))
+    return answer_score
 
+async def _agrade_usefulness(question: str, generation: str, route: str) -> str:
+    answer_score = await _agrade_answer_with_local(question, generation) if USE_LOCAL_GRADER else None
+    if answer_score is None:
+        answer_score = await _aapi_verdict(GradeAnswer, _answer_prompt(question, generation, route))
+    return answer_score
+
+def check_hallucination(state: AgentState) -> dict:
+    """
+    Checks if the generation is a hallucination or not supported by documents.
+
+    With HALLUCINATION_PARALLEL_CHECKS the usefulness check starts alongside
+    the groundedness check instead of after it. When the generation is not
+    grounded the node returns right away: an API call that already started
+    cannot be interrupted, so it still completes (and is billed) in the
+    background and its verdict is ignored.
+    """
+    print("---CHECK HALLUCINATION---")
+    # Check against what the generator actually saw
+    documents = state.get("context") or state["documents"]
+    generation = state["generation"]
+    question = state["question"]
+    
+    route = state.get("route", "vectorstore")
     retry_count = state.get("retry_count", 0)
     
+    if PARALLEL_CHECKS:
+        # ContextThreadPoolExecutor keeps callbacks (tracing) attached to the usefulness call
+        executor = ContextThreadPoolExecutor(max_workers=1)
+        try:
+            answer_future = executor.submit(_grade_usefulness, question, generation, route)
+            score = _grade_groundedness(documents, generation, route)
+            if score != "yes":
+                return _not_grounded_result(retry_count)
+            print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
+            return _answer_result(answer_future.result(), retry_count)
+        finally:
+            # Not a `with` block: exiting one would wait for the discarded usefulness call
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    score = _grade_groundedness(documents, generation, route)
+    
     if score == "yes":
         print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
         
         # 2. Check Answer Quality
-        structured_llm_grader_answer = llm.with_structured_output(GradeAnswer)
-        
-        if route == "web_search":
-             system_answer = """You are a lenient grader. The snippets might not contain the full answer.
-             If the generation addresses the question partially or provides a summary based on available info, grade as 'yes'."""
-        else:
-            system_answer = """You are a grader assessing whether an answer addresses / resolves a question \n 
-            Give a binary score 'yes' or 'no'. 'yes' means that the answer resolves the question."""
-            
-        answer_prompt = f"System: {system_answer}\nUser Question: {question}\nLLM Generation: {generation}"
+        return _answer_result(_grade_usefulness(question, generation, route), retry_count)
+    else:
+        return _not_grounded_result(retry_count)
+
+async def acheck_hallucination(state: AgentState) -> dict:
+    """
+    Async variant of check_hallucination used by graph_app.ainvoke.
+    
+    Local inference and API calls are awaited, so a slow grade never stalls
+    other requests on the same event loop. In parallel mode the usefulness
+    task is cancelled as soon as groundedness fails.
+    """
+    print("---CHECK HALLUCINATION---")
+    # Check against what the generator actually saw
+    documents = state.get("context") or state["documents"]
+    generation = state["generation"]
+    question = state["question"]
+    
+    route = state.get("route", "vectorstore")
+    retry_count = state.get("retry_count", 0)
+    
+    if PARALLEL_CHECKS:
+        answer_task = asyncio.create_task(_agrade_usefulness(question, generation, route))
+        try:
+            score = await _agrade_groundedness(documents, generation, route)
+        except BaseException:
+            answer_task.cancel()
+            raise
+        if score != "yes":
+            answer_task.cancel()
+            return _not_grounded_result(retry_count)
+        print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
+        return _answer_result(await answer_task, retry_count)
+    
+    score = await _agrade_groundedness(documents, generation, route)
+    
+    if score == "yes":
+        print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
         
-        grade_answer = structured_llm_grader_answer.invoke(answer_prompt)
-        if grade_answer.binary_score == "yes":
-             print("---DECISION: GENERATION ADDRESSES QUESTION---")
-             return {"hallucination_grade": "useful", "retry_count": 0} # Reset on success? Or keep?
-        else:
-             print("---DECISION: GENERATION DOES NOT ADDRESS QUESTION---")
-             return {"hallucination_grade": "not useful", "retry_count": retry_count + 1}
+        return _answer_result(await _agrade_usefulness(question, generation, route), retry_count)
     else:
-        print("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS (HALLUCINATION)---")
-        return {"hallucination_grade": "not useful", "retry_count": retry_count + 1} 
+        return _not_grounded_result(retry_count)
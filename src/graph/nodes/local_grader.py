@@ -3,30 +3,67 @@ local_grader.py - Local ModernBERT Hallucination Grader
 
 Replaces cloud API calls with low-latency local inference.
 Supports hot-swappable fallback logic.
+
+One shared encoder serves three heads: groundedness (hallucination),
+document relevance and answer usefulness.
 """
 
+import os
+import asyncio
+import logging
+import queue
+import threading
+import time
 import torch
-from typing import Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Literal, Optional, Sequence
 from pydantic import BaseModel
 from transformers import AutoTokenizer, AutoModel
 import torch.nn as nn
+from src.cache import get_verdict_cache, make_key
+
+
+# Classification heads on the shared encoder
+TASKS = ("groundedness", "relevance", "usefulness")
+
+# Prompt pieces per task: "{context prefix} {context}{answer prefix} {answer}".
+# The second field is always kept whole by the token budget.
+TASK_PREFIXES = {
+    "groundedness": ("Context:", " Answer:"),   # context=documents, answer=generation
+    "relevance": ("Document:", " Question:"),   # context=document, answer=question
+    "usefulness": ("Question:", " Answer:"),    # context=question, answer=generation
+}
 
 
 class GradeRequest(BaseModel):
     """Input schema for grading requests."""
     context: str
     answer: str
+    task: Literal["groundedness", "relevance", "usefulness"] = "groundedness"
 
 
 class GradeResponse(BaseModel):
-    """Output schema for grading results."""
+    """Output schema for grading results (is_faithful is the positive class: faithful / relevant / useful)."""
     is_faithful: bool
     confidence: float
     latency_ms: float
 
 
+# Padded sequence lengths; every batch is padded up to the smallest bucket that fits
+DEFAULT_LENGTH_BUCKETS = (128, 256, 512, 1024, 2048, 4096, 8192)
+
+# How contexts longer than the budget are handled, and how window verdicts are combined
+LONG_CONTEXT_MODES = ("truncate", "window")
+WINDOW_AGGREGATIONS = ("max_faithful", "mean")
+
+
 class ModernBERTClassifier(nn.Module):
-    """ModernBERT with classification head - matches training notebook."""
+    """
+    ModernBERT with classification heads - matches training notebook.
+    
+    The groundedness head keeps the notebook's `classifier` name so existing
+    guardrail weights load unchanged; the other heads live under `heads.<task>`.
+    """
     
     def __init__(self, model_name: str = 'answerdotai/ModernBERT-base', num_labels: int = 2, quantization_config=None, attn_implementation=None):
         super().__init__()
@@ -36,14 +73,31 @@ class ModernBERTClassifier(nn.Module):
             attn_implementation=attn_implementation,
             dtype=torch.float16 if quantization_config or attn_implementation else torch.float32
         )
+        self.num_labels = num_labels
         self.dropout = nn.Dropout(0.1)
         self.classifier = nn.Linear(768, num_labels)
+        self.heads = nn.ModuleDict({task: nn.Linear(768, num_labels) for task in TASKS if task != "groundedness"})
+    
+    def head(self, task: str) -> nn.Module:
+        return self.classifier if task == "groundedness" else self.heads[task]
     
-    def forward(self, input_ids, attention_mask):
+    def forward(self, input_ids, attention_mask, tasks: Optional[List[str]] = None):
+        """
+        Encode once and apply each row's head.
+        
+        Args:
+            tasks: Per-row task names; None means groundedness for every row
+        """
         outputs = self.bert(input_ids=input_ids, attention_mask=attention_mask)
         pooled = outputs.last_hidden_state[:, 0, :]
         pooled = self.dropout(pooled)
-        logits = self.classifier(pooled)
+        if tasks is None:
+            return self.classifier(pooled)
+        
+        logits = pooled.new_empty((pooled.shape[0], self.num_labels))
+        for task in set(tasks):
+            rows = [i for i, t in enumerate(tasks) if t == task]
+            logits[rows] = self.head(task)(pooled[rows]).to(logits.dtype)
         return logits
 
 
@@ -59,7 +113,16 @@ class LocalHallucinationGrader:
         model_path: str = "./models/guardrail_v1.pt",
         base_model: str = "answerdotai/ModernBERT-base",
         use_quantization: bool = True,
-        use_flash_attn: bool = True
+        use_flash_attn: bool = True,
+        inference_threads: int = 1,
+        use_cache: bool = True,
+        max_tokens: int = 8192,
+        length_buckets: Sequence[int] = DEFAULT_LENGTH_BUCKETS,
+        long_context: str = "truncate",
+        window_tokens: int = 512,
+        window_overlap: int = 64,
+        window_aggregation: str = "max_faithful",
+        max_windows: int = 16
     ):
         """
         Initialize the local 10ms Guardrail.
@@ -69,6 +132,18 @@ class LocalHallucinationGrader:
             base_model: Base model for tokenizer
             use_quantization: Use 4-bit NF4 quantization (requires bitsandbytes)
             use_flash_attn: Use Flash Attention 2 for 2x speedup
+            inference_threads: Size of the dedicated executor backing grade_async
+            use_cache: Serve repeated requests from the shared verdict cache
+            max_tokens: Token budget per input; the answer is always kept whole
+                and the remainder is filled with context
+            length_buckets: Fixed sequence lengths inputs are padded up to
+            long_context: "truncate" to cut context at the budget, or "window" to
+                score overlapping context windows against the answer
+            window_tokens: Context tokens per window (window mode); the answer is
+                added on top, within `max_tokens`
+            window_overlap: Context tokens shared by consecutive windows
+            window_aggregation: "max_faithful" (grounded in any window) or "mean"
+            max_windows: Upper bound on windows per request, to keep latency bounded
         """
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         print(f"[LocalGrader] Initializing on {self.device}")
@@ -91,8 +166,17 @@ class LocalHallucinationGrader:
             attn_impl = "flash_attention_2"
             print("[LocalGrader] Flash Attention 2 Enabled")
         
-        # 3. Load tokenizer
+        # 3. Load tokenizer and token budget
         self.tokenizer = AutoTokenizer.from_pretrained(base_model)
+        self._configure_budget(
+            max_tokens,
+            length_buckets,
+            long_context=long_context,
+            window_tokens=window_tokens,
+            window_overlap=window_overlap,
+            window_aggregation=window_aggregation,
+            max_windows=max_windows
+        )
         
         # 4. Load model architecture with optimizations
         self.model = ModernBERTClassifier(
@@ -103,17 +187,35 @@ class LocalHallucinationGrader:
         
         # 5. Load fine-tuned weights
         # Note: If quantized, we load weights differently
+        # Groundedness is always served (as before); extra heads only once trained weights exist
+        # (scripts/train_heads.py adds them to the guardrail weights)
+        self.tasks = {"groundedness"}
         try:
             state_dict = torch.load(model_path, map_location=self.device)
             # Filter state dict for the classifier head if needed
             self.model.load_state_dict(state_dict, strict=False)
-            print(f"[LocalGrader] Weights loaded from {model_path}")
+            self.tasks |= {task for task in TASKS if f"heads.{task}.weight" in state_dict}
+            print(f"[LocalGrader] Weights loaded from {model_path} (heads: {sorted(self.tasks)})")
         except Exception as e:
             print(f"[LocalGrader] Warning: Weight load failed or partial load: {e}")
         
         self.model.to(self.device)
         self.model.eval()
         
+        # 6. Dedicated, bounded executor so async callers never block the event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, inference_threads),
+            thread_name_prefix="local-grader"
+        )
+        
+        # 7. Verdict cache, versioned by weights and every setting that changes the score
+        self.cache = get_verdict_cache() if use_cache else None
+        weights_mtime = os.path.getmtime(model_path) if os.path.exists(model_path) else None
+        self.cache_version = (
+            f"local:{base_model}:{model_path}:{weights_mtime}:{self.max_tokens}:{self.long_context}:"
+            f"{self.window_tokens}:{self.window_overlap}:{self.window_aggregation}:{self.max_windows}"
+        )
+        
         print(f"[LocalGrader] Ready!")
     
     def grade_sync(self, request: GradeRequest) -> GradeResponse:
@@ -128,59 +230,397 @@ class LocalHallucinationGrader:
         Returns:
             GradeResponse with is_faithful, confidence, latency_ms
         """
-        import time
+        return self.grade_batch([request])[0]
+    
+    async def grade_async(self, request: GradeRequest) -> GradeResponse:
+        """
+        Grade an answer without blocking the event loop.
+        
+        Inference runs on the grader's dedicated executor, so at most
+        `inference_threads` forward passes compete for the CPU at once.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.grade_sync, request)
+    
+    def grade_batch(self, requests: List[GradeRequest], check_cache: bool = True) -> List[GradeResponse]:
+        """
+        Grade several answers in a single padded forward pass.
+        
+        Args:
+            requests: GradeRequests to score together
+            check_cache: Look each request up in the verdict cache first; False
+                when the caller already did (e.g. the micro-batcher at submit)
+            
+        Returns:
+            One GradeResponse per request, in the same order
+        """
+        if not requests:
+            return []
+        
+        unsupported = {r.task for r in requests} - self.tasks
+        if unsupported:
+            raise ValueError(f"[LocalGrader] No trained head for {sorted(unsupported)}")
+        if not check_cache:
+            return self._infer(requests)
+        
+        # Only cache misses reach the model
+        cached = [self.lookup(r) for r in requests]
+        misses = [r for r, hit in zip(requests, cached) if hit is None]
+        fresh = iter(self._infer(misses) if misses else [])
+        return [hit if hit is not None else next(fresh) for hit in cached]
+    
+    def lookup(self, request: GradeRequest) -> Optional[GradeResponse]:
+        """Return a cached verdict for this request, if any."""
+        if self.cache is None:
+            return None
+        start = time.perf_counter()
+        hit = self.cache.get(self._cache_key(request))
+        if hit is None:
+            return None
+        return GradeResponse(**hit, latency_ms=(time.perf_counter() - start) * 1000)
+    
+    def _cache_key(self, request: GradeRequest) -> str:
+        return make_key(self.cache_version, request.task, request.context, request.answer)
+    
+    def _infer(self, requests: List[GradeRequest]) -> List[GradeResponse]:
         start = time.perf_counter()
         
         try:
-            # Format input (matches training data format)
-            input_text = f"Context: {request.context} Answer: {request.answer}"
-            
-            # Tokenize with ModernBERT's 8k context window
-            inputs = self.tokenizer(
-                input_text,
-                return_tensors="pt",
-                truncation=True,
-                max_length=8192,
-                padding=True
-            )
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            # Budgeted encoding (one or more windows per request), padded to the
+            # smallest bucket that fits the batch
+            encoded = [self._encode_windows(r) for r in requests]
+            input_ids, attention_mask = self._collate([ids for windows in encoded for ids in windows])
+            row_tasks = [r.task for r, windows in zip(requests, encoded) for _ in windows]
             
-            # Inference
+            # Inference: every window of every request, across heads, in one encoder pass
             with torch.no_grad():
-                logits = self.model(
-                    inputs['input_ids'],
-                    inputs['attention_mask']
-                )
+                logits = self.model(input_ids, attention_mask, tasks=row_tasks)
                 probs = torch.softmax(logits, dim=-1)
-                predicted_class = torch.argmax(probs, dim=-1).item()
-                confidence = probs[0, predicted_class].item()
             
             latency_ms = (time.perf_counter() - start) * 1000
             
-            return GradeResponse(
-                is_faithful=bool(predicted_class == 1),
-                confidence=confidence,
-                latency_ms=latency_ms
-            )
+            responses = []
+            offset = 0
+            for windows in encoded:
+                request_probs = self._aggregate(probs[offset:offset + len(windows)])
+                offset += len(windows)
+                predicted_class = int(torch.argmax(request_probs))
+                responses.append(GradeResponse(
+                    is_faithful=bool(predicted_class == 1),
+                    confidence=float(request_probs[predicted_class]),
+                    latency_ms=latency_ms
+                ))
+            
+            if self.cache is not None:
+                for request, response in zip(requests, responses):
+                    self.cache.set(
+                        self._cache_key(request),
+                        {"is_faithful": response.is_faithful, "confidence": response.confidence}
+                    )
+            return responses
             
         except Exception as e:
             raise RuntimeError(f"[LocalGrader] Inference failed: {e}")
+    
+    def _configure_budget(
+        self,
+        max_tokens: int,
+        length_buckets: Sequence[int],
+        long_context: str = "truncate",
+        window_tokens: int = 512,
+        window_overlap: int = 64,
+        window_aggregation: str = "max_faithful",
+        max_windows: int = 16
+    ):
+        """Pre-tokenize the fixed prompt pieces and sanitize the bucket and window settings."""
+        if long_context not in LONG_CONTEXT_MODES:
+            raise ValueError(f"long_context must be one of {LONG_CONTEXT_MODES}, got {long_context!r}")
+        if window_aggregation not in WINDOW_AGGREGATIONS:
+            raise ValueError(f"window_aggregation must be one of {WINDOW_AGGREGATIONS}, got {window_aggregation!r}")
+        
+        self.max_tokens = max_tokens
+        self.length_buckets = sorted({b for b in length_buckets if b < max_tokens} | {max_tokens})
+        self.long_context = long_context
+        self.window_tokens = min(window_tokens, max_tokens)
+        self.window_overlap = max(0, window_overlap)
+        self.window_aggregation = window_aggregation
+        self.max_windows = max(1, max_windows)
+        # Prompt pieces, e.g. "Context: {context} Answer: {answer}" (matches training data format).
+        # Leading spaces live on the following piece so BPE merges match the joint string.
+        self._prefixes = {
+            task: (self._tokenize(context_prefix), self._tokenize(answer_prefix))
+            for task, (context_prefix, answer_prefix) in TASK_PREFIXES.items()
+        }
+        self._num_special = self.tokenizer.num_special_tokens_to_add(pair=False)
+    
+    def _tokenize(self, text: str) -> List[int]:
+        return self.tokenizer(text, add_special_tokens=False)["input_ids"]
+    
+    def _encode(self, request: GradeRequest) -> List[int]:
+        """
+        Encode a request within the token budget.
+        
+        The answer is what gets graded, so it is kept in full and the context
+        is truncated to whatever room is left (rather than cutting the tail
+        of the joint string, which drops the answer first).
+        """
+        room = self._room(self.max_tokens, request.task)
+        answer_ids = self._tokenize(f" {request.answer}")[:room]
+        context_ids = self._tokenize(f" {request.context}")[:room - len(answer_ids)]
+        return self._build(context_ids, answer_ids, request.task)
+    
+    def _encode_windows(self, request: GradeRequest) -> List[List[int]]:
+        """
+        Encode a request as one or more (context window, answer) inputs.
+        
+        In window mode, a context that does not fit next to the answer is split
+        into overlapping chunks of `window_tokens` context tokens, each paired
+        with the full answer (within `max_tokens`), instead of being silently
+        truncated. The answer never eats into a window's context, so long
+        answers do not shrink the stride or starve the windows.
+        """
+        if self.long_context != "window":
+            return [self._encode(request)]
+        
+        room = self._room(self.max_tokens, request.task)
+        answer_ids = self._tokenize(f" {request.answer}")[:room]
+        context_ids = self._tokenize(f" {request.context}")
+        context_room = min(self.window_tokens, room - len(answer_ids))
+        
+        if len(context_ids) <= context_room or context_room < max(1, self.window_tokens // 2):
+            # Fits in one input, or the answer leaves room for less than half a
+            # window: grade what fits next to it, as in truncate mode
+            return [self._encode(request)]
+        
+        # Consecutive windows share at most half a window, so the stride stays useful
+        overlap = min(self.window_overlap, context_room // 2)
+        stride = context_room - overlap
+        windows = []
+        start = 0
+        while len(windows) < self.max_windows:
+            windows.append(self._build(context_ids[start:start + context_room], answer_ids, request.task))
+            if start + context_room >= len(context_ids):
+                return windows
+            start += stride
+        
+        covered = start - stride + context_room
+        logging.warning(
+            f"[LocalGrader] max_windows={self.max_windows} covers {covered}/{len(context_ids)} context tokens "
+            f"({request.task}); the rest is not graded"
+        )
+        return windows
+    
+    def _room(self, sequence_length: int, task: str) -> int:
+        """Tokens left for context + answer once special tokens and prompt pieces are placed."""
+        context_prefix, answer_prefix = self._prefixes[task]
+        return sequence_length - self._num_special - len(context_prefix) - len(answer_prefix)
+    
+    def _build(self, context_ids: List[int], answer_ids: List[int], task: str) -> List[int]:
+        context_prefix, answer_prefix = self._prefixes[task]
+        ids = context_prefix + context_ids + answer_prefix + answer_ids
+        return self.tokenizer.build_inputs_with_special_tokens(ids)
+    
+    def _aggregate(self, window_probs: torch.Tensor) -> torch.Tensor:
+        """Combine per-window class probabilities into one distribution."""
+        if window_probs.shape[0] == 1:
+            return window_probs[0]
+        if self.window_aggregation == "mean":
+            return window_probs.mean(dim=0)
+        # max_faithful: the answer is grounded if any window supports it
+        return window_probs[torch.argmax(window_probs[:, 1])]
+    
+    def _collate(self, encoded: List[List[int]]):
+        """Right-pad encoded inputs to the smallest length bucket that fits the longest one."""
+        longest = max(len(ids) for ids in encoded)
+        length = next(b for b in self.length_buckets if b >= longest)
+        pad_id = self.tokenizer.pad_token_id or 0
+        
+        input_ids = torch.full((len(encoded), length), pad_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(encoded), length), dtype=torch.long)
+        for row, ids in enumerate(encoded):
+            input_ids[row, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+            attention_mask[row, :len(ids)] = 1
+        return input_ids.to(self.device), attention_mask.to(self.device)
+
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching front end for LocalHallucinationGrader.
+    
+    Concurrent callers enqueue requests; a background collector gathers them
+    for up to `max_wait_ms` or `max_batch_size` items, runs one padded forward
+    pass and hands each caller its own GradeResponse.
+    """
+    
+    def __init__(
+        self,
+        grader: LocalHallucinationGrader,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0
+    ):
+        """
+        Args:
+            grader: Underlying grader that performs the batched forward pass
+            max_batch_size: Upper bound on requests per forward pass
+            max_wait_ms: How long the collector waits to fill a batch
+        """
+        self.grader = grader
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max_wait_ms
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker = threading.Thread(target=self._collect, name="local-grader-batcher", daemon=True)
+        self._worker.start()
+    
+    @property
+    def device(self) -> str:
+        return self.grader.device
+    
+    @property
+    def tasks(self):
+        """Tasks the underlying grader has trained heads for."""
+        return self.grader.tasks
+    
+    def submit(self, request: GradeRequest) -> Future:
+        """Enqueue a request and return a Future resolving to its GradeResponse."""
+        future: Future = Future()
+        if request.task not in self.grader.tasks:
+            # Fail fast so one unsupported request cannot poison a shared batch
+            future.set_exception(ValueError(f"[LocalGrader] No trained head for {request.task!r}"))
+            return future
+        hit = self.grader.lookup(request)
+        if hit is not None:
+            # Cached verdicts skip the queue entirely
+            future.set_result(hit)
+            return future
+        self._queue.put((request, future, time.perf_counter()))
+        return future
+    
+    def grade_sync(self, request: GradeRequest) -> GradeResponse:
+        """Drop-in replacement for LocalHallucinationGrader.grade_sync."""
+        return self.submit(request).result()
+    
+    async def grade_async(self, request: GradeRequest) -> GradeResponse:
+        """Await a batched verdict; the collector thread does the work, not the event loop."""
+        return await asyncio.wrap_future(self.submit(request))
+    
+    def grade_batch(self, requests: List[GradeRequest]) -> List[GradeResponse]:
+        """Grade a list of requests, letting the collector merge them with other callers."""
+        futures = [self.submit(r) for r in requests]
+        return [f.result() for f in futures]
+    
+    def close(self):
+        """Stop the collector after draining already queued requests."""
+        self._queue.put(_STOP)
+        self._worker.join()
+    
+    def _collect(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            
+            self._run(batch)
+    
+    def _run(self, batch):
+        # Drop callers that gave up before we got to them
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        
+        try:
+            # Cache hits never get queued (see submit), so skip a second lookup
+            results = self.grader.grade_batch([request for request, _, _ in batch], check_cache=False)
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        
+        done = time.perf_counter()
+        for (_, future, enqueued), result in zip(batch, results):
+            # Report what the caller experienced: queueing + shared forward pass
+            future.set_result(result.model_copy(update={"latency_ms": (done - enqueued) * 1000}))
+
+
+def _length_buckets_from_env() -> Sequence[int]:
+    raw = os.getenv("LOCAL_GRADER_LENGTH_BUCKETS")
+    if not raw:
+        return DEFAULT_LENGTH_BUCKETS
+    return tuple(int(b) for b in raw.split(",") if b.strip())
 
 
 # Global instance for FastAPI startup
 _grader_instance: Optional[LocalHallucinationGrader] = None
 
 
+def grader_settings_from_env() -> dict:
+    """LocalHallucinationGrader keyword arguments from the LOCAL_GRADER_* settings."""
+    return dict(
+        model_path=os.getenv("LOCAL_GRADER_MODEL_PATH", "./models/guardrail_v1.pt"),
+        inference_threads=int(os.getenv("LOCAL_GRADER_INFERENCE_THREADS", "1")),
+        max_tokens=int(os.getenv("LOCAL_GRADER_MAX_TOKENS", "8192")),
+        length_buckets=_length_buckets_from_env(),
+        long_context=os.getenv("LOCAL_GRADER_LONG_CONTEXT", "truncate"),
+        window_tokens=int(os.getenv("LOCAL_GRADER_WINDOW_TOKENS", "512")),
+        window_overlap=int(os.getenv("LOCAL_GRADER_WINDOW_OVERLAP", "64")),
+        window_aggregation=os.getenv("LOCAL_GRADER_WINDOW_AGGREGATION", "max_faithful"),
+        max_windows=int(os.getenv("LOCAL_GRADER_MAX_WINDOWS", "16"))
+    )
+
+
 def get_grader() -> LocalHallucinationGrader:
     """Get or create the global grader instance."""
     global _grader_instance
     if _grader_instance is None:
-        _grader_instance = LocalHallucinationGrader()
+        _grader_instance = LocalHallucinationGrader(**grader_settings_from_env())
     return _grader_instance
 
 
-def init_grader(model_path: str = "./models/guardrail_v1.pt"):
-    """Initialize grader at FastAPI startup."""
+def init_grader(model_path: Optional[str] = None):
+    """Initialize grader at FastAPI startup (same settings as get_grader)."""
     global _grader_instance
-    _grader_instance = LocalHallucinationGrader(model_path=model_path)
+    settings = grader_settings_from_env()
+    if model_path:
+        settings["model_path"] = model_path
+    _grader_instance = LocalHallucinationGrader(**settings)
     return _grader_instance
+
+
+# Global micro-batcher (opt-in via LOCAL_GRADER_BATCHING)
+_batcher_instance: Optional[MicroBatcher] = None
+USE_LOCAL_BATCHING = os.getenv("LOCAL_GRADER_BATCHING", "false").lower() == "true"
+
+
+def get_batcher() -> MicroBatcher:
+    """Get or create the global micro-batcher wrapping the global grader."""
+    global _batcher_instance
+    if _batcher_instance is None:
+        _batcher_instance = MicroBatcher(
+            get_grader(),
+            max_batch_size=int(os.getenv("LOCAL_GRADER_MAX_BATCH_SIZE", "16")),
+            max_wait_ms=float(os.getenv("LOCAL_GRADER_MAX_WAIT_MS", "5"))
+        )
+    return _batcher_instance
+
+
+def get_shared_grader():
+    """Grader used by the graph nodes: the micro-batcher if LOCAL_GRADER_BATCHING is set."""
+    return get_batcher() if USE_LOCAL_BATCHING else get_grader()
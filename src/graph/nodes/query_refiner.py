@@ -1,7 +1,5 @@
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from src.graph.state import AgentState
-from src.llm import llm
+from src.rewrite import get_rewriter
 
 def refine_query(state: AgentState) -> AgentState:
     """
@@ -10,20 +8,21 @@ def refine_query(state: AgentState) -> AgentState:
     print("---REFINE QUERY---")
     question = state["question"]
     
-    # Prompt
-    system = """You are an expert at optimizing queries for vector search. 
-    Look at the initial question and formulate a better question that expresses the same intent but is more likely to retrieve relevant documents.
-    Return ONLY the refined question."""
-    
-    prompt = PromptTemplate(
-        template=f"{system}\n\nInitial Question: {{question}}\nRefined Question:",
-        input_variables=["question"],
-    )
+    # Memoized: the same question is only sent to the LLM once per cache TTL
+    refined_question = get_rewriter().rewrite("refine", question)
+    print(f"---REFINED QUESTION: {refined_question}---")
     
-    # Chain
-    chain = prompt | llm | StrOutputParser()
+    retry_count = state.get("retry_count", 0)
+    return {"question": refined_question, "retry_count": retry_count + 1}
+
+async def arefine_query(state: AgentState) -> AgentState:
+    """
+    Async variant of refine_query used by graph_app.ainvoke.
+    """
+    print("---REFINE QUERY---")
+    question = state["question"]
     
-    refined_question = chain.invoke({"question": question})
+    refined_question = await get_rewriter().arewrite("refine", question)
     print(f"---REFINED QUESTION: {refined_question}---")
     
     retry_count = state.get("retry_count", 0)
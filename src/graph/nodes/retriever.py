@@ -1,22 +1,47 @@
 from src.graph.state import AgentState
 from src.vectorstore import get_retriever
 
+def _format_documents(documents):
+    doc_contents = []
+    for doc in documents:
+        source = doc.metadata.get("source", "Unknown")
+        content = f"Content: {doc.page_content}\nSource: {source}"
+        doc_contents.append(content)
+    return doc_contents
+
+def _retrieved(documents, question):
+    return {
+        "documents": _format_documents(documents),
+        "document_scores": [doc.metadata.get("score") for doc in documents],
+        "question": question,
+    }
+
 def retrieve(state: AgentState) -> AgentState:
     """
-    Retrieves documents from the vector store.
+    Retrieves documents from the vector store (only from state["sources"] when set).
+    """
+    print("---RETRIEVE---")
+    question = state["question"]
+    
+    retriever = get_retriever()
+    try:
+        documents = retriever.invoke(question, sources=state.get("sources"))
+        return _retrieved(documents, question)
+    except Exception as e:
+        print(f"Retrieval Error: {e}")
+        return {"documents": [], "document_scores": [], "question": question}
+
+async def aretrieve(state: AgentState) -> AgentState:
+    """
+    Async variant of retrieve: queries Qdrant through the pooled async client.
     """
     print("---RETRIEVE---")
     question = state["question"]
     
     retriever = get_retriever()
     try:
-        documents = retriever.invoke(question)
-        doc_contents = []
-        for doc in documents:
-            source = doc.metadata.get("source", "Unknown")
-            content = f"Content: {doc.page_content}\nSource: {source}"
-            doc_contents.append(content)
-        return {"documents": doc_contents, "question": question}
+        documents = await retriever.ainvoke(question, sources=state.get("sources"))
+        return _retrieved(documents, question)
     except Exception as e:
         print(f"Retrieval Error: {e}")
-        return {"documents": [], "question": question}
+        return {"documents": [], "document_scores": [], "question": question}
@@ -0,0 +1,73 @@
+"""
+speculative.py - Speculative Retrieval
+
+Starts the web search at the same time as vector retrieval instead of only
+after the graded vector results come back empty. Out-of-corpus questions no
+longer pay for retrieval + grading before the search even begins; in-corpus
+questions pay for one discarded (or cancelled) search.
+"""
+
+import asyncio
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from src.graph.state import AgentState
+from src.graph.nodes.retriever import retrieve, aretrieve
+from src.graph.nodes.grader import grade_documents, agrade_documents
+from src.graph.nodes.web_search import web_search, aweb_search
+
+
+def _vector_result(graded: dict) -> dict:
+    print("---SPECULATION: VECTORSTORE HIT, DISCARDING WEB SEARCH---")
+    return {
+        "documents": graded["documents"],
+        "document_scores": graded.get("document_scores"),
+        "question": graded["question"],
+        "route": "vectorstore",
+    }
+
+
+def speculative_retrieve(state: AgentState) -> AgentState:
+    """
+    Vector retrieval + grading with the web search running alongside.
+
+    Returns graded vector documents (route "vectorstore") when any are
+    relevant, otherwise the ungraded web results (route "web_search").
+    """
+    print("---SPECULATIVE RETRIEVE---")
+    vector_state = {**state, "route": "vectorstore"}
+
+    # ContextThreadPoolExecutor keeps callbacks (tracing) attached to the search
+    executor = ContextThreadPoolExecutor(max_workers=1)
+    try:
+        web_future = executor.submit(web_search, state)
+        graded = grade_documents({**vector_state, **retrieve(vector_state)})
+        if graded["documents"]:
+            # A search that already started cannot be interrupted: it finishes in the
+            # background (filling the rewrite and search caches) and its result is dropped
+            return _vector_result(graded)
+        print("---SPECULATION: VECTORSTORE MISS, USING WEB SEARCH---")
+        return web_future.result()
+    finally:
+        # Not a `with` block: exiting one would wait for the discarded search
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def aspeculative_retrieve(state: AgentState) -> AgentState:
+    """
+    Async variant of speculative_retrieve; the web search task is cancelled
+    as soon as the vector results pass grading.
+    """
+    print("---SPECULATIVE RETRIEVE---")
+    vector_state = {**state, "route": "vectorstore"}
+
+    web_task = asyncio.create_task(aweb_search(state))
+    try:
+        graded = await agrade_documents({**vector_state, **(await aretrieve(vector_state))})
+    except BaseException:
+        web_task.cancel()
+        raise
+
+    if graded["documents"]:
+        web_task.cancel()
+        return _vector_result(graded)
+    print("---SPECULATION: VECTORSTORE MISS, USING WEB SEARCH---")
+    return await web_task
@@ -6,8 +6,11 @@ class AgentState(TypedDict):
     """
     question: str
     generation: Optional[str]
+    context: Optional[str] # Prompt context built from the graded documents (compress_context)
     documents: List[str] # List of retrieved document contents
+    document_scores: Optional[List[Optional[float]]] # Retrieval similarity per document (None for web results)
     step: str # Current step in the graph
     hallucination_grade: Optional[str] # 'useful' or 'not useful'
     retry_count: int = 0 # Track correction attempts
     route: Optional[str] # 'vectorstore', 'web_search', 'general'
+    sources: Optional[List[str]] # Restrict retrieval to chunks from these sources (metadata.source)
@@ -1,11 +1,18 @@
+import os
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, StateGraph
 from src.graph.state import AgentState
-from src.graph.nodes.retriever import retrieve
-from src.graph.nodes.grader import grade_documents
-from src.graph.nodes.generator import generate
-from src.graph.nodes.query_refiner import refine_query
-from src.graph.nodes.hallucination_monitor import check_hallucination
-from src.graph.nodes.web_search import web_search
+from src.graph.nodes.retriever import retrieve, aretrieve
+from src.graph.nodes.grader import grade_documents, agrade_documents
+from src.graph.nodes.compressor import compress_context, acompress_context
+from src.graph.nodes.generator import generate, agenerate
+from src.graph.nodes.query_refiner import refine_query, arefine_query
+from src.graph.nodes.hallucination_monitor import check_hallucination, acheck_hallucination
+from src.graph.nodes.web_search import web_search, aweb_search
+from src.graph.nodes.speculative import speculative_retrieve, aspeculative_retrieve
+
+# Start the web search alongside vector retrieval (opt-in: costs a search per in-corpus question)
+SPECULATIVE_WEB_SEARCH = os.getenv("SPECULATIVE_WEB_SEARCH", "false").lower() == "true"
 
 def decide_to_generate_or_fallback(state):
     """
@@ -69,23 +76,50 @@ def route_refinement(state):
         print("---DECISION: RETRY VECTORSTORE---")
         return "retrieve"
 
-def compile_graph():
+def route_speculation(state):
+    print("---ROUTE SPECULATION---")
+    if state.get("route") == "web_search":
+        # Vector results were irrelevant: grade the web results that were fetched in parallel
+        print("---DECISION: GRADE WEB RESULTS---")
+        return "grade_documents"
+    # Vector results were already graded inside the speculative node
+    print("---DECISION: GENERATE (Data Found)---")
+    return "generate"
+
+def compile_graph(speculative: bool = SPECULATIVE_WEB_SEARCH):
     """
     Compiles the state graph with Dynamic Fallback logic.
-    Entry -> Retrieve -> Grade -> (No Docs?) -> Web Search -> Grade -> Generate
+    Entry -> Retrieve -> Grade -> (No Docs?) -> Web Search -> Grade -> Compress -> Generate
+
+    With `speculative`, the entry node retrieves, grades and web-searches in parallel:
+    Entry -> Speculative Retrieve -> (Relevant Docs?) -> Compress -> Generate
+                                  -> (No Docs?)       -> Grade Web Results -> Compress -> Generate
     """
     workflow = StateGraph(AgentState)
 
-    # Define nodes
-    workflow.add_node("retrieve", retrieve)
-    workflow.add_node("web_search", web_search)
-    workflow.add_node("grade_documents", grade_documents)
-    workflow.add_node("generate", generate)
-    workflow.add_node("refine_query", refine_query)
-    workflow.add_node("hallucination_monitor", check_hallucination)
+    # Define nodes (sync invoke runs the plain function, ainvoke awaits the async variant)
+    workflow.add_node("retrieve", RunnableLambda(retrieve, afunc=aretrieve))
+    workflow.add_node("web_search", RunnableLambda(web_search, afunc=aweb_search))
+    workflow.add_node("grade_documents", RunnableLambda(grade_documents, afunc=agrade_documents))
+    workflow.add_node("compress_context", RunnableLambda(compress_context, afunc=acompress_context))
+    workflow.add_node("generate", RunnableLambda(generate, afunc=agenerate))
+    workflow.add_node("refine_query", RunnableLambda(refine_query, afunc=arefine_query))
+    workflow.add_node("hallucination_monitor", RunnableLambda(check_hallucination, afunc=acheck_hallucination))
 
-    # Entry Point: Always try Vector Store First (Lookup-First Strategy)
-    workflow.set_entry_point("retrieve")
+    if speculative:
+        workflow.add_node("speculative_retrieve", RunnableLambda(speculative_retrieve, afunc=aspeculative_retrieve))
+        workflow.set_entry_point("speculative_retrieve")
+        workflow.add_conditional_edges(
+            "speculative_retrieve",
+            route_speculation,
+            {
+                "generate": "compress_context",
+                "grade_documents": "grade_documents",
+            },
+        )
+    else:
+        # Entry Point: Always try Vector Store First (Lookup-First Strategy)
+        workflow.set_entry_point("retrieve")
     
     # Retrieve -> Grade
     workflow.add_edge("retrieve", "grade_documents")
@@ -98,7 +132,7 @@ def compile_graph():
         "grade_documents",
         decide_to_generate_or_fallback,
         {
-            "generate": "generate",
+            "generate": "compress_context",     # Trim context, then generate
             "web_search": "web_search",         # Fallback path
             "refine_query": "refine_query",     # Give up / Retry path
         },
@@ -114,6 +148,9 @@ def compile_graph():
         }
     )
     
+    # Compress -> Generate
+    workflow.add_edge("compress_context", "generate")
+
     # Generate -> Hallucination Monitor
     workflow.add_edge("generate", "hallucination_monitor")
     
@@ -1,8 +1,8 @@
 from dotenv import load_dotenv
 load_dotenv()
 from langchain_core.documents import Document
-from src.vectorstore import get_vectorstore, client, COLLECTION_NAME, embeddings
-from qdrant_client.http import models
+from src.vectorstore import get_vectorstore, ensure_collection
+from src.ingest_pipeline import chunk_id
 
 def ingest_data():
     """
@@ -26,19 +26,12 @@ def ingest_data():
         )
     ]
     
-    # Ensure collection exists
-    try:
-        client.get_collection(COLLECTION_NAME)
-        print(f"Collection {COLLECTION_NAME} exists.")
-    except Exception:
-        print(f"Creating collection {COLLECTION_NAME}...")
-        client.create_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=models.VectorParams(size=768, distance=models.Distance.COSINE),
-        )
+    # Ensure collection exists (dense + sparse vectors for hybrid search)
+    ensure_collection()
 
     vectorstore = get_vectorstore()
-    vectorstore.add_documents(docs)
+    # Deterministic IDs: re-running overwrites these points instead of duplicating them
+    vectorstore.add_documents(docs, ids=[chunk_id(d.metadata["source"], d.page_content) for d in docs])
     print("---DATA INGESTED---")
 
 if __name__ == "__main__":
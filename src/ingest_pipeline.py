@@ -0,0 +1,470 @@
+"""
+ingest_pipeline.py - Streaming Bulk Ingestion
+
+Staged asyncio pipeline for loading large corpora into Qdrant:
+
+    paths -> [loader pool] -> documents -> [splitter] -> chunk batches
+          -> [embedders, capped concurrency] -> points -> [upserters] -> Qdrant
+
+Every hand-off is a bounded queue, so a slow stage (usually embedding under
+rate limits) applies backpressure instead of letting documents pile up in
+memory. Embedding and upsert calls retry with exponential backoff.
+
+Ingestion is incremental. Point IDs are uuid5 hashes of (source, chunk
+content), so re-upserting a chunk overwrites it instead of duplicating it,
+and a SQLite manifest records each file's content hash and point IDs:
+
+    unchanged file   skipped before splitting (no embedding, no upsert)
+    changed file     only new chunks are embedded; vanished chunks are deleted
+    deleted file     all of its points are deleted
+
+A file's manifest entry is written only once its chunks are stored, so an
+interrupted run simply resumes: finished files are unchanged next time.
+Sources are normalized first (see `source_name`), so `./data/a.md` and
+`data/a.md` are the same file to the manifest, the point IDs and the
+`metadata.source` filter.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import fnmatch
+import hashlib
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from qdrant_client.http import models
+
+# Payload layout used by langchain_qdrant, so QdrantVectorStore can read the points
+CONTENT_KEY = "page_content"
+METADATA_KEY = "metadata"
+
+# Namespace for deterministic point IDs (any fixed UUID works; changing it re-keys every point)
+POINT_NAMESPACE = uuid.UUID("6f1c2a4e-8d3b-5f7a-9c0e-2b4d6f8a1c3e")
+
+# Sources are recorded relative to the project root, whatever the working directory
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Queue sentinel
+_DONE = None
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(source: str, content: str) -> str:
+    """Deterministic point ID for a chunk: same source and content -> same point."""
+    return str(uuid.uuid5(POINT_NAMESPACE, f"{source}\n{content_hash(content)}"))
+
+
+def source_name(path: str) -> str:
+    """
+    Canonical source for a file path: relative to the project root with `/`
+    separators (e.g. "data/q3.md"), or absolute if it lies outside the project.
+    """
+    absolute = os.path.abspath(path)
+    relative = os.path.relpath(absolute, PROJECT_ROOT)
+    if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+        return absolute.replace(os.sep, "/")
+    return relative.replace(os.sep, "/")
+
+
+def _source_path(source: str) -> str:
+    """Filesystem path of a manifest source (the inverse of source_name)."""
+    return os.path.join(PROJECT_ROOT, source)
+
+
+class IngestManifest:
+    """
+    Per-file record of what is indexed: content hash and point IDs.
+
+    SQLite so a run over tens of thousands of files commits one row per
+    finished file instead of rewriting a whole JSON document.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: SQLite file; None keeps the manifest in memory (every run is a full ingest)
+        """
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS manifest ("
+            "collection TEXT NOT NULL, source TEXT NOT NULL, file_hash TEXT NOT NULL, point_ids TEXT NOT NULL, "
+            "PRIMARY KEY (collection, source))"
+        )
+        self._db.commit()
+
+    def get(self, collection: str, source: str) -> Optional[Tuple[str, List[str]]]:
+        row = self._db.execute(
+            "SELECT file_hash, point_ids FROM manifest WHERE collection = ? AND source = ?", (collection, source)
+        ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def set(self, collection: str, source: str, file_hash: str, point_ids: List[str]):
+        self._db.execute(
+            "INSERT OR REPLACE INTO manifest (collection, source, file_hash, point_ids) VALUES (?, ?, ?, ?)",
+            (collection, source, file_hash, json.dumps(point_ids))
+        )
+        self._db.commit()
+
+    def remove(self, collection: str, source: str):
+        self._db.execute("DELETE FROM manifest WHERE collection = ? AND source = ?", (collection, source))
+        self._db.commit()
+
+    def sources(self, collection: str) -> List[str]:
+        return [row[0] for row in self._db.execute("SELECT source FROM manifest WHERE collection = ?", (collection,))]
+
+
+@dataclass
+class IngestStats:
+    files: int = 0
+    unchanged_files: int = 0
+    removed_files: int = 0
+    failed_files: int = 0
+    chunks: int = 0
+    unchanged_chunks: int = 0
+    deleted_chunks: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    retries: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.elapsed if self.elapsed else 0.0
+
+    def report(self) -> str:
+        return (
+            f"{self.chunks} new chunks from {self.files} changed files in {self.elapsed:.1f}s "
+            f"({self.chunks_per_second:.1f} chunks/s) | batches: {self.batches} "
+            f"(failed {self.failed_batches}, retries {self.retries}) | "
+            f"unchanged: {self.unchanged_files} files, {self.unchanged_chunks} chunks | "
+            f"deleted: {self.deleted_chunks} chunks, {self.removed_files} files | failed files: {self.failed_files}"
+        )
+
+
+@dataclass
+class _Batch:
+    ids: List[str]
+    texts: List[str]
+    metadatas: List[dict]
+    # Chunks each source file contributes to this batch
+    sources: Dict[str, int]
+    points: Optional[List[models.PointStruct]] = None
+
+
+def find_files(data_dir: str, pattern: str = "*.md") -> Iterator[str]:
+    """Lazily walk `data_dir` for files matching `pattern` (sorted per directory)."""
+    for root, dirs, files in os.walk(data_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if fnmatch.fnmatch(name, pattern):
+                yield os.path.join(root, name)
+
+
+class IngestPipeline:
+    """
+    Loads, splits, embeds and upserts files with bounded memory.
+
+    Peak memory is roughly `queue_size` items per stage plus the batches in
+    flight, independent of corpus size.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        client,
+        collection_name: str,
+        sparse_embeddings=None,
+        sparse_vector_name: str = "langchain-sparse",
+        chunk_size: int = 500,
+        chunk_overlap: int = 50,
+        batch_size: int = 64,
+        loader_workers: int = 4,
+        embed_concurrency: int = 4,
+        upsert_concurrency: int = 2,
+        queue_size: int = 8,
+        max_retries: int = 5,
+        retry_base_delay: float = 1.0,
+        manifest: Optional[IngestManifest] = None
+    ):
+        """
+        Args:
+            embeddings: LangChain Embeddings with aembed_documents
+            client: AsyncQdrantClient
+            collection_name: Target collection (must exist)
+            sparse_embeddings: Also write sparse vectors (hybrid collections)
+            sparse_vector_name: Name of the sparse vector in the collection
+            chunk_size: Characters per chunk
+            chunk_overlap: Overlapping characters between chunks
+            batch_size: Chunks per embedding call and per upsert
+            loader_workers: Files read concurrently
+            embed_concurrency: Embedding calls in flight (keep under the API rate limit)
+            upsert_concurrency: Qdrant upserts in flight
+            queue_size: Capacity of each inter-stage queue
+            max_retries: Attempts per batch before it is counted as failed
+            retry_base_delay: First backoff in seconds (doubles each retry)
+            manifest: What is already indexed; None means an in-memory (full) ingest
+        """
+        self.embeddings = embeddings
+        self.client = client
+        self.collection_name = collection_name
+        self.sparse_embeddings = sparse_embeddings
+        self.sparse_vector_name = sparse_vector_name
+        self.splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        # Part of every file hash, so changing the chunking re-processes the corpus
+        self._split_config = f"chunk_size={chunk_size},chunk_overlap={chunk_overlap}"
+        self.batch_size = batch_size
+        self.loader_workers = loader_workers
+        self.embed_concurrency = embed_concurrency
+        self.upsert_concurrency = upsert_concurrency
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.manifest = manifest or IngestManifest()
+
+    # Pipeline
+
+    async def _retry(self, stage: str, func, *args):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                return await func(*args)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.retry_base_delay * 2 ** (attempt - 1)
+                self._stats.retries += 1
+                print(f"  [{stage} retry {attempt}/{self.max_retries - 1} in {delay:.1f}s]: {e}")
+                await asyncio.sleep(delay)
+
+    def _load(self, path: str) -> str:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    async def _produce(self, paths: Iterable[str], path_queue: asyncio.Queue):
+        for path in paths:
+            await path_queue.put(path)
+        for _ in range(self.loader_workers):
+            await path_queue.put(_DONE)
+
+    async def _loader(self, path_queue: asyncio.Queue, doc_queue: asyncio.Queue):
+        while (path := await path_queue.get()) is not _DONE:
+            try:
+                text = await asyncio.to_thread(self._load, path)
+            except Exception as e:
+                print(f"  [Load Failed] {path}: {e}")
+                self._stats.failed_files += 1
+                continue
+            source = source_name(path)
+            file_hash = content_hash(f"{self._split_config}\n{text}")
+            indexed = self.manifest.get(self.collection_name, source)
+            if indexed is not None and indexed[0] == file_hash and not self._full:
+                # Nothing changed: no split, no embedding, no upsert
+                self._stats.unchanged_files += 1
+                continue
+            await doc_queue.put((source, text, file_hash, indexed[1] if indexed else []))
+
+    async def _split(self, doc_queue: asyncio.Queue, embed_queue: asyncio.Queue):
+        batch = _Batch([], [], [], {})
+        while (item := await doc_queue.get()) is not _DONE:
+            source, text, file_hash, old_ids = item
+            chunks = await asyncio.to_thread(self.splitter.split_text, text)
+            self._stats.files += 1
+
+            # Identical chunks within a file share an ID, so keep the first
+            chunk_ids = {}
+            for chunk in chunks:
+                chunk_ids.setdefault(chunk_id(source, chunk), chunk)
+            indexed = set() if self._full else set(old_ids)
+            new_chunks = [(i, c) for i, c in chunk_ids.items() if i not in indexed]
+            self._stats.unchanged_chunks += len(chunk_ids) - len(new_chunks)
+            self._updates[source] = (file_hash, list(chunk_ids), [i for i in old_ids if i not in chunk_ids])
+            self._pending[source] = len(new_chunks)
+            if not new_chunks:
+                await self._finish(source)
+                continue
+            for point_id, chunk in new_chunks:
+                batch.ids.append(point_id)
+                batch.texts.append(chunk)
+                batch.metadatas.append({"source": source})
+                batch.sources[source] = batch.sources.get(source, 0) + 1
+                if len(batch.texts) >= self.batch_size:
+                    await embed_queue.put(batch)
+                    batch = _Batch([], [], [], {})
+        if batch.texts:
+            await embed_queue.put(batch)
+        for _ in range(self.embed_concurrency):
+            await embed_queue.put(_DONE)
+
+    def _points(self, batch: _Batch, dense: List[List[float]], sparse) -> List[models.PointStruct]:
+        points = []
+        for i, (point_id, text, metadata) in enumerate(zip(batch.ids, batch.texts, batch.metadatas)):
+            if sparse is None:
+                vector = dense[i]
+            else:
+                vector = {
+                    "": dense[i],
+                    self.sparse_vector_name: models.SparseVector(indices=sparse[i].indices, values=sparse[i].values),
+                }
+            points.append(models.PointStruct(id=point_id, vector=vector, payload={CONTENT_KEY: text, METADATA_KEY: metadata}))
+        return points
+
+    async def _embed(self, embed_queue: asyncio.Queue, upsert_queue: asyncio.Queue):
+        while (batch := await embed_queue.get()) is not _DONE:
+            try:
+                dense = await self._retry("embed", self.embeddings.aembed_documents, batch.texts)
+                sparse = await self.sparse_embeddings.aembed_documents(batch.texts) if self.sparse_embeddings else None
+            except Exception as e:
+                self._fail(batch, "Embed", e)
+                continue
+            batch.points = self._points(batch, dense, sparse)
+            await upsert_queue.put(batch)
+
+    async def _upsert_points(self, points: List[models.PointStruct]):
+        await self.client.upsert(collection_name=self.collection_name, points=points, wait=True)
+
+    async def _upsert(self, upsert_queue: asyncio.Queue):
+        while (batch := await upsert_queue.get()) is not _DONE:
+            try:
+                await self._retry("upsert", self._upsert_points, batch.points)
+            except Exception as e:
+                self._fail(batch, "Upsert", e)
+                continue
+            self._stats.batches += 1
+            self._stats.chunks += len(batch.texts)
+            for source, count in batch.sources.items():
+                self._pending[source] -= count
+                if self._pending[source] == 0:
+                    await self._finish(source)
+
+    async def _delete_points(self, point_ids: List[str]):
+        await self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.PointIdsList(points=point_ids),
+            wait=True
+        )
+
+    async def _finish(self, source: str):
+        """All new chunks of `source` are stored: drop its stale chunks and record it."""
+        if source in self._failed_sources:
+            return
+        file_hash, point_ids, stale = self._updates.pop(source)
+        if stale:
+            try:
+                await self._retry("delete", self._delete_points, stale)
+            except Exception as e:
+                print(f"  [Delete Failed] {source}: {e}")
+                self._failed_sources.add(source)
+                return
+            self._stats.deleted_chunks += len(stale)
+        self.manifest.set(self.collection_name, source, file_hash, point_ids)
+
+    async def _prune(self):
+        """
+        Delete the points of indexed files that no longer exist on disk, and of
+        entries recorded under another spelling of a path that is now indexed
+        under its canonical source.
+        """
+        sources = self.manifest.sources(self.collection_name)
+        indexed = set(sources)
+        for source in sources:
+            canonical = source_name(_source_path(source))
+            if os.path.exists(_source_path(source)) and (canonical == source or canonical not in indexed):
+                continue
+            _, point_ids = self.manifest.get(self.collection_name, source)
+            try:
+                if point_ids:
+                    await self._retry("delete", self._delete_points, point_ids)
+            except Exception as e:
+                print(f"  [Delete Failed] {source}: {e}")
+                continue
+            self.manifest.remove(self.collection_name, source)
+            self._stats.removed_files += 1
+            self._stats.deleted_chunks += len(point_ids)
+
+    def _fail(self, batch: _Batch, stage: str, error: Exception):
+        print(f"  [{stage} Failed] batch of {len(batch.texts)} chunks: {error}")
+        self._stats.failed_batches += 1
+        # Never record these files in the manifest, so the next run retries them
+        self._failed_sources.update(batch.sources)
+        for source, count in batch.sources.items():
+            self._pending[source] -= count
+
+    async def run(self, paths: Iterable[str], prune: bool = True, full: bool = False) -> IngestStats:
+        """
+        Ingest what changed in `paths`.
+
+        Args:
+            paths: Files to sync
+            prune: Also delete points of indexed files that no longer exist
+            full: Re-embed every chunk, even unchanged ones (IDs are deterministic,
+                so this overwrites points rather than duplicating them)
+        """
+        self._stats = IngestStats()
+        self._pending: Dict[str, int] = {}
+        self._updates: Dict[str, Tuple[str, List[str], List[str]]] = {}
+        self._failed_sources: Set[str] = set()
+        self._full = full
+
+        path_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        doc_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        embed_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        upsert_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+
+        async def loaders():
+            await asyncio.gather(*(self._loader(path_queue, doc_queue) for _ in range(self.loader_workers)))
+            await doc_queue.put(_DONE)
+
+        async def embedders():
+            await asyncio.gather(*(self._embed(embed_queue, upsert_queue) for _ in range(self.embed_concurrency)))
+            for _ in range(self.upsert_concurrency):
+                await upsert_queue.put(_DONE)
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            self._produce(paths, path_queue),
+            loaders(),
+            self._split(doc_queue, embed_queue),
+            embedders(),
+            *(self._upsert(upsert_queue) for _ in range(self.upsert_concurrency)),
+        )
+        if prune:
+            await self._prune()
+        self._stats.failed_files += len(self._failed_sources)
+        self._stats.elapsed = time.perf_counter() - start
+        return self._stats
+
+
+def _sparse_for_collection():
+    """Sparse encoder when the target collection is hybrid, else None."""
+    from src.vectorstore import _use_sparse, sparse_embeddings
+    return sparse_embeddings if _use_sparse() else None
+
+
+def get_pipeline(**overrides) -> IngestPipeline:
+    """Pipeline wired to the app's collection, embeddings and pooled async client."""
+    from src.vectorstore import COLLECTION_NAME, SPARSE_VECTOR_NAME, embeddings, get_async_client
+    settings = dict(
+        embeddings=embeddings,
+        client=get_async_client(),
+        collection_name=COLLECTION_NAME,
+        sparse_embeddings=_sparse_for_collection(),
+        sparse_vector_name=SPARSE_VECTOR_NAME,
+        batch_size=int(os.getenv("INGEST_BATCH_SIZE", "64")),
+        loader_workers=int(os.getenv("INGEST_LOADER_WORKERS", "4")),
+        embed_concurrency=int(os.getenv("INGEST_EMBED_CONCURRENCY", "4")),
+        upsert_concurrency=int(os.getenv("INGEST_UPSERT_CONCURRENCY", "2")),
+        queue_size=int(os.getenv("INGEST_QUEUE_SIZE", "8")),
+        max_retries=int(os.getenv("INGEST_MAX_RETRIES", "5")),
+        manifest=IngestManifest(os.getenv("INGEST_MANIFEST_PATH", ".cache/ingest_manifest.sqlite")),
+    )
+    settings.update({k: v for k, v in overrides.items() if v is not None})
+    return IngestPipeline(**settings)
@@ -3,8 +3,10 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 
 # Initialize LLM backend
 # Using gemini-1.5-pro as the primary inference engine
+MODEL_NAME = "gemini-2.5-flash"
+
 llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
+    model=MODEL_NAME,
     temperature=0,
     max_retries=2,
 )
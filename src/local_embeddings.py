@@ -0,0 +1,119 @@
+"""
+local_embeddings.py - Local CPU Embedding Backend
+
+Sentence embeddings from a Hugging Face encoder running in-process, so
+retrieval and ingestion do not depend on an external embedding API or quota.
+The default model (BAAI/bge-base-en-v1.5) produces 768-dim vectors, the same
+size as text-embedding-004, but the two vector spaces are not compatible:
+local vectors live in their own collection (see src/vectorstore.py).
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Literal, Optional
+
+import torch
+import torch.nn.functional as F
+from langchain_core.embeddings import Embeddings
+from transformers import AutoModel, AutoTokenizer
+
+DEFAULT_LOCAL_MODEL = "BAAI/bge-base-en-v1.5"
+# bge models expect this prefix on queries (not on documents)
+BGE_QUERY_INSTRUCTION = "Represent this sentence for searching relevant passages: "
+
+
+class LocalEmbeddings(Embeddings):
+    """
+    Batched CPU encoder with CLS or mean pooling and L2-normalized output.
+
+    The model is loaded and run once at construction so the first real query
+    does not pay for lazy initialization. Texts are sorted by length before
+    batching to minimize padding; torch intra-op threads parallelize each batch.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_LOCAL_MODEL,
+        batch_size: int = 32,
+        num_threads: Optional[int] = None,
+        pooling: Literal["cls", "mean"] = "cls",
+        query_instruction: str = BGE_QUERY_INSTRUCTION,
+        max_length: int = 512,
+        device: Optional[str] = None
+    ):
+        """
+        Args:
+            model_name: Hugging Face model ID or local path
+            batch_size: Texts per forward pass when embedding documents
+            num_threads: torch intra-op threads (process-wide); None keeps torch's default
+            pooling: "cls" for bge-style models, "mean" for sentence-transformers models
+            query_instruction: Prefix added to queries only
+            max_length: Token limit per text
+            device: Defaults to CUDA if available, else CPU
+        """
+        if pooling not in ("cls", "mean"):
+            raise ValueError(f"pooling must be 'cls' or 'mean', got {pooling!r}")
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.pooling = pooling
+        self.query_instruction = query_instruction
+        self.max_length = max_length
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+
+        print(f"Loading local embedding model: {model_name} on {self.device}")
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).to(self.device).eval()
+        self.dimensions = self.model.config.hidden_size
+
+        # One forward pass at a time; each already uses every intra-op thread
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-embeddings")
+
+        # Warm-up: first pass allocates buffers and selects kernels
+        self._encode(["warm-up"])
+
+    def _pool(self, hidden: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        if self.pooling == "cls":
+            return hidden[:, 0]
+        mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+        return (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        # Longest first so each batch pads to similar lengths
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+
+        with self._lock, torch.inference_mode():
+            for start in range(0, len(order), self.batch_size):
+                indices = order[start:start + self.batch_size]
+                batch = self.tokenizer(
+                    [texts[i] for i in indices],
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_length,
+                    return_tensors="pt"
+                ).to(self.device)
+                hidden = self.model(**batch).last_hidden_state
+                pooled = F.normalize(self._pool(hidden, batch["attention_mask"]).float(), dim=-1)
+                for i, vector in zip(indices, pooled.cpu().tolist()):
+                    vectors[i] = vector
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._encode(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([self.query_instruction + text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Off the event loop, on the dedicated encoder thread
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.embed_query, text)
@@ -1,13 +1,32 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
+from typing import List, Optional
+from contextlib import asynccontextmanager
 import os
 load_dotenv() # Load before importing src modules
 
 from src.graph.workflow import app as graph_app
+from src.cache import cache_stats, get_response_cache
+from src.streaming import format_sse, stream_graph_events
+from src.usage import UsageTracker, record_usage, usage_stats
+
+# Semantic response cache (opt-in). Only answers from these routes are stored;
+# web_search is excluded by default so time-sensitive answers stay fresh.
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+RESPONSE_CACHE_ROUTES = {r.strip() for r in os.getenv("RESPONSE_CACHE_ROUTES", "vectorstore,general").split(",") if r.strip()}
 
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="Agentic Reasoning Engine", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the Qdrant connection pool so the first request only pays for the search
+    from src.vectorstore import warm_up, close
+    await warm_up()
+    yield
+    await close()
+
+app = FastAPI(title="Agentic Reasoning Engine", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,24 +51,117 @@ async def health_check():
         }
     }
 
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters for every in-process cache."""
+    return cache_stats()
+
+@app.get("/stats/usage")
+async def get_usage_stats():
+    """LLM calls, tokens and latency per graph node, summed over every request since startup."""
+    return usage_stats()
+
+def _inputs(question: str, sources: Optional[List[str]]) -> dict:
+    inputs = {"question": question}
+    if sources:
+        inputs["sources"] = sources
+    return inputs
+
+def _response_cache(bypass: Optional[str], sources: Optional[List[str]] = None):
+    """
+    The response cache, unless disabled or bypassed with `X-Cache-Bypass: true`.
+    Source-filtered requests skip it: cached answers are keyed by question only.
+    """
+    if not RESPONSE_CACHE_ENABLED or sources or (bypass or "").lower() in ("1", "true", "yes"):
+        return None
+    from src.vectorstore import embeddings
+    return get_response_cache(embeddings)
+
+def _with_usage(result: Optional[dict], tracker: UsageTracker, include_usage: bool) -> Optional[dict]:
+    """Record the request's LLM usage; attach it to the response if asked (never to cached entries)."""
+    report = record_usage(tracker)
+    if include_usage and result is not None:
+        return {**result, "usage": report}
+    return result
+
 @app.post("/invoke")
-async def invoke_agent(question: str):
+async def invoke_agent(
+    question: str,
+    sources: Optional[List[str]] = Query(None),
+    include_usage: bool = False,
+    x_cache_bypass: Optional[str] = Header(None)
+):
     """
     Invokes the agent interactions.
+    Repeat `sources` (e.g. `?sources=data/q3_report.md`) to search only those documents.
+    `include_usage=true` adds per-node LLM calls, tokens and latency as `usage`.
     """
     print(f"Received question: {question}")
-    inputs = {"question": question}
+    inputs = _inputs(question, sources)
+    usage_tracker = UsageTracker()
     try:
+        response_cache = _response_cache(x_cache_bypass, sources)
+        if response_cache is not None:
+            cached = await response_cache.lookup(question)
+            if cached is not None:
+                return _with_usage(cached, usage_tracker, include_usage)
+        
         from langfuse.langchain import CallbackHandler
         langfuse_handler = CallbackHandler()
         
-        # Pass the handler in the config map to graph_app.ainvoke
-        result = await graph_app.ainvoke(inputs, config={"callbacks": [langfuse_handler]})
-        return result
+        # Pass the handlers in the config map to graph_app.ainvoke
+        result = await graph_app.ainvoke(inputs, config={"callbacks": [langfuse_handler, usage_tracker]})
+        
+        if response_cache is not None and (result.get("route") or "vectorstore") in RESPONSE_CACHE_ROUTES:
+            await response_cache.store(question, result)
+        return _with_usage(result, usage_tracker, include_usage)
     except Exception as e:
         print(f"Error invoking graph: {e}")
+        record_usage(usage_tracker)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.api_route("/invoke/stream", methods=["GET", "POST"])
+async def stream_agent(
+    question: str,
+    sources: Optional[List[str]] = Query(None),
+    include_usage: bool = False,
+    x_cache_bypass: Optional[str] = Header(None)
+):
+    """
+    Streams graph progress (node start/finish) and generation tokens as Server-Sent Events.
+    """
+    print(f"Received question (stream): {question}")
+    inputs = _inputs(question, sources)
+    response_cache = _response_cache(x_cache_bypass, sources)
+    usage_tracker = UsageTracker()
+
+    async def events():
+        if response_cache is not None:
+            cached = await response_cache.lookup(question)
+            if cached is not None:
+                yield format_sse("done", _with_usage(cached, usage_tracker, include_usage))
+                return
+
+        from langfuse.langchain import CallbackHandler
+        langfuse_handler = CallbackHandler()
+
+        config = {"callbacks": [langfuse_handler, usage_tracker]}
+        async for event, data in stream_graph_events(graph_app, inputs, config=config):
+            if event == "done" and response_cache is not None and data \
+                    and (data.get("route") or "vectorstore") in RESPONSE_CACHE_ROUTES:
+                await response_cache.store(question, data)
+            if event == "done":
+                data = _with_usage(data, usage_tracker, include_usage)
+            elif event == "error":
+                record_usage(usage_tracker)
+            yield format_sse(event, data)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,170 @@
+"""
+rewrite.py - Memoized LLM Query Rewriting
+
+One service for every question rewrite in the graph:
+
+    "refine"   better phrasing for vector search (refine_query)
+    "search"   conversational question -> web search query (web_search)
+
+Rewrites are cached by (kind, model, normalized question), so the same
+question is rewritten once per TTL across requests and retries. Short
+keyword-style questions can optionally skip the LLM for the "search" kind,
+where the question already works as a query.
+"""
+
+import os
+import re
+from typing import Dict, Optional
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+
+from src.cache import TieredCache, get_cache, make_key
+from src.llm import llm, MODEL_NAME
+
+REFINE_TEMPLATE = """You are an expert at optimizing queries for vector search.
+    Look at the initial question and formulate a better question that expresses the same intent but is more likely to retrieve relevant documents.
+    Return ONLY the refined question.
+
+Initial Question: {question}
+Refined Question:"""
+
+SEARCH_TEMPLATE = """You are an expert at converting conversational user questions into effective web search queries.
+        Rules:
+        1. If the user asks for a specific fact (e.g. "CEO of...", "Population of..."), search for that exact term.
+        2. If the user asks for a **LIST** or "every" item (e.g. "List cities", "All pokemon"), you MUST include words like "list of", "table", or "wikipedia" to find structured data instead of blogs.
+
+        Examples:
+        "u dont know about the bicol region? can u search for it" -> Bicol region overview
+        "list every place in [X]" -> list of cities and municipalities in [X] wikipedia
+        "what are the [items] in [category]" -> list of [items] in [category]
+        "tell me about python 3.12" -> Python 3.12 features
+
+        Question: {question}
+        Search Query:"""
+
+REWRITE_TEMPLATES: Dict[str, str] = {
+    "refine": REFINE_TEMPLATE,
+    "search": SEARCH_TEMPLATE,
+}
+
+# Kinds where an unchanged question is a valid rewrite. Refining exists to
+# change a question that already failed retrieval, so it never skips.
+SKIPPABLE_KINDS = ("search",)
+
+# Words that mark a conversational question or a request the search prompt
+# handles specially (lists), so the LLM should still rewrite it
+CONVERSATIONAL_WORDS = frozenset(
+    "what who whom whose which when where why how is are was were do does did can could would should "
+    "will i me my you your u we us our please tell explain search find list every all".split()
+)
+
+
+def is_keyword_query(question: str, max_terms: int = 4) -> bool:
+    """
+    Cheap check for questions that are already search-engine style,
+    e.g. "Python 3.12 features" or "Bicol region".
+    """
+    if "?" in question:
+        return False
+    words = re.findall(r"[\w.+#-]+", question.lower())
+    return 0 < len(words) <= max_terms and not CONVERSATIONAL_WORDS.intersection(words)
+
+
+class QueryRewriter:
+    """LLM rewrites behind a bounded TTL cache, with an optional keyword-query shortcut."""
+
+    def __init__(self, cache: Optional[TieredCache] = None, skip_keyword_queries: bool = False, max_keyword_terms: int = 4):
+        """
+        Args:
+            cache: Rewrite cache; None disables caching
+            skip_keyword_queries: Return short keyword-style questions unchanged (skippable kinds only)
+            max_keyword_terms: Longest question (in words) treated as a keyword query
+        """
+        self.cache = cache
+        self.skip_keyword_queries = skip_keyword_queries
+        self.max_keyword_terms = max_keyword_terms
+        self.skipped = 0
+        self._chains = {
+            kind: PromptTemplate(template=template, input_variables=["question"]) | llm | StrOutputParser()
+            for kind, template in REWRITE_TEMPLATES.items()
+        }
+
+    def _chain(self, kind: str):
+        if kind not in self._chains:
+            raise ValueError(f"Unknown rewrite kind {kind!r}; expected one of {tuple(self._chains)}")
+        return self._chains[kind]
+
+    def _key(self, kind: str, question: str) -> str:
+        return make_key(kind, MODEL_NAME, question)
+
+    def _skip(self, kind: str, question: str) -> Optional[str]:
+        """The question itself, if it is a keyword query that needs no rewrite."""
+        self._chain(kind)
+        if self.skip_keyword_queries and kind in SKIPPABLE_KINDS \
+                and is_keyword_query(question, self.max_keyword_terms):
+            self.skipped += 1
+            print(f"---REWRITE SKIPPED ({kind}): keyword query---")
+            return question.strip()
+        return None
+
+    @staticmethod
+    def _hit(kind: str, cached: Optional[str]) -> Optional[str]:
+        if cached is not None:
+            print(f"---REWRITE CACHE HIT ({kind})---")
+        return cached
+
+    def _shortcut(self, kind: str, question: str) -> Optional[str]:
+        """The rewrite without calling the LLM, if it is cached or can be skipped."""
+        skipped = self._skip(kind, question)
+        if skipped is not None or self.cache is None:
+            return skipped
+        return self._hit(kind, self.cache.get(self._key(kind, question)))
+
+    async def _ashortcut(self, kind: str, question: str) -> Optional[str]:
+        """Async variant of _shortcut (a SQLite cache tier is read off the event loop)."""
+        skipped = self._skip(kind, question)
+        if skipped is not None or self.cache is None:
+            return skipped
+        return self._hit(kind, await self.cache.aget(self._key(kind, question)))
+
+    def _remember(self, kind: str, question: str, rewritten: str) -> str:
+        rewritten = rewritten.strip()
+        if self.cache is not None and rewritten:
+            self.cache.set(self._key(kind, question), rewritten)
+        return rewritten
+
+    async def _aremember(self, kind: str, question: str, rewritten: str) -> str:
+        rewritten = rewritten.strip()
+        if self.cache is not None and rewritten:
+            await self.cache.aset(self._key(kind, question), rewritten)
+        return rewritten
+
+    def rewrite(self, kind: str, question: str) -> str:
+        """Rewrite `question` for `kind`; LLM errors propagate and are not cached."""
+        shortcut = self._shortcut(kind, question)
+        if shortcut is not None:
+            return shortcut
+        return self._remember(kind, question, self._chain(kind).invoke({"question": question}))
+
+    async def arewrite(self, kind: str, question: str) -> str:
+        """Async variant of rewrite."""
+        shortcut = await self._ashortcut(kind, question)
+        if shortcut is not None:
+            return shortcut
+        return await self._aremember(kind, question, await self._chain(kind).ainvoke({"question": question}))
+
+# Global instance, configured from REWRITE_* settings
+_rewriter: Optional[QueryRewriter] = None
+
+
+def get_rewriter() -> QueryRewriter:
+    """Get or create the rewrite service shared by refine_query and web_search."""
+    global _rewriter
+    if _rewriter is None:
+        _rewriter = QueryRewriter(
+            cache=get_cache("rewrites", "REWRITE_CACHE", default_size=2048, default_ttl=3600),
+            skip_keyword_queries=os.getenv("REWRITE_SKIP_KEYWORD_QUERIES", "false").lower() == "true",
+            max_keyword_terms=int(os.getenv("REWRITE_KEYWORD_MAX_TERMS", "4"))
+        )
+    return _rewriter
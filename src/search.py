@@ -0,0 +1,252 @@
+"""
+search.py - Web Search Backends
+
+A small backend interface for the web_search node:
+
+    DuckDuckGoSearch   live DDGS text search (default)
+    FileSearch         JSON/JSONL corpus on disk, for offline tests and benchmarks
+
+SearchService sits in front of a backend. It runs every query variant
+concurrently with a per-call timeout, returns the results of the first
+variant (in priority order) that found anything, and caches results by
+normalized query with a TTL.
+"""
+
+import os
+import json
+import time
+import asyncio
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence
+
+from src.cache import TieredCache, get_cache, make_key, normalize
+
+# Results use the DDGS shape: {"title": ..., "body": ..., "href": ...}
+SearchResult = Dict[str, str]
+
+
+class SearchBackend(ABC):
+    """A source of web-style search results."""
+
+    name: str = "backend"
+
+    @abstractmethod
+    def search(self, query: str, max_results: int) -> List[SearchResult]:
+        """Blocking search; may raise on network or rate-limit errors."""
+
+
+class DuckDuckGoSearch(SearchBackend):
+    name = "duckduckgo"
+
+    def __init__(self, timeout: float = 5.0):
+        self.timeout = timeout
+
+    def search(self, query: str, max_results: int) -> List[SearchResult]:
+        import warnings
+        from ddgs import DDGS
+        warnings.filterwarnings("ignore", category=RuntimeWarning)
+        return DDGS(timeout=int(self.timeout) or None).text(query, max_results=max_results) or []
+
+
+class FileSearch(SearchBackend):
+    """
+    Offline stand-in: ranks records from a JSON list or JSONL file by how many
+    query terms they contain (title and body). Deterministic and instant.
+    """
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                self.records = [json.loads(line) for line in f if line.strip()]
+            else:
+                self.records = json.load(f)
+
+    def search(self, query: str, max_results: int) -> List[SearchResult]:
+        from src.sparse import tokenize
+        terms = set(tokenize(query))
+        scored = []
+        for i, record in enumerate(self.records):
+            words = set(tokenize(f"{record.get('title', '')} {record.get('body', '')}"))
+            score = len(terms & words)
+            if score:
+                scored.append((-score, i, record))
+        scored.sort(key=lambda item: item[:2])
+        return [
+            {"title": r.get("title", ""), "body": r.get("body", ""), "href": r.get("href", "")}
+            for _, _, r in scored[:max_results]
+        ]
+
+
+class SearchService:
+    """
+    Concurrent, cached front end for a SearchBackend.
+
+    Timed-out or failed calls count as "no results" and are not cached; a
+    hung call keeps its worker thread but never holds up the node.
+    """
+
+    def __init__(
+        self,
+        backend: SearchBackend,
+        cache: Optional[TieredCache] = None,
+        timeout: float = 5.0,
+        max_results: int = 3,
+        max_workers: int = 8
+    ):
+        """
+        Args:
+            backend: Where results come from
+            cache: Result cache keyed by normalized query; None disables caching
+            timeout: Seconds to wait for each query variant
+            max_results: Results requested per query
+            max_workers: Threads shared by all concurrent searches
+        """
+        self.backend = backend
+        self.cache = cache
+        self.timeout = timeout
+        self.max_results = max_results
+        # Not used as a context manager: exiting would wait on timed-out searches
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="web-search")
+
+    def _key(self, query: str) -> str:
+        return make_key(self.backend.name, normalize(query).lower(), self.max_results)
+
+    def _cached(self, query: str) -> Optional[List[SearchResult]]:
+        return self.cache.get(self._key(query)) if self.cache is not None else None
+
+    async def _acached(self, variants: List[str]) -> List[Optional[List[SearchResult]]]:
+        if self.cache is None:
+            return [None] * len(variants)
+        return await self.cache.aget_many([self._key(q) for q in variants])
+
+    def _run(self, query: str) -> List[SearchResult]:
+        results = self.backend.search(query, self.max_results)
+        if self.cache is not None:
+            self.cache.set(self._key(query), results)
+        return results
+
+    @staticmethod
+    def _variants(queries: Sequence[str]) -> List[str]:
+        # Drop empty and duplicate variants, keep priority order
+        seen, variants = set(), []
+        for query in queries:
+            key = normalize(query or "").lower()
+            if key and key not in seen:
+                seen.add(key)
+                variants.append(query.strip())
+        return variants
+
+    @staticmethod
+    def _decision(variants: List[str], results: List[Optional[List[SearchResult]]]) -> Optional[List[SearchResult]]:
+        """
+        The first variant's non-empty results in priority order, [] when every
+        variant came back empty, or None while a higher-priority variant is pending.
+        """
+        for query, hits in zip(variants, results):
+            if hits is None:
+                return None
+            if hits:
+                print(f"---SEARCH HIT: '{query}' ({len(hits)} results)---")
+                return hits
+        return []
+
+    def _report(self, query: str, error: Optional[Exception] = None):
+        reason = "timed out" if error is None else str(error)
+        print(f"  [Search Failed] '{query}': {reason}")
+
+    def _give_up(self, variants: List[str], results: List[Optional[List[SearchResult]]], pending: Dict) -> List[SearchResult]:
+        """Deadline reached: still-running variants count as misses (they keep their worker thread)."""
+        for future, i in pending.items():
+            future.cancel()
+            self._report(variants[i])
+            results[i] = []
+        return self._decision(variants, results)
+
+    def search(self, queries: Sequence[str]) -> List[SearchResult]:
+        """
+        Search every variant at once; return as soon as the highest-priority
+        variant that can still answer has results. All variants share one
+        `timeout` deadline.
+        """
+        variants = self._variants(queries)
+        results: List[Optional[List[SearchResult]]] = [self._cached(q) for q in variants]
+        pending = {self._executor.submit(self._run, q): i for i, q in enumerate(variants) if results[i] is None}
+        deadline = time.monotonic() + self.timeout
+
+        while (decision := self._decision(variants, results)) is None:
+            done, _ = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                return self._give_up(variants, results, pending)
+            for future in done:
+                i = pending.pop(future)
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    self._report(variants[i], e)
+                    results[i] = []
+        # Stop waiting on the rest: queued ones are dropped, running ones finish and cache in the background
+        for future in pending:
+            future.cancel()
+        return decision
+
+    async def asearch(self, queries: Sequence[str]) -> List[SearchResult]:
+        """Async variant of search; blocking backend calls run on the service's threads."""
+        variants = self._variants(queries)
+        # Cache writes happen in _run, already on the service's threads
+        results = await self._acached(variants)
+        loop = asyncio.get_running_loop()
+        pending = {
+            loop.run_in_executor(self._executor, self._run, q): i
+            for i, q in enumerate(variants) if results[i] is None
+        }
+        deadline = loop.time() + self.timeout
+
+        try:
+            while (decision := self._decision(variants, results)) is None:
+                done, _ = await asyncio.wait(
+                    pending, timeout=max(0.0, deadline - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    return self._give_up(variants, results, pending)
+                for future in done:
+                    i = pending.pop(future)
+                    try:
+                        results[i] = future.result()
+                    except Exception as e:
+                        self._report(variants[i], e)
+                        results[i] = []
+            return decision
+        finally:
+            # Same as search: queued variants are dropped, running ones finish and cache in the background
+            for future in pending:
+                future.cancel()
+
+
+# Global instance, configured from SEARCH_* settings
+_search_service: Optional[SearchService] = None
+
+
+def get_search_service() -> SearchService:
+    """Get or create the search service used by the web_search node."""
+    global _search_service
+    if _search_service is None:
+        timeout = float(os.getenv("SEARCH_TIMEOUT", "5"))
+        backend_name = os.getenv("SEARCH_BACKEND", "duckduckgo").lower()
+        if backend_name == "file":
+            backend = FileSearch(os.getenv("SEARCH_FILE_PATH", "data/search_corpus.jsonl"))
+        elif backend_name == "duckduckgo":
+            backend = DuckDuckGoSearch(timeout=timeout)
+        else:
+            raise ValueError(f"SEARCH_BACKEND must be 'duckduckgo' or 'file', got {backend_name!r}")
+
+        _search_service = SearchService(
+            backend,
+            cache=get_cache("search", "SEARCH_CACHE", default_size=1024, default_ttl=900),
+            timeout=timeout,
+            max_results=int(os.getenv("SEARCH_MAX_RESULTS", "3"))
+        )
+    return _search_service
@@ -0,0 +1,87 @@
+"""
+sparse.py - BM25-style Sparse Embeddings
+
+Lexical vectors for hybrid retrieval. Each token is hashed to a fixed index
+and weighted with BM25 term-frequency saturation; Qdrant applies the IDF half
+of BM25 server-side (the sparse vector is created with `Modifier.IDF`), so the
+statistics stay correct as the collection grows without re-encoding anything.
+
+Exact terms such as "Q3", "2025" or product names match even when the dense
+embedding ranks the chunk low.
+"""
+
+import re
+import zlib
+from collections import Counter
+from typing import Dict, List
+
+from langchain_qdrant.sparse_embeddings import SparseEmbeddings, SparseVector
+
+# Alphanumeric runs, so "Q3", "2025" and "gpt-4o" -> ["gpt", "4o"] survive as terms
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how in is it its of on or that the "
+    "their there this to was were what when where which who why will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25SparseEmbeddings(SparseEmbeddings):
+    """
+    Hashed BM25 encoder (no vocabulary to fit or ship).
+
+    Documents get saturated term frequencies; queries get weight 1 per unique
+    term, so the dot product Qdrant computes (times its IDF) is the BM25 score.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_length: float = 80.0, num_buckets: int = 2 ** 31 - 1):
+        """
+        Args:
+            k1: Term-frequency saturation
+            b: Document length normalization strength
+            avg_doc_length: Expected tokens per chunk (~80 for 500-character chunks)
+            num_buckets: Hash space for token indices
+        """
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = avg_doc_length
+        self.num_buckets = num_buckets
+
+    def _index(self, token: str) -> int:
+        # crc32 is stable across processes (unlike hash()), so ingest and query agree
+        return zlib.crc32(token.encode("utf-8")) % self.num_buckets
+
+    def _to_vector(self, weights: Dict[int, float]) -> SparseVector:
+        indices = sorted(weights)
+        return SparseVector(indices=indices, values=[weights[i] for i in indices])
+
+    def embed_document(self, text: str) -> SparseVector:
+        tokens = tokenize(text)
+        length_norm = 1 - self.b + self.b * len(tokens) / self.avg_doc_length
+        weights: Dict[int, float] = {}
+        for token, tf in Counter(tokens).items():
+            index = self._index(token)
+            # Hash collisions simply add up
+            weights[index] = weights.get(index, 0.0) + tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+        return self._to_vector(weights)
+
+    def embed_documents(self, texts: List[str]) -> List[SparseVector]:
+        return [self.embed_document(text) for text in texts]
+
+    def embed_query(self, text: str) -> SparseVector:
+        weights: Dict[int, float] = {}
+        for token in set(tokenize(text)):
+            index = self._index(token)
+            weights[index] = weights.get(index, 0.0) + 1.0
+        return self._to_vector(weights)
+
+    async def aembed_documents(self, texts: List[str]) -> List[SparseVector]:
+        # Pure Python and fast; no need for a thread hop
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> SparseVector:
+        return self.embed_query(text)
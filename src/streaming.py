@@ -0,0 +1,90 @@
+"""
+streaming.py - Server-Sent Events for Graph Progress
+
+Translates LangGraph's astream_events into a small SSE protocol:
+
+    event: start   data: {"node": "retrieve"}
+    event: node    data: {"node": "retrieve", "summary": {"documents": 4}}
+    event: token   data: {"content": "### Revenue..."}      (generate only)
+    event: done    data: <final state>
+    event: error   data: {"detail": "..."}
+"""
+
+import json
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+# Graph nodes reported to the client
+NODES = ("speculative_retrieve", "retrieve", "web_search", "grade_documents", "compress_context", "generate", "refine_query", "hallucination_monitor")
+
+# Only the answer itself is streamed; graders and query rewriters stay silent
+TOKEN_NODES = ("generate",)
+
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _chunk_text(chunk) -> str:
+    content = getattr(chunk, "content", "")
+    if isinstance(content, str):
+        return content
+    # Multi-part content: keep the text parts
+    return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+
+def summarize(node: str, output: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Small, UI-friendly view of a node's state update."""
+    output = output or {}
+    if node in ("speculative_retrieve", "retrieve", "web_search", "grade_documents"):
+        return {"documents": len(output.get("documents") or []), "route": output.get("route")}
+    if node == "refine_query":
+        return {"question": output.get("question"), "retry_count": output.get("retry_count")}
+    if node == "hallucination_monitor":
+        return {"hallucination_grade": output.get("hallucination_grade"), "retry_count": output.get("retry_count")}
+    if node == "compress_context":
+        return {"characters": len(output.get("context") or "")}
+    if node == "generate":
+        return {"characters": len(output.get("generation") or "")}
+    return {}
+
+
+async def stream_graph_events(
+    graph_app,
+    inputs: Dict[str, Any],
+    config: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Run the graph and yield (event, data) pairs as nodes start, finish and generate tokens.
+
+    The final `done` event carries the same state /invoke would have returned.
+    """
+    final_state = None
+    graph_run = None
+    try:
+        async for event in graph_app.astream_events(inputs, config=config, version="v2"):
+            kind = event["event"]
+            name = event.get("name")
+            node = (event.get("metadata") or {}).get("langgraph_node")
+            parent_ids = event.get("parent_ids") or []
+            if graph_run is None and kind == "on_chain_start" and not parent_ids:
+                graph_run = event["run_id"]
+            # Only the node run itself: a RunnableLambda node has an inner run with the same name
+            is_node = name in NODES and node == name and parent_ids[-1:] == [graph_run]
+
+            if kind == "on_chain_start" and is_node:
+                yield "start", {"node": name}
+            elif kind == "on_chain_end" and is_node:
+                yield "node", {"node": name, "summary": summarize(name, event["data"].get("output"))}
+            elif kind == "on_chat_model_stream" and node in TOKEN_NODES:
+                text = _chunk_text(event["data"].get("chunk"))
+                if text:
+                    yield "token", {"content": text}
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                # Root run finished: its output is the final graph state
+                final_state = event["data"].get("output")
+    except Exception as e:
+        print(f"Error streaming graph: {e}")
+        yield "error", {"detail": str(e)}
+        return
+
+    yield "done", final_state
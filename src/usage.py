@@ -0,0 +1,155 @@
+"""
+usage.py - LLM Call Accounting
+
+A callback handler that attributes every chat-model call in a graph run to
+the LangGraph node that made it (from the `langgraph_node` run metadata):
+
+    {"nodes": {"grade_documents": {"calls": 4, "errors": 0, "prompt_tokens": 1812,
+                                   "completion_tokens": 20, "latency_ms": 910.4}, ...},
+     "total": {...}}
+
+Cache hits and local-grader verdicts make no LLM call, so they cost nothing
+here. Every request's report is also folded into a process-wide aggregate
+(served at /stats/usage).
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+# Calls made outside any graph node (e.g. the response cache or a script)
+UNATTRIBUTED = "other"
+
+FIELDS = ("calls", "errors", "prompt_tokens", "completion_tokens", "latency_ms")
+
+
+def _empty() -> Dict[str, float]:
+    return {field: 0 for field in FIELDS}
+
+
+def _tokens(response: LLMResult):
+    """(prompt, completion) tokens from the messages' usage_metadata."""
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            prompt += usage.get("input_tokens", 0)
+            completion += usage.get("output_tokens", 0)
+    return prompt, completion
+
+
+class UsageTracker(BaseCallbackHandler):
+    """
+    Per-request LLM accounting. Pass one instance in the run config's
+    callbacks; it is thread-safe, so concurrent graders in worker threads
+    and async tasks can share it.
+    """
+
+    # Bookkeeping only: no need to hop to an executor for async runs
+    run_inline = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started: Dict[UUID, tuple] = {}
+        self._nodes: Dict[str, Dict[str, float]] = {}
+
+    def _start(self, run_id: UUID, metadata: Optional[Dict[str, Any]]):
+        node = (metadata or {}).get("langgraph_node") or UNATTRIBUTED
+        with self._lock:
+            self._started[run_id] = (node, time.perf_counter())
+
+    def _finish(self, run_id: UUID, prompt_tokens: int = 0, completion_tokens: int = 0, error: bool = False):
+        with self._lock:
+            node, start = self._started.pop(run_id, (UNATTRIBUTED, None))
+            stats = self._nodes.setdefault(node, _empty())
+            stats["calls"] += 1
+            stats["errors"] += int(error)
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            if start is not None:
+                stats["latency_ms"] += (time.perf_counter() - start) * 1000
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, metadata=None, **kwargs: Any):
+        self._start(run_id, metadata)
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, metadata=None, **kwargs: Any):
+        self._start(run_id, metadata)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, *_tokens(response))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._finish(run_id, error=True)
+
+    def report(self) -> Dict[str, Any]:
+        """Per-node and total usage recorded so far."""
+        with self._lock:
+            nodes = {node: dict(stats) for node, stats in self._nodes.items()}
+        total = _empty()
+        for stats in nodes.values():
+            for field in FIELDS:
+                total[field] += stats[field]
+        for stats in [*nodes.values(), total]:
+            stats["latency_ms"] = round(stats["latency_ms"], 1)
+        return {"nodes": nodes, "total": total}
+
+
+class UsageStats:
+    """Thread-safe running totals over every tracked request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self._nodes: Dict[str, Dict[str, float]] = {}
+
+    def record(self, report: Dict[str, Any]):
+        with self._lock:
+            self.requests += 1
+            for node, stats in report["nodes"].items():
+                totals = self._nodes.setdefault(node, _empty())
+                for field in FIELDS:
+                    totals[field] += stats[field]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Totals plus per-request averages, per node and overall."""
+        with self._lock:
+            requests = self.requests
+            nodes = {node: dict(stats) for node, stats in self._nodes.items()}
+        total = _empty()
+        for stats in nodes.values():
+            for field in FIELDS:
+                total[field] += stats[field]
+
+        def summarize(stats: Dict[str, float]) -> Dict[str, float]:
+            summary = {**stats, "latency_ms": round(stats["latency_ms"], 1)}
+            if requests:
+                summary["calls_per_request"] = round(stats["calls"] / requests, 2)
+                summary["tokens_per_request"] = round((stats["prompt_tokens"] + stats["completion_tokens"]) / requests, 1)
+            if stats["calls"]:
+                summary["avg_latency_ms"] = round(stats["latency_ms"] / stats["calls"], 1)
+            return summary
+
+        return {
+            "requests": requests,
+            "nodes": {node: summarize(stats) for node, stats in nodes.items()},
+            "total": summarize(total),
+        }
+
+
+# Process-wide aggregate behind /stats/usage
+_usage_stats = UsageStats()
+
+
+def record_usage(tracker: UsageTracker) -> Dict[str, Any]:
+    """Fold a finished request into the aggregate; returns its report."""
+    report = tracker.report()
+    _usage_stats.record(report)
+    return report
+
+
+def usage_stats() -> Dict[str, Any]:
+    return _usage_stats.snapshot()
@@ -1,31 +1,323 @@
 import os
-from langchain_qdrant import QdrantVectorStore
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from qdrant_client import QdrantClient
+import math
+import httpx
+from typing import List, Optional
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_qdrant import QdrantVectorStore, RetrievalMode
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http import models
+from src.collection import CollectionLayout, create_collection, migrate_collection
+from src.embeddings import get_embeddings, EMBEDDING_BACKEND
+from src.sparse import BM25SparseEmbeddings
 
-# Initialize Embeddings
-embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
+# Initialize Embeddings (cache-backed: repeated queries and unchanged chunks skip the API)
+embeddings = get_embeddings()
+# BM25-style lexical vectors written alongside the dense ones
+sparse_embeddings = BM25SparseEmbeddings()
 
-# Initialize Qdrant Client
+# Qdrant connection settings
 url = os.getenv("QDRANT_URL", "http://localhost:6333")
-client = QdrantClient(url=url, prefer_grpc=False)
+PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+TIMEOUT_SECONDS = int(os.getenv("QDRANT_TIMEOUT", "10"))
+POOL_SIZE = int(os.getenv("QDRANT_POOL_SIZE", "16"))
+KEEPALIVE_SECONDS = float(os.getenv("QDRANT_KEEPALIVE_SECONDS", "60"))
+TOP_K = int(os.getenv("RETRIEVER_TOP_K", "4"))
+# Adaptive k (cosine similarity, unset = off): of the top k, drop chunks below the
+# floor or more than the cliff below the best chunk
+SCORE_FLOOR = float(os.getenv("RETRIEVER_SCORE_FLOOR")) if os.getenv("RETRIEVER_SCORE_FLOOR") else None
+SCORE_CLIFF = float(os.getenv("RETRIEVER_SCORE_CLIFF")) if os.getenv("RETRIEVER_SCORE_CLIFF") else None
+
+# "hybrid" fuses dense and sparse results with RRF inside Qdrant; "dense" is embeddings only
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+# Candidates each branch contributes to the fusion (more than k so RRF has something to re-rank)
+HYBRID_PREFETCH_LIMIT = int(os.getenv("HYBRID_PREFETCH_LIMIT", "20"))
+
+# Collection Name (each embedding backend has its own vector space, so its own collection)
+COLLECTION_NAME = "agentic-engine" if EMBEDDING_BACKEND == "google" else f"agentic-engine-{EMBEDDING_BACKEND}"
+DENSE_VECTOR_SIZE = embeddings.dimensions
+SPARSE_VECTOR_NAME = "langchain-sparse"
+# Payload fields searches can filter on, indexed at ingest (langchain_qdrant nests metadata)
+SOURCE_KEY = f"{QdrantVectorStore.METADATA_KEY}.source"
+PAYLOAD_INDEXES = {SOURCE_KEY: models.PayloadSchemaType.KEYWORD}
+# HNSW, quantization, on-disk storage and segment settings (COLLECTION_* env)
+layout = CollectionLayout.from_env()
+
+
+def _client_options() -> dict:
+    """
+    Transport settings shared by the sync and async clients.
+
+    qdrant-client disables HTTP keep-alive by default, so every search would
+    pay a fresh TCP handshake; keep a pool of warm connections instead.
+    """
+    return {
+        "url": url,
+        "prefer_grpc": PREFER_GRPC,
+        "grpc_port": GRPC_PORT,
+        "timeout": TIMEOUT_SECONDS,
+        "limits": httpx.Limits(
+            max_connections=POOL_SIZE,
+            max_keepalive_connections=POOL_SIZE,
+            keepalive_expiry=KEEPALIVE_SECONDS
+        ),
+        "grpc_options": {
+            "grpc.keepalive_time_ms": int(KEEPALIVE_SECONDS * 1000),
+            "grpc.keepalive_timeout_ms": TIMEOUT_SECONDS * 1000,
+            "grpc.keepalive_permit_without_calls": 1,
+            "grpc.http2.max_pings_without_data": 0,
+        },
+    }
+
+
+# Initialize Qdrant Client (sync: ingestion and graph_app.invoke)
+client = QdrantClient(**_client_options())
+
+# Process-wide instances, created on first use
+_async_client: Optional[AsyncQdrantClient] = None
+_vectorstore: Optional[QdrantVectorStore] = None
+_retriever: Optional["QdrantRetriever"] = None
+# Whether the collection has the sparse vector (collections created before hybrid search do not)
+_sparse_available: Optional[bool] = None
+
+
+def get_async_client() -> AsyncQdrantClient:
+    """Get or create the pooled async client used by graph_app.ainvoke."""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncQdrantClient(**_client_options())
+    return _async_client
 
-# Collection Name
-COLLECTION_NAME = "agentic-engine"
 
 def get_vectorstore():
     """
     Returns the Qdrant vector store.
     """
-    return QdrantVectorStore(
-        client=client,
-        collection_name=COLLECTION_NAME,
-        embedding=embeddings,
+    global _vectorstore
+    if _vectorstore is None:
+        hybrid = _use_sparse()
+        _vectorstore = QdrantVectorStore(
+            client=client,
+            collection_name=COLLECTION_NAME,
+            embedding=embeddings,
+            # Hybrid mode writes a sparse vector next to every dense one on add_documents
+            retrieval_mode=RetrievalMode.HYBRID if hybrid else RetrievalMode.DENSE,
+            sparse_embedding=sparse_embeddings if hybrid else None,
+            sparse_vector_name=SPARSE_VECTOR_NAME,
+        )
+    return _vectorstore
+
+
+def ensure_collection(qdrant_client: Optional[QdrantClient] = None, migrate: bool = False, dry_run: bool = False):
+    """
+    Create the collection (dense + IDF-weighted sparse vector) with the
+    configured layout if it does not exist. With migrate=True, an existing
+    collection is updated to the layout instead of left as is.
+    """
+    qdrant_client = qdrant_client or client
+    if qdrant_client.collection_exists(COLLECTION_NAME):
+        print(f"Collection {COLLECTION_NAME} exists.")
+        info = qdrant_client.get_collection(COLLECTION_NAME)
+        if RETRIEVAL_MODE == "hybrid" and not _has_sparse(info):
+            print(f"WARNING: {COLLECTION_NAME} has no '{SPARSE_VECTOR_NAME}' vector; "
+                  "recreate it and re-ingest to enable hybrid search (falling back to dense).")
+        if migrate:
+            migrate_collection(qdrant_client, COLLECTION_NAME, DENSE_VECTOR_SIZE, layout, dry_run=dry_run)
+        if not dry_run:
+            _ensure_payload_indexes(qdrant_client, set(info.payload_schema or {}))
+        return
+
+    print(f"Creating collection {COLLECTION_NAME} (quantization={layout.quantization}, "
+          f"vectors_on_disk={layout.vectors_on_disk}, hnsw m={layout.hnsw_m})...")
+    create_collection(
+        qdrant_client, COLLECTION_NAME, DENSE_VECTOR_SIZE, layout,
+        sparse_vectors_config={
+            # Qdrant keeps document frequencies and applies IDF at query time
+            SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF),
+        },
     )
+    _ensure_payload_indexes(qdrant_client, set())
+
+
+def _ensure_payload_indexes(qdrant_client: QdrantClient, existing: set):
+    """
+    Index the filterable payload fields. Without an index Qdrant has to check
+    every candidate's payload; with one, filtered searches only visit
+    matching points (and HNSW builds extra links per indexed value).
+    """
+    for field, schema in PAYLOAD_INDEXES.items():
+        if field not in existing:
+            print(f"Creating payload index {COLLECTION_NAME}.{field} ({schema.value})...")
+            qdrant_client.create_payload_index(COLLECTION_NAME, field_name=field, field_schema=schema, wait=True)
+
+
+def build_filter(sources: Optional[List[str]] = None) -> Optional[models.Filter]:
+    """Qdrant filter restricting a search to chunks from `sources` (exact metadata.source values)."""
+    if not sources:
+        return None
+    return models.Filter(must=[models.FieldCondition(key=SOURCE_KEY, match=models.MatchAny(any=list(sources)))])
+
+
+def _has_sparse(info) -> bool:
+    return SPARSE_VECTOR_NAME in (info.config.params.sparse_vectors or {})
+
+
+def _use_sparse() -> bool:
+    """Hybrid mode is on and the collection has the sparse vector (checked once)."""
+    global _sparse_available
+    if RETRIEVAL_MODE != "hybrid":
+        return False
+    if _sparse_available is None:
+        _sparse_available = _has_sparse(client.get_collection(COLLECTION_NAME))
+    return _sparse_available
+
+
+async def _ause_sparse() -> bool:
+    global _sparse_available
+    if RETRIEVAL_MODE != "hybrid":
+        return False
+    if _sparse_available is None:
+        _sparse_available = _has_sparse(await get_async_client().get_collection(COLLECTION_NAME))
+    return _sparse_available
+
+
+def _query_args(dense: List[float], sparse, k: int, query_filter: Optional[models.Filter] = None) -> dict:
+    """query_points arguments: one RRF-fused hybrid query, or a plain dense search."""
+    # hnsw_ef and quantization rescoring apply to the dense search only
+    search_params = layout.search_params()
+    if sparse is None:
+        args = {"query": dense, "limit": k}
+        if search_params is not None:
+            args["search_params"] = search_params
+        if query_filter is not None:
+            args["query_filter"] = query_filter
+        return args
+    prefetch_limit = max(k, HYBRID_PREFETCH_LIMIT)
+    # The filter goes on each branch so both candidate lists only hold matching chunks
+    return {
+        "prefetch": [
+            models.Prefetch(query=dense, limit=prefetch_limit, params=search_params, filter=query_filter),
+            models.Prefetch(
+                query=models.SparseVector(indices=sparse.indices, values=sparse.values),
+                using=SPARSE_VECTOR_NAME,
+                limit=prefetch_limit,
+                filter=query_filter,
+            ),
+        ],
+        "query": models.FusionQuery(fusion=models.Fusion.RRF),
+        "limit": k,
+    }
+
+
+class QdrantRetriever(BaseRetriever):
+    """
+    Top-k retriever over the collection.
+
+    invoke() uses the sync client; ainvoke() queries the pooled
+    AsyncQdrantClient directly (langchain_qdrant's async methods only run the
+    sync client in a thread). In hybrid mode both issue a single query that
+    fuses dense and sparse candidates with reciprocal rank fusion.
+
+    Pass `sources=[...]` to invoke/ainvoke to search only those documents.
+
+    Every document carries its cosine similarity to the query in
+    metadata["score"] (for fused hybrid results it is computed from the
+    returned dense vectors, since RRF scores are rank-based), and chunks
+    under score_floor or score_cliff are cut, so fewer than k may return.
+    """
+
+    k: int = TOP_K
+    score_floor: Optional[float] = SCORE_FLOOR
+    score_cliff: Optional[float] = SCORE_CLIFF
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun, sources: Optional[List[str]] = None
+    ) -> List[Document]:
+        sparse = sparse_embeddings.embed_query(query) if _use_sparse() else None
+        dense = embeddings.embed_query(query)
+
+        response = client.query_points(
+            collection_name=COLLECTION_NAME,
+            with_payload=True,
+            with_vectors=[""] if sparse is not None else False,
+            **_query_args(dense, sparse, self.k, build_filter(sources)),
+        )
+        return self._cut([_to_document(point, dense, fused=sparse is not None) for point in response.points])
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun, sources: Optional[List[str]] = None
+    ) -> List[Document]:
+        sparse = await sparse_embeddings.aembed_query(query) if await _ause_sparse() else None
+        dense = await embeddings.aembed_query(query)
+
+        response = await get_async_client().query_points(
+            collection_name=COLLECTION_NAME,
+            with_payload=True,
+            with_vectors=[""] if sparse is not None else False,
+            **_query_args(dense, sparse, self.k, build_filter(sources)),
+        )
+        return self._cut([_to_document(point, dense, fused=sparse is not None) for point in response.points])
+
+    def _cut(self, documents: List[Document]) -> List[Document]:
+        """Adaptive k: keep rank order, drop chunks under the floor or the cliff."""
+        if not documents or (self.score_floor is None and self.score_cliff is None):
+            return documents
+        threshold = -math.inf if self.score_floor is None else self.score_floor
+        if self.score_cliff is not None:
+            threshold = max(threshold, max(d.metadata["score"] for d in documents) - self.score_cliff)
+        kept = [d for d in documents if d.metadata["score"] >= threshold]
+        if len(kept) < len(documents):
+            print(f"---ADAPTIVE K: {len(kept)}/{len(documents)} chunks above {threshold:.3f}---")
+        return kept
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return sum(x * y for x, y in zip(a, b)) / norm if norm else 0.0
+
+
+def _to_document(point, dense: Optional[List[float]] = None, fused: bool = False) -> Document:
+    payload = point.payload or {}
+    metadata = dict(payload.get(QdrantVectorStore.METADATA_KEY) or {})
+    score = point.score
+    if fused and dense is not None and point.vector is not None:
+        vector = point.vector.get("") if isinstance(point.vector, dict) else point.vector
+        score = _cosine(dense, vector) if vector else score
+    metadata["score"] = score
+    return Document(page_content=payload.get(QdrantVectorStore.CONTENT_KEY, ""), metadata=metadata)
+
 
 def get_retriever():
     """
-    Returns the retriever from the vector store.
+    Returns the process-wide retriever (reused across requests).
     """
-    vectorstore = get_vectorstore()
-    return vectorstore.as_retriever()
+    global _retriever
+    if _retriever is None:
+        _retriever = QdrantRetriever()
+    return _retriever
+
+
+async def warm_up():
+    """
+    Open the connection pool and load the collection before the first request.
+    Called at FastAPI startup; failures are logged, not raised, so the API can
+    still start while Qdrant is coming up.
+    """
+    try:
+        async_client = get_async_client()
+        await async_client.get_collection(COLLECTION_NAME)
+        await get_retriever().ainvoke("warm-up")
+        mode = "hybrid" if await _ause_sparse() else "dense"
+        print(f"---VECTORSTORE WARM: {COLLECTION_NAME} ({'gRPC' if PREFER_GRPC else 'REST'}, {mode})---")
+    except Exception as e:
+        print(f"Vectorstore warm-up failed: {e}")
+
+
+async def close():
+    """Release the async connection pool (FastAPI shutdown)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
@@ -0,0 +1,100 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from langchain_core.documents import Document
+import src.graph.nodes.grader as grader_module
+import src.vectorstore as vectorstore_module
+
+
+def _docs(*scores):
+    return [Document(page_content=f"doc{i}", metadata={"score": score}) for i, score in enumerate(scores)]
+
+
+class TestAdaptiveK(unittest.TestCase):
+
+    def test_floor_and_cliff_keep_rank_order(self):
+        print("\n--- Testing Adaptive k: floor 0.5, cliff 0.15 ---")
+        retriever = vectorstore_module.QdrantRetriever(score_floor=0.5, score_cliff=0.15)
+        # Hybrid results come in RRF order, not score order
+        kept = retriever._cut(_docs(0.78, 0.86, 0.70, 0.45))
+
+        self.assertEqual([d.page_content for d in kept], ["doc0", "doc1"])
+        print("✅ 4 candidates cut to 2")
+
+    def test_floor_can_drop_everything(self):
+        retriever = vectorstore_module.QdrantRetriever(score_floor=0.6, score_cliff=None)
+        self.assertEqual(retriever._cut(_docs(0.4, 0.3)), [])
+
+    def test_disabled_by_default(self):
+        retriever = vectorstore_module.QdrantRetriever(score_floor=None, score_cliff=None)
+        self.assertEqual(len(retriever._cut(_docs(0.9, 0.1))), 2)
+
+    @patch('src.vectorstore._sparse_available', True)
+    @patch('src.vectorstore.RETRIEVAL_MODE', "hybrid")
+    @patch('src.vectorstore.embeddings')
+    @patch('src.vectorstore.get_async_client')
+    def test_fused_results_scored_by_cosine(self, mock_get_client, mock_embeddings):
+        mock_embeddings.aembed_query = AsyncMock(return_value=[1.0, 0.0])
+        # RRF scores are rank-based; the returned dense vectors give the similarity
+        point = MagicMock(payload={"page_content": "Q3", "metadata": {}}, score=0.033, vector={"": [3.0, 4.0]})
+        mock_get_client.return_value.query_points = AsyncMock(return_value=MagicMock(points=[point]))
+
+        documents = asyncio.run(vectorstore_module.get_retriever().ainvoke("Q3 cost"))
+
+        self.assertAlmostEqual(documents[0].metadata["score"], 0.6)
+        self.assertEqual(mock_get_client.return_value.query_points.await_args.kwargs["with_vectors"], [""])
+
+
+class TestScoreAwareGrading(unittest.TestCase):
+
+    def _state(self, route="vectorstore"):
+        return {
+            "documents": ["high", "mid", "unscored"],
+            "document_scores": [0.91, 0.62, None],
+            "question": "q",
+            "route": route,
+        }
+
+    @patch('src.graph.nodes.grader.GRADER_SKIP_SCORE', 0.85)
+    @patch('src.graph.nodes.grader._agrade_document')
+    def test_high_scores_skip_grader(self, mock_grade):
+        print("\n--- Testing Score-Aware Grading: skip threshold 0.85 ---")
+        mock_grade.side_effect = AsyncMock(return_value="no")
+
+        result = asyncio.run(grader_module.agrade_documents(self._state()))
+
+        graded = [call.args[1] for call in mock_grade.call_args_list]
+        self.assertEqual(graded, ["mid", "unscored"])
+        self.assertEqual(result["documents"], ["high"])
+        self.assertEqual(result["document_scores"], [0.91])
+        print("✅ 1 of 3 grader calls skipped")
+
+    @patch('src.graph.nodes.grader.GRADER_SKIP_SCORE', 0.85)
+    @patch('src.graph.nodes.grader._grade_document')
+    def test_sync_grading_matches(self, mock_grade):
+        mock_grade.return_value = "yes"
+        result = grader_module.grade_documents(self._state())
+
+        self.assertEqual(mock_grade.call_count, 2)
+        self.assertEqual(result["documents"], ["high", "mid", "unscored"])
+        self.assertEqual(result["document_scores"], [0.91, 0.62, None])
+
+    @patch('src.graph.nodes.grader.GRADER_SKIP_SCORE', 0.85)
+    @patch('src.graph.nodes.grader._grade_document')
+    def test_web_results_always_graded(self, mock_grade):
+        mock_grade.return_value = "yes"
+        grader_module.grade_documents(self._state(route="web_search"))
+        self.assertEqual(mock_grade.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
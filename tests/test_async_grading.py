@@ -0,0 +1,74 @@
+import unittest
+import asyncio
+import time
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import src.graph.nodes.hallucination_monitor as monitor_module
+from src.graph.nodes.local_grader import TASKS, LocalHallucinationGrader, GradeRequest, GradeResponse
+
+
+class SlowGrader(LocalHallucinationGrader):
+    """Blocks like a 300ms CPU forward pass, without loading a model."""
+
+    def __init__(self):
+        self.device = "cpu"
+        self.cache = None
+        self.tasks = set(TASKS)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def grade_sync(self, request):
+        time.sleep(0.3)
+        return GradeResponse(is_faithful=True, confidence=0.99, latency_ms=300.0)
+
+
+async def _ticks_during(coro):
+    """Count how often the event loop gets to run while `coro` is pending."""
+    ticks = 0
+    task = asyncio.ensure_future(coro)
+    while not task.done():
+        ticks += 1
+        await asyncio.sleep(0.01)
+    return ticks, task.result()
+
+
+class TestAsyncGrading(unittest.TestCase):
+
+    def test_grade_async_does_not_block_event_loop(self):
+        print("\n--- Testing grade_async: Event loop stays responsive ---")
+        grader = SlowGrader()
+        ticks, result = asyncio.run(_ticks_during(grader.grade_async(GradeRequest(context="c", answer="a"))))
+        self.assertTrue(result.is_faithful)
+        self.assertGreater(ticks, 5)
+        print(f"✅ Event loop ran {ticks} times during a 300ms grade")
+
+    @patch('src.graph.nodes.hallucination_monitor.USE_LOCAL_GRADER', True)
+    @patch('src.graph.nodes.hallucination_monitor._get_local_grader')
+    @patch('src.graph.nodes.hallucination_monitor.llm')
+    def test_async_node_uses_local_verdict(self, mock_llm, mock_get_local):
+        mock_get_local.return_value = SlowGrader()
+
+        answer_grader = MagicMock()
+        answer_grader.ainvoke = AsyncMock(return_value=MagicMock(binary_score="yes"))
+        mock_llm.with_structured_output.return_value = answer_grader
+
+        state = {"documents": ["doc1"], "generation": "gen", "question": "q", "retry_count": 1}
+        ticks, result = asyncio.run(_ticks_during(monitor_module.acheck_hallucination(state)))
+
+        self.assertEqual(result["hallucination_grade"], "useful")
+        self.assertGreater(ticks, 5)
+        # Groundedness and usefulness were both answered locally
+        answer_grader.invoke.assert_not_called()
+        answer_grader.ainvoke.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+import time
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from langchain_core.documents import Document
+import src.graph.nodes.grader as grader_module
+import src.graph.nodes.retriever as retriever_module
+import src.vectorstore as vectorstore_module
+
+
+class TestAsyncGradeDocuments(unittest.TestCase):
+
+    @patch('src.graph.nodes.grader.GRADER_MAX_CONCURRENCY', 2)
+    @patch('src.graph.nodes.grader._agrade_with_api')
+    def test_grades_concurrently_within_limit(self, mock_api):
+        print("\n--- Testing agrade_documents: bounded concurrency ---")
+        in_flight = [0]
+        peak = [0]
+
+        async def slow_grade(question, doc, system):
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+            await asyncio.sleep(0.1)
+            in_flight[0] -= 1
+            return "no" if doc == "doc1" else "yes"
+
+        mock_api.side_effect = slow_grade
+
+        state = {"documents": [f"doc{i}" for i in range(4)], "question": "q", "route": "vectorstore"}
+        start = time.perf_counter()
+        result = asyncio.run(grader_module.agrade_documents(state))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(result["documents"], ["doc0", "doc2", "doc3"])
+        self.assertEqual(peak[0], 2)
+        self.assertLess(elapsed, 0.35)
+        print(f"✅ 4 x 100ms grades with limit 2 finished in {elapsed * 1000:.0f}ms")
+
+
+class TestAsyncRetrieve(unittest.TestCase):
+
+    @patch('src.graph.nodes.retriever.get_retriever')
+    def test_formats_documents_like_sync_retrieve(self, mock_get_retriever):
+        mock_get_retriever.return_value.ainvoke = AsyncMock(
+            return_value=[Document(page_content="Revenue 4.2B", metadata={"source": "q3.pdf"})]
+        )
+        result = asyncio.run(retriever_module.aretrieve({"question": "revenue"}))
+        self.assertEqual(result["documents"], ["Content: Revenue 4.2B\nSource: q3.pdf"])
+
+    @patch('src.graph.nodes.retriever.get_retriever')
+    def test_error_returns_no_documents(self, mock_get_retriever):
+        mock_get_retriever.return_value.ainvoke = AsyncMock(side_effect=RuntimeError("qdrant down"))
+        result = asyncio.run(retriever_module.aretrieve({"question": "revenue"}))
+        self.assertEqual(result["documents"], [])
+
+
+class TestPooledRetriever(unittest.TestCase):
+
+    def test_retriever_is_process_wide(self):
+        self.assertIs(vectorstore_module.get_retriever(), vectorstore_module.get_retriever())
+
+    @patch('src.vectorstore.RETRIEVAL_MODE', "dense")
+    @patch('src.vectorstore.embeddings')
+    @patch('src.vectorstore.get_async_client')
+    def test_ainvoke_queries_async_client(self, mock_get_client, mock_embeddings):
+        mock_embeddings.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+        point = MagicMock(payload={"page_content": "Revenue 4.2B", "metadata": {"source": "q3.pdf"}}, score=0.82)
+        mock_get_client.return_value.query_points = AsyncMock(return_value=MagicMock(points=[point]))
+
+        documents = asyncio.run(vectorstore_module.get_retriever().ainvoke("revenue"))
+
+        self.assertEqual(documents[0].page_content, "Revenue 4.2B")
+        self.assertEqual(documents[0].metadata, {"source": "q3.pdf", "score": 0.82})
+        kwargs = mock_get_client.return_value.query_points.await_args.kwargs
+        self.assertEqual(kwargs["query"], [0.1, 0.2])
+        self.assertEqual(kwargs["limit"], vectorstore_module.TOP_K)
+
+
+if __name__ == "__main__":
+    unittest.main()
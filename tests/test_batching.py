@@ -0,0 +1,308 @@
+import unittest
+import threading
+import concurrent.futures
+import sys
+import os
+import torch
+from unittest.mock import patch
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.graph.nodes.local_grader import LocalHallucinationGrader, MicroBatcher, GradeRequest, GradeResponse
+
+
+class FakeGrader:
+    """Stands in for LocalHallucinationGrader: faithful iff answer appears in context."""
+    device = "cpu"
+    tasks = {"groundedness"}
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batch_sizes = []
+        self.lock = threading.Lock()
+
+    def lookup(self, request):
+        return None
+
+    def grade_batch(self, requests, check_cache=True):
+        with self.lock:
+            self.batch_sizes.append(len(requests))
+        if self.fail:
+            raise RuntimeError("GPU Explosion")
+        return [
+            GradeResponse(is_faithful=r.answer in r.context, confidence=0.9, latency_ms=1.0)
+            for r in requests
+        ]
+
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def test_concurrent_requests_share_forward_passes(self):
+        print("\n--- Testing Micro-Batching: Concurrency 16 ---")
+        fake = FakeGrader()
+        batcher = MicroBatcher(fake, max_batch_size=8, max_wait_ms=50)
+
+        requests = [
+            GradeRequest(context=f"fact {i}", answer=f"{i}" if i % 2 == 0 else "other")
+            for i in range(32)
+        ]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(batcher.grade_sync, requests))
+        batcher.close()
+
+        # Every caller gets its own verdict back
+        for i, result in enumerate(results):
+            self.assertEqual(result.is_faithful, i % 2 == 0)
+        self.assertEqual(sum(fake.batch_sizes), 32)
+        self.assertLessEqual(max(fake.batch_sizes), 8)
+        self.assertLess(len(fake.batch_sizes), 32)
+        print(f"✅ 32 requests served by {len(fake.batch_sizes)} forward passes")
+
+    def test_grade_batch_preserves_order(self):
+        fake = FakeGrader()
+        batcher = MicroBatcher(fake, max_batch_size=4, max_wait_ms=1)
+        requests = [GradeRequest(context="abc", answer=a) for a in ["a", "z", "b", "y", "c"]]
+        results = batcher.grade_batch(requests)
+        batcher.close()
+        self.assertEqual([r.is_faithful for r in results], [True, False, True, False, True])
+
+    def test_inference_error_reaches_every_caller(self):
+        batcher = MicroBatcher(FakeGrader(fail=True), max_batch_size=4, max_wait_ms=1)
+        future = batcher.submit(GradeRequest(context="c", answer="a"))
+        with self.assertRaises(RuntimeError):
+            future.result(timeout=5)
+        batcher.close()
+
+
+class WordTokenizer:
+    """Whitespace tokenizer with a [CLS] ... [SEP] wrapper, enough to exercise the budget logic."""
+    pad_token_id = 0
+    cls_token_id = 1
+    sep_token_id = 2
+
+    def __init__(self):
+        self.vocab = {}
+
+    def __call__(self, text, add_special_tokens=True):
+        ids = [self.vocab.setdefault(w, len(self.vocab) + 3) for w in text.split()]
+        return {"input_ids": ids}
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 2
+
+    def build_inputs_with_special_tokens(self, ids):
+        return [self.cls_token_id] + ids + [self.sep_token_id]
+
+    def decode(self, ids):
+        words = {v: k for k, v in self.vocab.items()}
+        return " ".join(words[i] for i in ids if i in words)
+
+
+class RecordingModel:
+    """Returns 'faithful' logits and remembers the padded shapes it was called with."""
+
+    def __init__(self):
+        self.shapes = []
+
+    def __call__(self, input_ids, attention_mask, tasks=None):
+        self.shapes.append(tuple(input_ids.shape))
+        return torch.tensor([[0.0, 3.0]] * input_ids.shape[0])
+
+
+class NeedleModel(RecordingModel):
+    """Faithful only for inputs that contain the `needle` token id."""
+
+    def __init__(self, needle_id):
+        super().__init__()
+        self.needle_id = needle_id
+
+    def __call__(self, input_ids, attention_mask, tasks=None):
+        self.shapes.append(tuple(input_ids.shape))
+        found = (input_ids == self.needle_id).any(dim=-1).float()
+        return torch.stack([2.0 * (1 - found), 2.0 * found], dim=-1)
+
+
+def make_grader(max_tokens, length_buckets, **window_settings):
+    grader = LocalHallucinationGrader.__new__(LocalHallucinationGrader)
+    grader.device = "cpu"
+    grader.tokenizer = WordTokenizer()
+    grader.model = RecordingModel()
+    grader.tasks = {"groundedness"}
+    grader.cache = None
+    grader._configure_budget(max_tokens, length_buckets, **window_settings)
+    return grader
+
+
+class TestTokenBudget(unittest.TestCase):
+
+    def test_answer_survives_long_context(self):
+        print("\n--- Testing Token Budget: Answer is never truncated ---")
+        grader = make_grader(max_tokens=32, length_buckets=(16, 32))
+        context = " ".join(f"c{i}" for i in range(100))
+        answer = "revenue was 4.2 billion"
+
+        ids = grader._encode(GradeRequest(context=context, answer=answer))
+        text = grader.tokenizer.decode(ids)
+
+        self.assertEqual(len(ids), 32)
+        self.assertTrue(text.startswith("Context: c0 c1"))
+        self.assertTrue(text.endswith("Answer: revenue was 4.2 billion"))
+        print(f"✅ Encoded: {text}")
+
+    def test_batches_pad_to_smallest_bucket(self):
+        grader = make_grader(max_tokens=64, length_buckets=(8, 16, 32))
+        short = GradeRequest(context="sky blue", answer="blue")
+        longer = GradeRequest(context="the sky is a nice shade of blue today", answer="blue")
+
+        grader.grade_batch([short])
+        grader.grade_batch([short, longer])
+        grader.grade_batch([GradeRequest(context=" ".join(["w"] * 50), answer="blue")])
+
+        self.assertEqual(grader.model.shapes, [(1, 8), (2, 16), (1, 64)])
+
+    def test_task_prefixes_and_untrained_heads(self):
+        grader = make_grader(max_tokens=64, length_buckets=(16,))
+        ids = grader._encode(GradeRequest(context="some chunk", answer="what is it", task="relevance"))
+        self.assertEqual(grader.tokenizer.decode(ids), "Document: some chunk Question: what is it")
+
+        # Heads without trained weights are refused so callers fall back to the API
+        with self.assertRaises(ValueError):
+            grader.grade_batch([GradeRequest(context="c", answer="a", task="usefulness")])
+        batcher = MicroBatcher(grader, max_wait_ms=1)
+        with self.assertRaises(ValueError):
+            batcher.grade_sync(GradeRequest(context="c", answer="a", task="relevance"))
+        batcher.close()
+
+    def test_cached_requests_skip_the_model(self):
+        from src.cache import TieredCache
+        grader = make_grader(max_tokens=64, length_buckets=(16,))
+        grader.cache = TieredCache("test-local")
+        grader.cache_version = "test"
+        first = GradeRequest(context="sky blue", answer="blue")
+        second = GradeRequest(context="grass green", answer="green")
+
+        grader.grade_batch([first])
+        results = grader.grade_batch([first, second])
+
+        # Only the unseen request went through the second forward pass
+        self.assertEqual(grader.model.shapes, [(1, 16), (1, 16)])
+        self.assertTrue(all(r.is_faithful for r in results))
+
+    def test_batcher_looks_up_each_request_once(self):
+        from src.cache import TieredCache
+        grader = make_grader(max_tokens=64, length_buckets=(16,))
+        grader.cache = TieredCache("test-local")
+        grader.cache_version = "test"
+        batcher = MicroBatcher(grader, max_wait_ms=50)
+        first = GradeRequest(context="sky blue", answer="blue")
+
+        batcher.grade_batch([first, GradeRequest(context="grass green", answer="green")])
+        batcher.grade_sync(first)
+        batcher.close()
+
+        stats = grader.cache.stats()
+        self.assertEqual((stats["misses"], stats["hits"]), (2, 1))
+        self.assertEqual(grader.model.shapes, [(2, 16)])
+
+    def test_attention_mask_covers_only_real_tokens(self):
+        grader = make_grader(max_tokens=64, length_buckets=(16,))
+        encoded = [grader._encode(GradeRequest(context="a b", answer="c"))]
+        input_ids, attention_mask = grader._collate(encoded)
+        self.assertEqual(int(attention_mask.sum()), len(encoded[0]))
+        self.assertEqual(input_ids[0, len(encoded[0]):].tolist(), [0] * (16 - len(encoded[0])))
+
+
+class TestGraderSettings(unittest.TestCase):
+
+    @patch.dict(os.environ, {"LOCAL_GRADER_MAX_TOKENS": "2048", "LOCAL_GRADER_LONG_CONTEXT": "window",
+                             "LOCAL_GRADER_WINDOW_TOKENS": "256"})
+    @patch('src.graph.nodes.local_grader.LocalHallucinationGrader')
+    def test_init_grader_uses_env_settings(self, mock_grader):
+        import src.graph.nodes.local_grader as local_grader_module
+        with patch.object(local_grader_module, "_grader_instance", None):
+            local_grader_module.init_grader("./models/other.pt")
+            local_grader_module._grader_instance = None
+            local_grader_module.get_grader()
+
+        from_init, from_get = (call.kwargs for call in mock_grader.call_args_list)
+        self.assertEqual(from_init, {**from_get, "model_path": "./models/other.pt"})
+        self.assertEqual((from_get["max_tokens"], from_get["long_context"], from_get["window_tokens"]),
+                         (2048, "window", 256))
+
+
+class TestSlidingWindow(unittest.TestCase):
+
+    def setUp(self):
+        self.context = " ".join(f"c{i}" for i in range(60)) + " needle " + " ".join(f"d{i}" for i in range(60))
+        self.request = GradeRequest(context=self.context, answer="found it")
+
+    def test_windows_overlap_and_cover_whole_context(self):
+        grader = make_grader(64, (32,), long_context="window", window_tokens=32, window_overlap=8)
+        windows = grader._encode_windows(self.request)
+
+        self.assertGreater(len(windows), 1)
+        texts = [grader.tokenizer.decode(ids) for ids in windows]
+        for text in texts:
+            self.assertTrue(text.endswith("Answer: found it"))
+            # window_tokens of context, plus the prompt pieces and the answer
+            self.assertLessEqual(len(text.split()), 32 + 2 + 2)
+        self.assertIn("d59", texts[-1])
+
+    def test_long_answer_keeps_full_context_windows(self):
+        print("\n--- Testing Sliding Window: 150-token answer ---")
+        answer = " ".join(f"a{i}" for i in range(150))
+        grader = make_grader(256, (256,), long_context="window", window_tokens=32, window_overlap=8)
+        windows = grader._encode_windows(GradeRequest(context=self.context, answer=answer))
+
+        seen = set()
+        for ids in windows:
+            words = grader.tokenizer.decode(ids).split()
+            self.assertEqual(words[-150:], answer.split())
+            context = words[1:words.index("Answer:")]
+            self.assertLessEqual(len(context), 32)
+            seen.update(context)
+        # 121 context tokens in windows of 32 with stride 24: every token is graded
+        self.assertEqual(len(windows), 5)
+        self.assertEqual(len(seen), 121)
+        print(f"✅ {len(windows)} windows cover the whole context")
+
+    def test_answer_filling_budget_falls_back_to_truncation(self):
+        grader = make_grader(64, (64,), long_context="window", window_tokens=32, window_overlap=8)
+        request = GradeRequest(context=self.context, answer=" ".join(f"a{i}" for i in range(55)))
+        self.assertEqual(grader._encode_windows(request), [grader._encode(request)])
+
+    def test_max_faithful_finds_supporting_window(self):
+        print("\n--- Testing Sliding Window: max_faithful ---")
+        grader = make_grader(64, (32,), long_context="window", window_tokens=32, window_overlap=8)
+        grader._tokenize("needle")
+        grader.model = NeedleModel(grader.tokenizer.vocab["needle"])
+
+        # Truncation would have cut the needle out of context; windowing finds it
+        result = grader.grade_batch([self.request])[0]
+        self.assertTrue(result.is_faithful)
+        # All windows went through a single forward pass
+        self.assertEqual(len(grader.model.shapes), 1)
+        print(f"✅ Faithful via window, batch shape {grader.model.shapes[0]}")
+
+    def test_mean_aggregation_and_max_windows(self):
+        grader = make_grader(64, (32,), long_context="window", window_tokens=32,
+                             window_overlap=8, window_aggregation="mean", max_windows=3)
+        grader._tokenize("needle")
+        grader.model = NeedleModel(grader.tokenizer.vocab["needle"])
+
+        with self.assertLogs(level="WARNING") as logs:
+            self.assertEqual(len(grader._encode_windows(self.request)), 3)
+        self.assertIn("covers 80/121 context tokens", logs.output[0])
+        # Only the last of the three windows reaches the needle, so the mean is unfaithful
+        self.assertFalse(grader.grade_batch([self.request])[0].is_faithful)
+
+    def test_invalid_settings_rejected(self):
+        with self.assertRaises(ValueError):
+            make_grader(64, (32,), long_context="sliding")
+        with self.assertRaises(ValueError):
+            make_grader(64, (32,), window_aggregation="median")
+
+
+if __name__ == "__main__":
+    unittest.main()
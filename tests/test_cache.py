@@ -0,0 +1,215 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from src.cache import TieredCache, make_key, get_verdict_cache
+from src.embeddings import CachedEmbeddings
+import src.graph.nodes.grader as grader_module
+
+
+class TestTieredCache(unittest.TestCase):
+
+    def test_key_is_stable_and_whitespace_insensitive(self):
+        self.assertEqual(make_key("v1", "What  was\nrevenue?"), make_key("v1", "What was revenue?"))
+        self.assertNotEqual(make_key("v1", "q"), make_key("v2", "q"))
+
+    def test_lru_eviction(self):
+        cache = TieredCache("lru", max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # a is now most recently used
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["size"], 2)
+
+    @patch('src.cache.time.time')
+    def test_ttl_expiry(self, mock_time):
+        mock_time.return_value = 1000.0
+        cache = TieredCache("ttl", ttl_seconds=60)
+        cache.set("k", "yes")
+        mock_time.return_value = 1059.0
+        self.assertEqual(cache.get("k"), "yes")
+        mock_time.return_value = 1061.0
+        self.assertIsNone(cache.get("k"))
+
+    def test_sqlite_tier_survives_restart(self):
+        print("\n--- Testing Verdict Cache: SQLite tier ---")
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "cache.db")
+            TieredCache("verdicts", db_path=db_path).set("k", {"is_faithful": True, "confidence": 0.9})
+
+            restarted = TieredCache("verdicts", db_path=db_path)
+            self.assertEqual(restarted.get("k"), {"is_faithful": True, "confidence": 0.9})
+            self.assertEqual(restarted.stats()["disk_hits"], 1)
+            # Other namespaces in the same file are isolated
+            self.assertIsNone(TieredCache("embeddings", db_path=db_path).get("k"))
+        print("✅ Verdict served from disk after restart")
+
+    @patch('src.cache.time.time')
+    def test_disk_tier_purged_by_ttl_and_row_cap(self, mock_time):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "cache.db")
+            cache = TieredCache("emb", db_path=db_path)
+            for i in range(10):
+                mock_time.return_value = 1000.0 + i
+                cache.set(f"k{i}", i)
+
+            # Reopening purges: rows older than the TTL, then all but the newest 3
+            mock_time.return_value = 1012.0
+            restarted = TieredCache("emb", max_size=1, ttl_seconds=10, db_path=db_path, max_disk_rows=3)
+            rows = restarted._db.execute("SELECT key FROM cache_entries ORDER BY created").fetchall()
+            self.assertEqual([key for key, in rows], ["k7", "k8", "k9"])
+
+    def test_get_many_and_set_many(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "cache.db")
+            TieredCache("emb", db_path=db_path).set_many([("a", 1), ("b", 2)])
+
+            restarted = TieredCache("emb", db_path=db_path)
+            restarted.set("c", 3)
+            self.assertEqual(restarted.get_many(["a", "x", "c", "b"]), [1, None, 3, 2])
+            self.assertEqual((restarted.hits, restarted.disk_hits, restarted.misses), (1, 2, 1))
+
+    def test_async_access_uses_a_thread_only_for_sqlite(self):
+        memory = TieredCache("mem")
+        with tempfile.TemporaryDirectory() as tmp:
+            disk = TieredCache("disk", db_path=os.path.join(tmp, "cache.db"))
+            with patch('src.cache.asyncio.to_thread', wraps=asyncio.to_thread) as to_thread:
+                for cache in (memory, disk):
+                    asyncio.run(cache.aset("k", 1))
+                    self.assertEqual(asyncio.run(cache.aget_many(["k", "x"])), [1, None])
+            self.assertEqual(to_thread.call_count, 2)
+
+    def test_disabled_cache(self):
+        cache = TieredCache("off", max_size=0)
+        cache.set("k", 1)
+        self.assertIsNone(cache.get("k"))
+
+
+class TestGraderVerdictCache(unittest.TestCase):
+
+    def setUp(self):
+        get_verdict_cache().clear()
+
+    def tearDown(self):
+        get_verdict_cache().clear()
+
+    @patch('src.graph.nodes.grader.llm')
+    def test_repeated_document_graded_once(self, mock_llm):
+        score_gen = MagicMock()
+        score_gen.invoke.return_value = MagicMock(binary_score="no")
+        mock_llm.with_structured_output.return_value = score_gen
+
+        state = {"documents": ["doc1"], "question": "q", "route": "vectorstore"}
+        grader_module.grade_documents(state)
+        result = grader_module.grade_documents(state)
+
+        self.assertEqual(result["documents"], [])
+        self.assertEqual(score_gen.invoke.call_count, 1)
+        self.assertEqual(get_verdict_cache().stats()["hits"], 1)
+
+
+    @patch('src.graph.nodes.grader.llm')
+    def test_async_grading_keeps_sqlite_off_the_loop(self, mock_llm):
+        score_gen = MagicMock()
+        score_gen.ainvoke = AsyncMock(return_value=MagicMock(binary_score="yes"))
+        mock_llm.with_structured_output.return_value = score_gen
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TieredCache("verdicts", db_path=os.path.join(tmp, "cache.db"))
+            with patch('src.graph.nodes.grader.get_verdict_cache', return_value=cache), \
+                    patch('src.cache.asyncio.to_thread', wraps=asyncio.to_thread) as to_thread:
+                for _ in range(2):
+                    self.assertEqual(asyncio.run(grader_module._agrade_with_api("q", "doc1", "system")), "yes")
+
+            # Miss (read + write), then a hit (read)
+            self.assertEqual(to_thread.call_count, 3)
+            self.assertEqual(score_gen.ainvoke.await_count, 1)
+
+
+class CountingEmbeddings:
+    """Deterministic fake embedding model that records what it was asked to embed."""
+
+    def __init__(self):
+        self.document_calls = []
+        self.query_calls = []
+
+    def embed_documents(self, texts):
+        self.document_calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        self.query_calls.append(text)
+        return [float(len(text)), 0.0]
+
+
+class TestEmbeddingCache(unittest.TestCase):
+
+    def test_only_unseen_chunks_are_embedded(self):
+        print("\n--- Testing Embedding Cache: batched documents ---")
+        fake = CountingEmbeddings()
+        embeddings = CachedEmbeddings(fake, "fake-model", TieredCache("emb"))
+
+        first = embeddings.embed_documents(["alpha", "beta"])
+        second = embeddings.embed_documents(["beta", "gamma", "alpha"])
+
+        self.assertEqual(fake.document_calls, [["alpha", "beta"], ["gamma"]])
+        self.assertEqual(second, [first[1], [5.0, 1.0], first[0]])
+        print("✅ Re-ingest embedded only the new chunk")
+
+    def test_queries_cached_separately_from_documents(self):
+        fake = CountingEmbeddings()
+        embeddings = CachedEmbeddings(fake, "fake-model", TieredCache("emb"))
+
+        embeddings.embed_documents(["revenue"])
+        self.assertEqual(embeddings.embed_query("revenue"), [7.0, 0.0])
+        self.assertEqual(embeddings.embed_query("revenue"), [7.0, 0.0])
+        self.assertEqual(fake.query_calls, ["revenue"])
+
+    def test_document_batch_written_in_one_transaction(self):
+        print("\n--- Testing Embedding Cache: batched SQLite writes ---")
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = TieredCache("emb", db_path=os.path.join(tmp, "cache.db"))
+            cache._db = MagicMock(wraps=cache._db)
+            embeddings = CachedEmbeddings(CountingEmbeddings(), "fake-model", cache)
+
+            embeddings.embed_documents([f"chunk {i}" for i in range(50)])
+
+            self.assertEqual(cache._db.executemany.call_count, 1)
+            self.assertEqual(len(cache._db.executemany.call_args.args[1]), 50)
+            self.assertEqual(cache._db.commit.call_count, 1)
+        print("✅ 50 chunks cached with one commit")
+
+    def test_async_disk_access_runs_off_the_loop(self):
+        fake = CountingEmbeddings()
+        fake.aembed_query = AsyncMock(side_effect=fake.embed_query)
+        with tempfile.TemporaryDirectory() as tmp:
+            embeddings = CachedEmbeddings(fake, "fake-model", TieredCache("emb", db_path=os.path.join(tmp, "cache.db")))
+            with patch('src.cache.asyncio.to_thread', wraps=asyncio.to_thread) as to_thread:
+                self.assertEqual(asyncio.run(embeddings.aembed_query("q")), [1.0, 0.0])
+                self.assertEqual(asyncio.run(embeddings.aembed_query("q")), [1.0, 0.0])
+
+            # get + set on the miss, get on the hit
+            self.assertEqual(to_thread.call_count, 3)
+            self.assertEqual(fake.query_calls, ["q"])
+
+    def test_model_name_is_part_of_the_key(self):
+        cache = TieredCache("emb")
+        CachedEmbeddings(CountingEmbeddings(), "model-a", cache).embed_query("q")
+        other = CountingEmbeddings()
+        CachedEmbeddings(other, "model-b", cache).embed_query("q")
+        self.assertEqual(other.query_calls, ["q"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from qdrant_client.http import models
+from src.collection import CollectionLayout, create_collection, migrate_collection, plan_migration
+import src.vectorstore as vectorstore_module
+
+
+def _collection_info(size=768, on_disk=None, m=16, quantization=None, segments=0):
+    """The parts of a CollectionInfo that plan_migration reads."""
+    return SimpleNamespace(config=SimpleNamespace(
+        params=SimpleNamespace(
+            vectors=models.VectorParams(size=size, distance=models.Distance.COSINE, on_disk=on_disk),
+            on_disk_payload=True,
+        ),
+        hnsw_config=SimpleNamespace(m=m, ef_construct=100, on_disk=None),
+        optimizer_config=SimpleNamespace(
+            default_segment_number=segments, max_segment_size=None, indexing_threshold=20000, memmap_threshold=None
+        ),
+        quantization_config=quantization,
+    ))
+
+
+class TestCollectionLayout(unittest.TestCase):
+
+    @patch.dict(os.environ, {
+        "COLLECTION_QUANTIZATION": "Binary",
+        "COLLECTION_VECTORS_ON_DISK": "true",
+        "COLLECTION_HNSW_M": "32",
+        "COLLECTION_HNSW_EF": "128",
+        "COLLECTION_OVERSAMPLING": "3",
+    })
+    def test_from_env(self):
+        layout = CollectionLayout.from_env()
+        self.assertEqual(layout.quantization, "binary")
+        self.assertTrue(layout.vectors_on_disk)
+        self.assertEqual(layout.hnsw_config().m, 32)
+        self.assertIsInstance(layout.quantization_config(), models.BinaryQuantization)
+
+        params = layout.search_params()
+        self.assertEqual(params.hnsw_ef, 128)
+        self.assertEqual(params.quantization.oversampling, 3.0)
+        self.assertTrue(params.quantization.rescore)
+
+    def test_defaults_need_no_search_params(self):
+        self.assertIsNone(CollectionLayout().search_params())
+        self.assertIsNone(CollectionLayout().quantization_config())
+
+    def test_rejects_unknown_quantization(self):
+        with self.assertRaises(ValueError):
+            CollectionLayout(quantization="product")
+
+    def test_create_collection_applies_layout(self):
+        client = MagicMock()
+        layout = CollectionLayout(quantization="scalar", vectors_on_disk=True, segment_number=2)
+        create_collection(client, "docs", 384, layout)
+
+        kwargs = client.create_collection.call_args.kwargs
+        self.assertEqual(kwargs["vectors_config"].size, 384)
+        self.assertTrue(kwargs["vectors_config"].on_disk)
+        self.assertEqual(kwargs["quantization_config"].scalar.type, models.ScalarType.INT8)
+        self.assertEqual(kwargs["optimizers_config"].default_segment_number, 2)
+
+
+class TestMigration(unittest.TestCase):
+
+    def test_matching_collection_has_no_changes(self):
+        changes, update = plan_migration(_collection_info(), 768, CollectionLayout())
+        self.assertEqual(changes, [])
+        self.assertEqual(update, {})
+
+    def test_plans_in_place_update(self):
+        print("\n--- Testing Collection Migration: dense float32 -> scalar, originals on disk ---")
+        layout = CollectionLayout(quantization="scalar", vectors_on_disk=True)
+        changes, update = plan_migration(_collection_info(), 768, layout)
+
+        self.assertEqual(set(update), {"vectors_config", "quantization_config"})
+        self.assertTrue(update["vectors_config"][""].on_disk)
+        self.assertIsInstance(update["quantization_config"], models.ScalarQuantization)
+        print(f"✅ {changes}")
+
+    def test_removing_quantization_disables_it(self):
+        existing = models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+        _, update = plan_migration(_collection_info(quantization=existing), 768, CollectionLayout())
+        self.assertEqual(update["quantization_config"], models.Disabled.DISABLED)
+
+    def test_dimension_change_needs_recreate(self):
+        with self.assertRaises(ValueError):
+            plan_migration(_collection_info(size=384), 768, CollectionLayout())
+
+    def test_dry_run_does_not_update(self):
+        client = MagicMock()
+        client.get_collection.return_value = _collection_info(m=16)
+        layout = CollectionLayout(hnsw_m=32)
+
+        changes = migrate_collection(client, "docs", 768, layout, dry_run=True)
+        self.assertEqual(changes, ["hnsw m: 16 -> 32"])
+        client.update_collection.assert_not_called()
+
+        migrate_collection(client, "docs", 768, layout)
+        self.assertEqual(client.update_collection.call_args.kwargs["hnsw_config"].m, 32)
+
+
+class TestSearchParams(unittest.TestCase):
+
+    @patch('src.vectorstore.layout', CollectionLayout(quantization="binary", oversampling=4.0, hnsw_ef=64))
+    def test_dense_queries_carry_rescoring_params(self):
+        dense = vectorstore_module._query_args([0.1], None, 4)
+        self.assertEqual(dense["search_params"].quantization.oversampling, 4.0)
+
+        sparse = models.SparseVector(indices=[1], values=[1.0])
+        hybrid = vectorstore_module._query_args([0.1], sparse, 4)
+        dense_prefetch, sparse_prefetch = hybrid["prefetch"]
+        self.assertEqual(dense_prefetch.params.hnsw_ef, 64)
+        self.assertIsNone(sparse_prefetch.params)
+
+
+if __name__ == "__main__":
+    unittest.main()
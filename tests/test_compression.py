@@ -0,0 +1,100 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import src.graph.nodes.compressor as compressor_module
+import src.graph.nodes.generator as generator_module
+import src.graph.nodes.hallucination_monitor as monitor_module
+from src.graph.workflow import compile_graph
+
+QUESTION = "What was the total revenue and cloud cost for Q3 2025?"
+
+DOCUMENTS = [
+    "Content: LangGraph is a library for building stateful apps. It was released in 2024. "
+    "Cloud costs in Q3 2025 were 1.1B, up 12%. The office moved to a new building.\nSource: data/q3.md",
+    "Title: Revenue news\nSnippet: Total revenue for Q3 2025 reached 4.2B. Analysts were pleased.\n"
+    "Source: https://example.com/q3\n\n"
+    "Title: Other\nSnippet: Unrelated text about gardening.\nSource: https://example.com/garden",
+]
+
+
+class TestCompress(unittest.TestCase):
+
+    def test_keeps_relevant_sentences_and_sources(self):
+        print("\n--- Testing Context Compression: 2 documents, 3 passages ---")
+        context = compressor_module.compress(QUESTION, DOCUMENTS, token_budget=60)
+
+        self.assertIn("Cloud costs in Q3 2025 were 1.1B", context)
+        self.assertIn("Total revenue for Q3 2025 reached 4.2B", context)
+        self.assertIn("Source: data/q3.md", context)
+        self.assertIn("[2] Revenue news\nSource: https://example.com/q3", context)
+        for dropped in ("LangGraph", "gardening", "Content:", "Snippet:"):
+            self.assertNotIn(dropped, context)
+        original = compressor_module.format_context(DOCUMENTS)
+        print(f"✅ {len(original)} -> {len(context)} characters")
+
+    def test_budget_limits_sentences(self):
+        context = compressor_module.compress("Q3 2025 revenue", DOCUMENTS, token_budget=20)
+        # The best sentence always fits; the runner-up would break the budget
+        self.assertIn("Total revenue for Q3 2025", context)
+        self.assertNotIn("Cloud costs", context)
+
+    def test_no_overlap_keeps_leading_sentences(self):
+        context = compressor_module.compress("summarize this", DOCUMENTS, token_budget=25)
+        self.assertIn("LangGraph is a library", context)
+
+    def test_unstructured_document_passes_through(self):
+        notice = "System: The web search returned no results. The agent tried searching but found nothing."
+        self.assertIn("no results", compressor_module.compress(QUESTION, [notice]))
+
+
+class TestCompressNode(unittest.TestCase):
+
+    @patch('src.graph.nodes.compressor.CONTEXT_COMPRESSION', False)
+    def test_disabled_joins_documents(self):
+        result = compressor_module.compress_context({"question": QUESTION, "documents": DOCUMENTS})
+        self.assertEqual(result["context"], "\n\n".join(DOCUMENTS))
+        self.assertFalse(result["context"].startswith("["))
+
+    @patch('src.graph.nodes.compressor.CONTEXT_TOKEN_BUDGET', 60)
+    @patch('src.graph.nodes.compressor.CONTEXT_COMPRESSION', True)
+    def test_enabled_compresses(self):
+        result = compressor_module.compress_context({"question": QUESTION, "documents": DOCUMENTS})
+        self.assertLess(len(result["context"]), len("\n\n".join(DOCUMENTS)) / 2)
+
+    def test_graph_compresses_before_generating(self):
+        graph = compile_graph(speculative=False).get_graph()
+        edges = {(edge.source, edge.target) for edge in graph.edges}
+        self.assertIn(("grade_documents", "compress_context"), edges)
+        self.assertIn(("compress_context", "generate"), edges)
+        self.assertNotIn(("grade_documents", "generate"), edges)
+
+
+class TestContextConsumers(unittest.TestCase):
+
+    def test_generator_uses_context(self):
+        chain = MagicMock()
+        chain.invoke.return_value = "answer"
+        with patch.object(generator_module, '_rag_chain', return_value=chain):
+            generator_module.generate({"question": "q", "documents": DOCUMENTS, "context": "[1] short"})
+        self.assertEqual(chain.invoke.call_args.args[0]["context"], "[1] short")
+
+    @patch('src.graph.nodes.hallucination_monitor.PARALLEL_CHECKS', False)
+    @patch('src.graph.nodes.hallucination_monitor._grade_usefulness', return_value="yes")
+    @patch('src.graph.nodes.hallucination_monitor._grade_groundedness', return_value="yes")
+    def test_monitor_checks_against_context(self, mock_grounded, mock_useful):
+        monitor_module.check_hallucination({
+            "question": "q", "documents": DOCUMENTS, "context": "[1] short", "generation": "answer"
+        })
+        self.assertEqual(mock_grounded.call_args.args[0], "[1] short")
+
+
+if __name__ == "__main__":
+    unittest.main()
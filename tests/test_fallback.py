@@ -21,6 +21,7 @@ class TestFallback(unittest.TestCase):
         print("\n--- Testing Fallback: Low Confidence ---")
         # Setup local grader to return low confidence
         mock_local_instance = MagicMock()
+        mock_local_instance.tasks = {"groundedness", "relevance"}
         mock_result = MagicMock()
         mock_result.confidence = 0.5 # Below 0.8 threshold
         mock_result.is_faithful = True
@@ -50,6 +51,7 @@ class TestFallback(unittest.TestCase):
         print("\n--- Testing Fallback: Exception ---")
          # Setup local grader to raise exception
         mock_local_instance = MagicMock()
+        mock_local_instance.tasks = {"groundedness", "relevance"}
         mock_local_instance.grade_sync.side_effect = RuntimeError("GPU Explosion")
         mock_get_local.return_value = mock_local_instance
         
@@ -68,6 +70,7 @@ class TestFallback(unittest.TestCase):
     def test_success_path(self, mock_api, mock_get_local):
         print("\n--- Testing Success: High Confidence ---")
         mock_local_instance = MagicMock()
+        mock_local_instance.tasks = {"groundedness", "relevance"}
         mock_result = MagicMock()
         mock_result.confidence = 0.95 # High confidence
         mock_result.is_faithful = True
@@ -84,5 +87,35 @@ class TestFallback(unittest.TestCase):
         print("✅ High confidence skipped API call correctly")
         self.assertEqual(len(result["documents"]), 1)
 
+    @patch('src.graph.nodes.grader.USE_LOCAL_GRADER', True)
+    @patch('src.graph.nodes.grader._get_local_grader')
+    @patch('src.graph.nodes.grader._grade_with_api')
+    def test_missing_head_falls_back_quietly(self, mock_api, mock_get_local):
+        print("\n--- Testing Fallback: No Trained Relevance Head ---")
+        mock_local_instance = MagicMock()
+        mock_local_instance.tasks = {"groundedness"}
+        mock_get_local.return_value = mock_local_instance
+        mock_api.return_value = "yes"
+
+        state = {"documents": ["doc1", "doc2"], "question": "q", "route": "rag"}
+        with self.assertNoLogs(level="WARNING"):
+            result = grader_module.grade_documents(state)
+
+        mock_local_instance.grade_sync.assert_not_called()
+        self.assertEqual(mock_api.call_count, 2)
+        print("✅ Missing head went straight to the API without logging an error")
+        self.assertEqual(len(result["documents"]), 2)
+
+    @patch('src.graph.nodes.hallucination_monitor._get_local_grader')
+    def test_monitor_missing_usefulness_head(self, mock_get_local):
+        import src.graph.nodes.hallucination_monitor as monitor_module
+        mock_local_instance = MagicMock()
+        mock_local_instance.tasks = {"groundedness"}
+        mock_get_local.return_value = mock_local_instance
+
+        with self.assertNoLogs(level="WARNING"):
+            self.assertIsNone(monitor_module._grade_answer_with_local("q", "gen"))
+        mock_local_instance.grade_sync.assert_not_called()
+
 if __name__ == "__main__":
     unittest.main()
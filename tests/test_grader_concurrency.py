@@ -0,0 +1,85 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+import threading
+import time
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import src.graph.nodes.grader as grader_module
+
+
+class TestConcurrentGrading(unittest.TestCase):
+
+    @patch('src.graph.nodes.grader.GRADER_MAX_CONCURRENCY', 4)
+    @patch('src.graph.nodes.grader._grade_with_api')
+    def test_documents_graded_concurrently_in_order(self, mock_api):
+        print("\n--- Testing Concurrent Grading: 4 docs ---")
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_grade(question, doc, system):
+            with lock:
+                in_flight.append(doc)
+                peak.append(len(in_flight))
+            time.sleep(0.2)
+            with lock:
+                in_flight.remove(doc)
+            return "no" if doc == "doc2" else "yes"
+
+        mock_api.side_effect = slow_grade
+
+        state = {"documents": ["doc1", "doc2", "doc3", "doc4"], "question": "q", "route": "vectorstore"}
+        start = time.perf_counter()
+        result = grader_module.grade_documents(state)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(result["documents"], ["doc1", "doc3", "doc4"])
+        self.assertEqual(max(peak), 4)
+        self.assertLess(elapsed, 0.6)
+        print(f"✅ 4 x 200ms grades finished in {elapsed * 1000:.0f}ms")
+
+    @patch('src.graph.nodes.grader.GRADER_MAX_CONCURRENCY', 2)
+    @patch('src.graph.nodes.grader._grade_with_api')
+    def test_concurrency_limit_respected(self, mock_api):
+        in_flight = [0]
+        peak = [0]
+        lock = threading.Lock()
+
+        def slow_grade(question, doc, system):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.05)
+            with lock:
+                in_flight[0] -= 1
+            return "yes"
+
+        mock_api.side_effect = slow_grade
+
+        state = {"documents": [f"doc{i}" for i in range(6)], "question": "q", "route": "vectorstore"}
+        result = grader_module.grade_documents(state)
+
+        self.assertEqual(len(result["documents"]), 6)
+        self.assertEqual(peak[0], 2)
+
+    @patch('src.graph.nodes.grader.llm')
+    def test_api_error_keeps_document(self, mock_llm):
+        score_gen = MagicMock()
+        score_gen.invoke.side_effect = RuntimeError("quota exceeded")
+        mock_llm.with_structured_output.return_value = score_gen
+
+        state = {"documents": ["doc1", "doc2"], "question": "q", "route": "vectorstore"}
+        result = grader_module.grade_documents(state)
+
+        self.assertEqual(result["documents"], ["doc1", "doc2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
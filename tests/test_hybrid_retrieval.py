@@ -0,0 +1,87 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from qdrant_client.http import models
+from src.sparse import BM25SparseEmbeddings, tokenize
+import src.vectorstore as vectorstore_module
+
+
+def _dot(query, doc):
+    weights = dict(zip(doc.indices, doc.values))
+    return sum(weights.get(i, 0.0) * v for i, v in zip(query.indices, query.values))
+
+
+class TestBM25SparseEmbeddings(unittest.TestCase):
+
+    def setUp(self):
+        self.encoder = BM25SparseEmbeddings()
+
+    def test_tokenize_keeps_exact_financial_terms(self):
+        self.assertEqual(tokenize("What was the Q3 2025 cloud cost?"), ["q3", "2025", "cloud", "cost"])
+
+    def test_exact_term_match_scores_higher(self):
+        print("\n--- Testing BM25 sparse vectors: exact term match ---")
+        query = self.encoder.embed_query("Q3 2025 cloud infrastructure cost")
+        match, other = self.encoder.embed_documents([
+            "Q3 2025 cloud infrastructure cost was 1.1B, up from Q2.",
+            "LangGraph builds stateful multi-actor applications with LLMs.",
+        ])
+        self.assertGreater(_dot(query, match), 0.0)
+        self.assertEqual(_dot(query, other), 0.0)
+        print("✅ Chunk containing the exact terms wins")
+
+    def test_term_frequency_saturates(self):
+        once = self.encoder.embed_document("revenue")
+        many = self.encoder.embed_document("revenue " * 20)
+        # BM25 caps term frequency at k1 + 1
+        self.assertLess(max(many.values), self.encoder.k1 + 1)
+        self.assertLess(max(many.values) / max(once.values), 20)
+
+    def test_indices_are_stable_and_sorted(self):
+        a = self.encoder.embed_query("cloud cost 2025")
+        b = BM25SparseEmbeddings().embed_query("2025 cost cloud")
+        self.assertEqual(a, b)
+        self.assertEqual(a.indices, sorted(a.indices))
+
+
+class TestHybridQuery(unittest.TestCase):
+
+    @patch('src.vectorstore._sparse_available', True)
+    @patch('src.vectorstore.RETRIEVAL_MODE', "hybrid")
+    @patch('src.vectorstore.embeddings')
+    @patch('src.vectorstore.get_async_client')
+    def test_single_fused_query(self, mock_get_client, mock_embeddings):
+        mock_embeddings.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+        point = MagicMock(payload={"page_content": "Q3 cost", "metadata": {"source": "q3.md"}})
+        mock_get_client.return_value.query_points = AsyncMock(return_value=MagicMock(points=[point]))
+
+        documents = asyncio.run(vectorstore_module.get_retriever().ainvoke("Q3 2025 cloud cost"))
+
+        self.assertEqual(documents[0].page_content, "Q3 cost")
+        query_points = mock_get_client.return_value.query_points
+        self.assertEqual(query_points.await_count, 1)
+        kwargs = query_points.await_args.kwargs
+        self.assertEqual(kwargs["query"], models.FusionQuery(fusion=models.Fusion.RRF))
+        dense, sparse = kwargs["prefetch"]
+        self.assertEqual(dense.query, [0.1, 0.2])
+        self.assertEqual(sparse.using, vectorstore_module.SPARSE_VECTOR_NAME)
+        self.assertIsInstance(sparse.query, models.SparseVector)
+
+    @patch('src.vectorstore._sparse_available', False)
+    @patch('src.vectorstore.RETRIEVAL_MODE', "hybrid")
+    def test_dense_only_collection_falls_back(self):
+        self.assertEqual(vectorstore_module._query_args([0.1], None, 4), {"query": [0.1], "limit": 4})
+        self.assertFalse(vectorstore_module._use_sparse())
+
+
+if __name__ == "__main__":
+    unittest.main()
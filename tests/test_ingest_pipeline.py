@@ -0,0 +1,232 @@
+import unittest
+import asyncio
+import tempfile
+import shutil
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ingest_pipeline import IngestManifest, IngestPipeline, PROJECT_ROOT, chunk_id, find_files, source_name
+from src.sparse import BM25SparseEmbeddings
+
+
+class FakeEmbeddings:
+    """Tracks concurrent embedding calls; fails the first `failures` calls."""
+
+    def __init__(self, failures=0, delay=0.01):
+        self.failures = failures
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.batch_sizes = []
+
+    async def aembed_documents(self, texts):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("429 rate limited")
+            self.batch_sizes.append(len(texts))
+            return [[float(len(t)), 1.0] for t in texts]
+        finally:
+            self.in_flight -= 1
+
+
+class FakeQdrant:
+    def __init__(self, fail_sources=()):
+        self.points = []
+        self.stored = {}
+        self.fail_sources = set(fail_sources)
+
+    async def upsert(self, collection_name, points, wait):
+        if any(p.payload["metadata"]["source"] in self.fail_sources for p in points):
+            raise RuntimeError("qdrant unavailable")
+        self.points.extend(points)
+        self.stored.update({p.id: p for p in points})
+
+    async def delete(self, collection_name, points_selector, wait):
+        for point_id in points_selector.points:
+            del self.stored[point_id]
+
+
+class TestIngestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        for i in range(6):
+            with open(os.path.join(self.data_dir, f"doc{i}.md"), "w", encoding="utf-8") as f:
+                f.write(" ".join(f"sentence {i}-{j} about quarterly revenue." for j in range(40)))
+        with open(os.path.join(self.data_dir, "notes.txt"), "w", encoding="utf-8") as f:
+            f.write("not markdown")
+        self.manifest_path = os.path.join(self.data_dir, "state", "manifest.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir)
+
+    def _pipeline(self, embeddings, client, **kwargs):
+        settings = dict(batch_size=8, embed_concurrency=2, max_retries=3, retry_base_delay=0.01,
+                        queue_size=2, manifest=IngestManifest(self.manifest_path))
+        settings.update(kwargs)
+        return IngestPipeline(embeddings, client, "test", **settings)
+
+    def test_all_chunks_stored_in_bounded_batches(self):
+        print("\n--- Testing Ingest Pipeline: 6 files ---")
+        embeddings, client = FakeEmbeddings(), FakeQdrant()
+        stats = asyncio.run(self._pipeline(embeddings, client).run(find_files(self.data_dir)))
+
+        self.assertEqual(stats.files, 6)
+        self.assertEqual(stats.chunks, len(client.points))
+        self.assertGreater(stats.chunks, 6)
+        self.assertLessEqual(max(embeddings.batch_sizes), 8)
+        self.assertLessEqual(embeddings.peak, 2)
+        self.assertGreater(stats.chunks_per_second, 0)
+        self.assertEqual({p.payload["metadata"]["source"] for p in client.points},
+                         set(find_files(self.data_dir)))
+        print(f"✅ {stats.report()}")
+
+    def test_rate_limit_errors_are_retried(self):
+        embeddings, client = FakeEmbeddings(failures=2), FakeQdrant()
+        stats = asyncio.run(self._pipeline(embeddings, client).run(find_files(self.data_dir)))
+
+        self.assertEqual(stats.retries, 2)
+        self.assertEqual(stats.failed_batches, 0)
+        self.assertEqual(stats.chunks, len(client.points))
+
+    def test_rerun_resumes_after_failures(self):
+        failing = os.path.join(self.data_dir, "doc3.md")
+        # One chunk per batch, so only doc3's batches fail
+        first = asyncio.run(self._pipeline(FakeEmbeddings(), FakeQdrant(fail_sources=[failing]), batch_size=1)
+                            .run(find_files(self.data_dir)))
+        self.assertEqual(first.failed_files, 1)
+
+        client = FakeQdrant()
+        second = asyncio.run(self._pipeline(FakeEmbeddings(), client)
+                             .run(find_files(self.data_dir)))
+
+        self.assertEqual(second.unchanged_files, 5)
+        self.assertEqual(second.files, 1)
+        self.assertEqual({p.payload["metadata"]["source"] for p in client.points}, {failing})
+
+    def test_sparse_vectors_written_for_hybrid_collections(self):
+        client = FakeQdrant()
+        asyncio.run(self._pipeline(FakeEmbeddings(), client, sparse_embeddings=BM25SparseEmbeddings())
+                    .run(find_files(self.data_dir)))
+        vector = client.points[0].vector
+        self.assertEqual(set(vector), {"", "langchain-sparse"})
+
+
+class TestIncrementalIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.paths = []
+        for i in range(3):
+            path = os.path.join(self.data_dir, f"doc{i}.md")
+            self._write(path, [f"Paragraph {i}-{j}: " + "revenue grew steadily. " * 15 for j in range(4)])
+            self.paths.append(path)
+        self.manifest_path = os.path.join(self.data_dir, "state", "manifest.sqlite")
+        self.client = FakeQdrant()
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir)
+
+    def _write(self, path, paragraphs):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n\n".join(paragraphs))
+
+    def _sync(self, embeddings=None, paths=None, **kwargs):
+        pipeline = IngestPipeline(embeddings or FakeEmbeddings(), self.client, "test", batch_size=4,
+                                  manifest=IngestManifest(self.manifest_path))
+        return asyncio.run(pipeline.run(paths or find_files(self.data_dir), **kwargs))
+
+    def test_unchanged_corpus_costs_nothing(self):
+        print("\n--- Testing Incremental Ingest: re-run on unchanged corpus ---")
+        first = self._sync()
+        embeddings = FakeEmbeddings()
+        second = self._sync(embeddings)
+
+        self.assertEqual(second.unchanged_files, 3)
+        self.assertEqual(second.chunks, 0)
+        self.assertEqual(embeddings.batch_sizes, [])
+        self.assertEqual(len(self.client.stored), first.chunks)
+        print(f"✅ {second.report()}")
+
+    def test_edit_embeds_only_new_chunks_and_deletes_stale(self):
+        first = self._sync()
+        before = set(self.client.stored)
+
+        # Replace one paragraph of doc1
+        self._write(self.paths[1], [f"Paragraph 1-{j}: " + "revenue grew steadily. " * 15 for j in range(3)]
+                    + ["Paragraph 1-3: cloud costs fell sharply. " * 8])
+        second = self._sync()
+
+        self.assertEqual(second.files, 1)
+        self.assertGreater(second.unchanged_chunks, 0)
+        self.assertGreater(second.deleted_chunks, 0)
+        self.assertLess(second.chunks, first.chunks)
+        self.assertEqual(len(self.client.stored), first.chunks - second.deleted_chunks + second.chunks)
+        self.assertTrue(any("cloud costs" in p.payload["page_content"] for p in self.client.stored.values()))
+        self.assertEqual(len(before - set(self.client.stored)), second.deleted_chunks)
+
+    def test_deleted_file_is_pruned(self):
+        self._sync()
+        os.remove(self.paths[2])
+        stats = self._sync()
+
+        self.assertEqual(stats.removed_files, 1)
+        self.assertNotIn(self.paths[2], {p.payload["metadata"]["source"] for p in self.client.stored.values()})
+
+    def test_point_ids_are_deterministic(self):
+        self.assertEqual(chunk_id("a.md", "text"), chunk_id("a.md", "text"))
+        self.assertNotEqual(chunk_id("a.md", "text"), chunk_id("b.md", "text"))
+
+        self._sync()
+        stored = set(self.client.stored)
+        # A full re-ingest overwrites the same points instead of duplicating them
+        stats = self._sync(full=True)
+        self.assertGreater(stats.chunks, 0)
+        self.assertEqual(set(self.client.stored), stored)
+
+    def test_path_spellings_share_one_source(self):
+        print("\n--- Testing Incremental Ingest: same files through another path spelling ---")
+        first = self._sync()
+        stored = set(self.client.stored)
+        embeddings = FakeEmbeddings()
+        # "<dir>/./doc0.md" and a path relative to the working directory
+        respelled = [os.path.join(self.data_dir, ".", os.path.basename(self.paths[0]))]
+        respelled += [os.path.relpath(p) for p in self.paths[1:]]
+        second = self._sync(embeddings, paths=respelled)
+
+        self.assertEqual(second.unchanged_files, 3)
+        self.assertEqual(embeddings.batch_sizes, [])
+        self.assertEqual(set(self.client.stored), stored)
+        self.assertEqual(len(stored), first.chunks)
+        print(f"✅ {second.report()}")
+
+    def test_source_name_is_canonical(self):
+        spellings = ["data/q3.md", "./data/q3.md", "data//sub/../q3.md", os.path.join(PROJECT_ROOT, "data", "q3.md")]
+        self.assertEqual({source_name(s) for s in spellings}, {"data/q3.md"})
+        self.assertEqual(chunk_id(source_name("./data/q3.md"), "text"), chunk_id(source_name("data/q3.md"), "text"))
+
+    def test_legacy_spelling_is_pruned_once_reindexed(self):
+        manifest = IngestManifest(self.manifest_path)
+        source = source_name(self.paths[0])
+        legacy = self.paths[0].replace(self.data_dir, self.data_dir + "/.")
+        self.client.stored["legacy"] = None
+        manifest.set("test", legacy, "old-hash", ["legacy"])
+
+        stats = self._sync()
+
+        self.assertNotIn("legacy", self.client.stored)
+        self.assertEqual(stats.removed_files, 1)
+        self.assertEqual(set(IngestManifest(self.manifest_path).sources("test")),
+                         {source_name(p) for p in self.paths})
+        self.assertIn(source, {p.payload["metadata"]["source"] for p in self.client.stored.values()})
+
+
+if __name__ == "__main__":
+    unittest.main()
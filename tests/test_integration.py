@@ -11,8 +11,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from src.graph.workflow import app as graph_app
+from src.vectorstore import ensure_collection
 from qdrant_client import QdrantClient
-from qdrant_client.http import models
 import uuid
 
 @pytest.mark.asyncio
@@ -25,14 +25,9 @@ async def test_end_to_end_flow():
     # 1. Seed the DB with a known document so the test is deterministic
     print("Seeding Qdrant...")
     client = QdrantClient(url=os.getenv("QDRANT_URL", "http://localhost:6333"))
-    collection_name = "agentic-engine" # MATCHES src/vectorstore.py
     
-    # Ensure collection exists (main app usually creates it, but good to be safe)
-    if not client.collection_exists(collection_name):
-         client.create_collection(
-            collection_name=collection_name,
-            vectors_config=models.VectorParams(size=768, distance=models.Distance.COSINE),
-        )
+    # Ensure collection exists with the configured layout (main app usually creates it, but good to be safe)
+    ensure_collection(client)
 
     # 2. Run the Query
     # Query specific to the newly ingested Financial Report
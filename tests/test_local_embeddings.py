@@ -0,0 +1,108 @@
+import unittest
+import asyncio
+import threading
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+import torch
+from transformers import BatchEncoding
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.local_embeddings import LocalEmbeddings
+from src.embeddings import get_embeddings
+
+
+class CharTokenizer:
+    """One token per character (id = ord), right-padded with 0."""
+
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts, padding, truncation, max_length, return_tensors):
+        self.texts.extend(texts)
+        ids = [[ord(c) for c in t[:max_length]] for t in texts]
+        width = max(len(i) for i in ids)
+        return BatchEncoding({
+            "input_ids": torch.tensor([i + [0] * (width - len(i)) for i in ids]),
+            "attention_mask": torch.tensor([[1] * len(i) + [0] * (width - len(i)) for i in ids]),
+        })
+
+
+class LengthModel(torch.nn.Module):
+    """Hidden state per token is [1, position]: pooled vectors reveal the text length."""
+
+    def __init__(self):
+        super().__init__()
+        self.batch_sizes = []
+
+    def forward(self, input_ids, attention_mask):
+        self.batch_sizes.append(input_ids.shape[0])
+        positions = torch.arange(input_ids.shape[1], dtype=torch.float).expand(input_ids.shape)
+        hidden = torch.stack([torch.ones_like(positions), positions], dim=-1)
+
+        class Output:
+            last_hidden_state = hidden
+        return Output()
+
+
+def make_embeddings(batch_size=2, pooling="mean", query_instruction="query: "):
+    embeddings = LocalEmbeddings.__new__(LocalEmbeddings)
+    embeddings.model_name = "fake"
+    embeddings.batch_size = batch_size
+    embeddings.pooling = pooling
+    embeddings.query_instruction = query_instruction
+    embeddings.max_length = 512
+    embeddings.device = "cpu"
+    embeddings.tokenizer = CharTokenizer()
+    embeddings.model = LengthModel()
+    embeddings.dimensions = 2
+    embeddings._lock = threading.Lock()
+    embeddings._executor = ThreadPoolExecutor(max_workers=1)
+    return embeddings
+
+
+def _length(vector):
+    # Mean position over n tokens is (n - 1) / 2; vectors are unit-normalized
+    return round(2 * vector[1] / vector[0] + 1)
+
+
+class TestLocalEmbeddings(unittest.TestCase):
+
+    def test_batched_encoding_preserves_input_order(self):
+        print("\n--- Testing Local Embeddings: batched, length-sorted ---")
+        embeddings = make_embeddings(batch_size=2)
+        texts = ["aaa", "a", "aaaaa", "aa", "aaaa"]
+        vectors = embeddings.embed_documents(texts)
+
+        self.assertEqual([_length(v) for v in vectors], [3, 1, 5, 2, 4])
+        self.assertEqual(embeddings.model.batch_sizes, [2, 2, 1])
+        # Longest texts share a batch, so padding stays small
+        self.assertEqual(embeddings.tokenizer.texts[:2], ["aaaaa", "aaaa"])
+        print("✅ 5 texts in 3 forward passes, returned in input order")
+
+    def test_vectors_are_normalized(self):
+        vector = make_embeddings().embed_documents(["abcdef"])[0]
+        self.assertAlmostEqual(sum(v * v for v in vector), 1.0, places=5)
+
+    def test_mean_pooling_ignores_padding(self):
+        embeddings = make_embeddings(batch_size=4)
+        alone = embeddings.embed_documents(["ab"])[0]
+        padded = embeddings.embed_documents(["ab", "abcdefgh"])[0]
+        for a, b in zip(alone, padded):
+            self.assertAlmostEqual(a, b, places=5)
+
+    def test_query_instruction_only_on_queries(self):
+        embeddings = make_embeddings()
+        embeddings.embed_documents(["doc"])
+        asyncio.run(embeddings.aembed_query("q"))
+        self.assertEqual(embeddings.tokenizer.texts, ["doc", "query: q"])
+
+    def test_unknown_backend_rejected(self):
+        with self.assertRaises(ValueError):
+            get_embeddings(backend="openai")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from fastapi.testclient import TestClient
+from qdrant_client.http import models
+from src.cache import SemanticCache
+from src.graph.nodes.retriever import aretrieve
+import src.main as main_module
+import src.vectorstore as vectorstore_module
+
+
+class TestSourceFilter(unittest.TestCase):
+
+    def test_build_filter(self):
+        self.assertIsNone(vectorstore_module.build_filter(None))
+        self.assertIsNone(vectorstore_module.build_filter([]))
+
+        query_filter = vectorstore_module.build_filter(["data/q3.md", "data/q2.md"])
+        condition = query_filter.must[0]
+        self.assertEqual(condition.key, "metadata.source")
+        self.assertEqual(condition.match, models.MatchAny(any=["data/q3.md", "data/q2.md"]))
+
+    def test_filter_applies_to_every_branch(self):
+        query_filter = vectorstore_module.build_filter(["data/q3.md"])
+        dense = vectorstore_module._query_args([0.1], None, 4, query_filter)
+        self.assertIs(dense["query_filter"], query_filter)
+
+        sparse = models.SparseVector(indices=[1], values=[1.0])
+        hybrid = vectorstore_module._query_args([0.1], sparse, 4, query_filter)
+        self.assertTrue(all(prefetch.filter is query_filter for prefetch in hybrid["prefetch"]))
+        self.assertNotIn("query_filter", hybrid)
+
+    @patch('src.vectorstore._sparse_available', False)
+    @patch('src.vectorstore.embeddings')
+    @patch('src.vectorstore.get_async_client')
+    def test_retrieve_node_passes_state_sources(self, mock_get_client, mock_embeddings):
+        print("\n--- Testing Metadata Filters: state['sources'] reaches Qdrant ---")
+        mock_embeddings.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+        point = MagicMock(payload={"page_content": "Q3 cost", "metadata": {"source": "data/q3.md"}})
+        mock_get_client.return_value.query_points = AsyncMock(return_value=MagicMock(points=[point]))
+
+        result = asyncio.run(aretrieve({"question": "Q3 cloud cost", "sources": ["data/q3.md"]}))
+
+        self.assertEqual(len(result["documents"]), 1)
+        kwargs = mock_get_client.return_value.query_points.await_args.kwargs
+        self.assertEqual(kwargs["query_filter"].must[0].match.any, ["data/q3.md"])
+        print("✅ Search restricted to data/q3.md")
+
+    @patch('src.vectorstore._sparse_available', False)
+    @patch('src.vectorstore.embeddings')
+    @patch('src.vectorstore.get_async_client')
+    def test_unfiltered_search_has_no_filter(self, mock_get_client, mock_embeddings):
+        mock_embeddings.aembed_query = AsyncMock(return_value=[0.1])
+        mock_get_client.return_value.query_points = AsyncMock(return_value=MagicMock(points=[]))
+
+        asyncio.run(aretrieve({"question": "Q3 cloud cost"}))
+
+        self.assertNotIn("query_filter", mock_get_client.return_value.query_points.await_args.kwargs)
+
+
+class TestPayloadIndexes(unittest.TestCase):
+
+    def _existing_collection(self, payload_schema):
+        client = MagicMock()
+        client.collection_exists.return_value = True
+        client.get_collection.return_value.payload_schema = payload_schema
+        return client
+
+    def test_missing_index_is_created(self):
+        client = self._existing_collection({})
+        vectorstore_module.ensure_collection(client)
+
+        client.create_payload_index.assert_called_once_with(
+            vectorstore_module.COLLECTION_NAME, field_name="metadata.source",
+            field_schema=models.PayloadSchemaType.KEYWORD, wait=True
+        )
+
+    def test_existing_index_is_kept(self):
+        client = self._existing_collection({"metadata.source": MagicMock()})
+        vectorstore_module.ensure_collection(client)
+        client.create_payload_index.assert_not_called()
+
+
+class TestInvokeSources(unittest.TestCase):
+
+    @patch('src.main.RESPONSE_CACHE_ENABLED', True)
+    @patch('src.main.graph_app')
+    def test_sources_reach_graph_and_skip_response_cache(self, mock_graph):
+        mock_graph.ainvoke = AsyncMock(return_value={"generation": "4.2B", "route": "vectorstore"})
+        cache = MagicMock(spec=SemanticCache)
+        client = TestClient(main_module.app)
+
+        with patch('src.main.get_response_cache', return_value=cache):
+            response = client.post("/invoke", params=[("question", "Q3 revenue?"),
+                                                      ("sources", "data/q3.md"), ("sources", "data/q2.md")])
+
+        self.assertEqual(response.status_code, 200)
+        inputs = mock_graph.ainvoke.await_args.args[0]
+        self.assertEqual(inputs, {"question": "Q3 revenue?", "sources": ["data/q3.md", "data/q2.md"]})
+        cache.lookup.assert_not_called()
+        cache.store.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+import time
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import src.graph.nodes.hallucination_monitor as monitor_module
+
+
+STATE = {"documents": ["doc1"], "generation": "gen", "question": "q", "retry_count": 1}
+
+
+class TestParallelChecks(unittest.TestCase):
+
+    def setUp(self):
+        self.cancelled = []
+
+    def _fake_verdicts(self, grounded: str, delay: float = 0.2):
+        async def groundedness(documents, generation, route):
+            await asyncio.sleep(delay)
+            return grounded
+
+        async def usefulness(question, generation, route):
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.cancelled.append("usefulness")
+                raise
+            return "yes"
+
+        return groundedness, usefulness
+
+    @patch('src.graph.nodes.hallucination_monitor.PARALLEL_CHECKS', True)
+    def test_latency_is_max_not_sum(self):
+        print("\n--- Testing Parallel Checks: grounded + useful ---")
+        groundedness, usefulness = self._fake_verdicts("yes")
+        with patch.object(monitor_module, '_agrade_groundedness', groundedness), \
+                patch.object(monitor_module, '_agrade_usefulness', usefulness):
+            start = time.perf_counter()
+            result = asyncio.run(monitor_module.acheck_hallucination(STATE))
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(result, {"hallucination_grade": "useful", "retry_count": 0})
+        self.assertLess(elapsed, 0.35)
+        print(f"✅ Two 200ms checks finished in {elapsed * 1000:.0f}ms")
+
+    @patch('src.graph.nodes.hallucination_monitor.PARALLEL_CHECKS', True)
+    def test_usefulness_cancelled_when_not_grounded(self):
+        groundedness, usefulness = self._fake_verdicts("no", delay=0.05)
+        with patch.object(monitor_module, '_agrade_groundedness', groundedness), \
+                patch.object(monitor_module, '_agrade_usefulness', usefulness):
+            result = asyncio.run(monitor_module.acheck_hallucination(STATE))
+
+        self.assertEqual(result, {"hallucination_grade": "not useful", "retry_count": 2})
+        self.assertEqual(self.cancelled, ["usefulness"])
+
+    @patch('src.graph.nodes.hallucination_monitor.PARALLEL_CHECKS', True)
+    @patch('src.graph.nodes.hallucination_monitor._grade_usefulness')
+    @patch('src.graph.nodes.hallucination_monitor._grade_groundedness')
+    def test_sync_node_combines_verdicts(self, mock_groundedness, mock_usefulness):
+        def slow(verdict):
+            def grade(*args):
+                time.sleep(0.2)
+                return verdict
+            return grade
+
+        mock_groundedness.side_effect = slow("yes")
+        mock_usefulness.side_effect = slow("no")
+
+        start = time.perf_counter()
+        result = monitor_module.check_hallucination(STATE)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(result, {"hallucination_grade": "not useful", "retry_count": 2})
+        self.assertLess(elapsed, 0.35)
+
+    @patch('src.graph.nodes.hallucination_monitor.PARALLEL_CHECKS', True)
+    @patch('src.graph.nodes.hallucination_monitor._grade_usefulness')
+    @patch('src.graph.nodes.hallucination_monitor._grade_groundedness', return_value="no")
+    def test_sync_node_does_not_wait_for_discarded_usefulness(self, mock_groundedness, mock_usefulness):
+        mock_usefulness.side_effect = lambda *args: time.sleep(0.5) or "yes"
+
+        start = time.perf_counter()
+        result = monitor_module.check_hallucination(STATE)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(result, {"hallucination_grade": "not useful", "retry_count": 2})
+        self.assertLess(elapsed, 0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
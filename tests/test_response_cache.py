@@ -0,0 +1,106 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+import asyncio
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from fastapi.testclient import TestClient
+from src.cache import SemanticCache
+import src.main as main_module
+
+
+class KeywordEmbeddings:
+    """Bag-of-words vectors over a tiny vocabulary; similar questions get similar vectors."""
+    vocab = ["revenue", "q3", "2025", "cloud", "cost", "weather", "total", "what", "was"]
+
+    async def aembed_query(self, text):
+        words = text.lower().replace("?", "").split()
+        return [float(words.count(w)) for w in self.vocab]
+
+
+class TestSemanticCache(unittest.TestCase):
+
+    def test_near_identical_question_hits(self):
+        print("\n--- Testing Semantic Cache: near-duplicate question ---")
+        cache = SemanticCache(KeywordEmbeddings(), threshold=0.9)
+        asyncio.run(cache.store("What was total revenue Q3 2025?", {"generation": "4.2B"}))
+
+        hit = asyncio.run(cache.lookup("what was the total revenue in Q3 2025"))
+        miss = asyncio.run(cache.lookup("cloud cost weather"))
+
+        self.assertEqual(hit, {"generation": "4.2B"})
+        self.assertIsNone(miss)
+        self.assertEqual(cache.stats()["hits"], 1)
+        print("✅ Paraphrased question served from cache")
+
+    @patch('src.cache.time.time')
+    def test_ttl_and_size_bound(self, mock_time):
+        mock_time.return_value = 0.0
+        cache = SemanticCache(KeywordEmbeddings(), threshold=0.9, max_size=1, ttl_seconds=60)
+        asyncio.run(cache.store("revenue q3", {"generation": "a"}))
+        asyncio.run(cache.store("cloud cost", {"generation": "b"}))
+        self.assertIsNone(asyncio.run(cache.lookup("revenue q3")))
+        self.assertIsNotNone(asyncio.run(cache.lookup("cloud cost")))
+
+        mock_time.return_value = 61.0
+        self.assertIsNone(asyncio.run(cache.lookup("cloud cost")))
+
+
+    def test_best_match_among_many_entries(self):
+        cache = SemanticCache(KeywordEmbeddings(), threshold=0.9, max_size=300)
+        vocab = KeywordEmbeddings.vocab
+        for i in range(400):
+            # Distinct questions over the vocabulary; the oldest 100 are evicted
+            words = [w for b, w in enumerate(vocab) if (i + 1) >> b & 1]
+            asyncio.run(cache.store(" ".join(words), {"generation": i}))
+
+        self.assertEqual(cache.stats()["size"], 300)
+        self.assertEqual(cache._vectors.shape, (300, len(vocab)))
+        self.assertEqual(asyncio.run(cache.lookup("revenue 2025 what")), {"generation": 132})
+        # "revenue" alone was entry 0, evicted with its matrix row
+        self.assertIsNone(asyncio.run(cache.lookup("revenue")))
+
+
+class TestInvokeResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = SemanticCache(KeywordEmbeddings(), threshold=0.9)
+        self.client = TestClient(main_module.app)
+
+    def _invoke(self, question, headers=None):
+        return self.client.post("/invoke", params={"question": question}, headers=headers or {})
+
+    @patch('src.main.RESPONSE_CACHE_ENABLED', True)
+    @patch('src.main.graph_app')
+    def test_second_request_served_from_cache(self, mock_graph):
+        mock_graph.ainvoke = AsyncMock(return_value={"generation": "4.2B", "route": "vectorstore"})
+        with patch('src.main.get_response_cache', return_value=self.cache):
+            first = self._invoke("What was total revenue Q3 2025?")
+            second = self._invoke("what was the total revenue in q3 2025")
+            bypassed = self._invoke("what was the total revenue in q3 2025", {"X-Cache-Bypass": "true"})
+
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(bypassed.status_code, 200)
+        # First request and the bypassed one ran the graph; the paraphrase did not
+        self.assertEqual(mock_graph.ainvoke.await_count, 2)
+
+    @patch('src.main.RESPONSE_CACHE_ENABLED', True)
+    @patch('src.main.graph_app')
+    def test_web_search_answers_not_cached(self, mock_graph):
+        mock_graph.ainvoke = AsyncMock(return_value={"generation": "sunny", "route": "web_search"})
+        with patch('src.main.get_response_cache', return_value=self.cache):
+            self._invoke("weather")
+            self._invoke("weather")
+
+        self.assertEqual(mock_graph.ainvoke.await_count, 2)
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
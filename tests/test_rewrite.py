@@ -0,0 +1,95 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+import tempfile
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from src.cache import TieredCache
+from src.rewrite import QueryRewriter, is_keyword_query
+
+
+def make_rewriter(cache=None, **kwargs):
+    rewriter = QueryRewriter(cache=cache or TieredCache("rewrites", ttl_seconds=60), **kwargs)
+    for kind in ("refine", "search"):
+        chain = MagicMock()
+        chain.invoke.side_effect = lambda inputs, kind=kind: f" {kind}: {inputs['question']} "
+        chain.ainvoke = AsyncMock(side_effect=lambda inputs, kind=kind: f"{kind}: {inputs['question']}")
+        rewriter._chains[kind] = chain
+    return rewriter
+
+
+class TestQueryRewriter(unittest.TestCase):
+
+    def test_identical_questions_rewritten_once(self):
+        print("\n--- Testing Rewrite Cache: repeated question ---")
+        rewriter = make_rewriter()
+        first = rewriter.rewrite("refine", "how did revenue change in q3")
+        second = rewriter.rewrite("refine", "how  did revenue change in q3")
+        third = asyncio.run(rewriter.arewrite("refine", "how did revenue change in q3"))
+
+        self.assertEqual(first, "refine: how did revenue change in q3")
+        self.assertEqual(first, second)
+        self.assertEqual(first, third)
+        self.assertEqual(rewriter._chains["refine"].invoke.call_count, 1)
+        rewriter._chains["refine"].ainvoke.assert_not_awaited()
+        print("✅ One LLM rewrite served three calls")
+
+    def test_async_rewrite_reads_and_writes_sqlite_off_the_loop(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            rewriter = make_rewriter(cache=TieredCache("rewrites", db_path=os.path.join(tmp, "cache.db")))
+            with patch('src.cache.asyncio.to_thread', wraps=asyncio.to_thread) as to_thread:
+                first = asyncio.run(rewriter.arewrite("refine", "revenue growth q3"))
+                second = asyncio.run(rewriter.arewrite("refine", "revenue growth q3"))
+
+            self.assertEqual(first, second)
+            self.assertEqual(rewriter._chains["refine"].ainvoke.await_count, 1)
+            self.assertEqual(to_thread.call_count, 3)
+
+    def test_kind_is_part_of_the_key(self):
+        rewriter = make_rewriter()
+        self.assertEqual(rewriter.rewrite("refine", "revenue q3"), "refine: revenue q3")
+        self.assertEqual(rewriter.rewrite("search", "revenue q3"), "search: revenue q3")
+
+    def test_keyword_queries_skip_llm_for_search_only(self):
+        rewriter = make_rewriter(skip_keyword_queries=True)
+        self.assertEqual(rewriter.rewrite("search", "Python 3.12 features"), "Python 3.12 features")
+        rewriter._chains["search"].invoke.assert_not_called()
+        # Refining must change a question that already failed retrieval
+        self.assertEqual(rewriter.rewrite("refine", "Python 3.12 features"), "refine: Python 3.12 features")
+        self.assertEqual(rewriter.skipped, 1)
+
+    def test_llm_errors_are_not_cached(self):
+        rewriter = make_rewriter()
+        rewriter._chains["search"].invoke.side_effect = [RuntimeError("quota"), "bicol region overview"]
+        with self.assertRaises(RuntimeError):
+            rewriter.rewrite("search", "bicol?")
+        self.assertEqual(rewriter.rewrite("search", "bicol?"), "bicol region overview")
+
+    def test_unknown_kind_rejected(self):
+        with self.assertRaises(ValueError):
+            make_rewriter().rewrite("translate", "hola")
+
+
+class TestKeywordHeuristic(unittest.TestCase):
+
+    def test_keyword_style(self):
+        self.assertTrue(is_keyword_query("Bicol region"))
+        self.assertTrue(is_keyword_query("Python 3.12 features"))
+
+    def test_conversational_or_list_requests(self):
+        self.assertFalse(is_keyword_query("what is the bicol region"))
+        self.assertFalse(is_keyword_query("bicol region?"))
+        self.assertFalse(is_keyword_query("list cities bicol"))
+        self.assertFalse(is_keyword_query("u dont know about the bicol region"))
+        self.assertFalse(is_keyword_query("total revenue and cloud cost Q3 2025"))
+
+
+if __name__ == "__main__":
+    unittest.main()
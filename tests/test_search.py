@@ -0,0 +1,142 @@
+import unittest
+import asyncio
+import json
+import tempfile
+import threading
+import time
+import sys
+import os
+from unittest.mock import patch
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.cache import TieredCache
+from src.search import FileSearch, SearchBackend, SearchService
+
+
+class FakeBackend(SearchBackend):
+    """Sleeps per query and records calls; queries containing 'empty' find nothing."""
+    name = "fake"
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def search(self, query, max_results):
+        with self.lock:
+            self.calls.append(query)
+        time.sleep(self.delays.get(query, 0.2))
+        if "fail" in query:
+            raise RuntimeError("rate limited")
+        if "empty" in query:
+            return []
+        return [{"title": query, "body": "snippet", "href": "https://example.com"}]
+
+
+class TestSearchService(unittest.TestCase):
+
+    def test_variants_run_concurrently_first_hit_wins(self):
+        print("\n--- Testing Search Service: concurrent query variants ---")
+        service = SearchService(FakeBackend(), timeout=2)
+        start = time.perf_counter()
+        results = service.search(["empty optimized query", "raw question"])
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(results[0]["title"], "raw question")
+        self.assertLess(elapsed, 0.35)
+        print(f"✅ Miss + fallback took {elapsed * 1000:.0f}ms instead of ~400ms")
+
+    def test_optimized_query_preferred(self):
+        service = SearchService(FakeBackend({"optimized": 0.3, "raw": 0.05}), timeout=2)
+        self.assertEqual(service.search(["optimized", "raw"])[0]["title"], "optimized")
+
+    def test_timeout_and_errors_fall_through(self):
+        # "raw" answers in 0.2s, well inside the shared deadline; "slow" never does
+        service = SearchService(FakeBackend({"slow": 5.0}), timeout=0.5)
+        start = time.perf_counter()
+        results = service.search(["slow", "fail now", "raw"])
+        self.assertEqual(results[0]["title"], "raw")
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+    def test_cache_by_normalized_query(self):
+        backend = FakeBackend()
+        service = SearchService(backend, cache=TieredCache("search", ttl_seconds=60), timeout=2)
+        service.search(["Bicol  Region"])
+        service.search(["bicol region"])
+        asyncio.run(service.asearch(["BICOL REGION"]))
+        self.assertEqual(backend.calls, ["Bicol  Region"])
+
+    def test_async_cache_reads_off_the_loop(self):
+        backend = FakeBackend()
+        with tempfile.TemporaryDirectory() as tmp:
+            service = SearchService(backend, cache=TieredCache("search", db_path=os.path.join(tmp, "cache.db")), timeout=2)
+            service.search(["bicol region"])
+            with patch('src.cache.asyncio.to_thread', wraps=asyncio.to_thread) as to_thread:
+                results = asyncio.run(service.asearch(["Bicol Region", "bicol  REGION"]))
+
+            self.assertEqual(results[0]["title"], "bicol region")
+            # The variants are looked up in one threaded read
+            self.assertEqual(to_thread.call_count, 1)
+            self.assertEqual(backend.calls, ["bicol region"])
+
+    def test_failures_not_cached(self):
+        backend = FakeBackend({"fail": 0.0})
+        service = SearchService(backend, cache=TieredCache("search"), timeout=2)
+        service.search(["fail"])
+        service.search(["fail"])
+        self.assertEqual(backend.calls, ["fail", "fail"])
+
+    def test_duplicate_variants_searched_once(self):
+        backend = FakeBackend()
+        SearchService(backend, timeout=2).search(["Python 3.12", "python 3.12"])
+        self.assertEqual(backend.calls, ["Python 3.12"])
+
+    def test_priority_hit_returns_without_waiting(self):
+        backend = FakeBackend({"optimized": 0.05, "raw": 1.0})
+        service = SearchService(backend, timeout=2)
+        for run in (lambda: service.search(["optimized", "raw"]),
+                    lambda: asyncio.run(service.asearch(["optimized", "raw"]))):
+            start = time.perf_counter()
+            results = run()
+            self.assertEqual(results[0]["title"], "optimized")
+            self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_hung_variants_share_one_deadline(self):
+        service = SearchService(FakeBackend({"slow a": 2.0, "slow b": 2.0}), timeout=0.3)
+        start = time.perf_counter()
+        self.assertEqual(service.search(["slow a", "slow b"]), [])
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+        start = time.perf_counter()
+        self.assertEqual(asyncio.run(service.asearch(["slow a", "slow b"])), [])
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_async_search_timeout(self):
+        # "raw" answers in 0.2s, well inside the shared deadline; "slow" never does
+        service = SearchService(FakeBackend({"slow": 5.0}), timeout=0.5)
+        results = asyncio.run(service.asearch(["slow", "raw"]))
+        self.assertEqual(results[0]["title"], "raw")
+
+
+class TestFileSearch(unittest.TestCase):
+
+    def test_ranks_records_by_term_overlap(self):
+        records = [
+            {"title": "Weather", "body": "Sunny in Manila", "href": "a"},
+            {"title": "Bicol Region", "body": "Bicol is a region in the Philippines", "href": "b"},
+            {"title": "Bicol food", "body": "Laing and Bicol express", "href": "c"},
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+            f.write("\n".join(json.dumps(r) for r in records))
+        try:
+            results = FileSearch(f.name).search("Bicol region overview", max_results=2)
+        finally:
+            os.unlink(f.name)
+
+        self.assertEqual([r["href"] for r in results], ["b", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
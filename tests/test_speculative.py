@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+import time
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import src.graph.nodes.speculative as speculative_module
+from src.graph.workflow import compile_graph, route_speculation
+
+
+WEB_RESULT = {"documents": ["Title: Weather\nSnippet: sunny"], "question": "q", "route": "web_search"}
+
+
+class TestSpeculativeRetrieve(unittest.TestCase):
+
+    def setUp(self):
+        self.web_cancelled = []
+
+    def _patches(self, relevant_docs):
+        async def retrieve(state):
+            await asyncio.sleep(0.1)
+            return {"documents": ["doc1", "doc2"], "question": state["question"]}
+
+        async def grade(state):
+            await asyncio.sleep(0.1)
+            return {"documents": relevant_docs, "document_scores": [0.9] * len(relevant_docs),
+                    "question": state["question"]}
+
+        async def web_search(state):
+            try:
+                await asyncio.sleep(0.3)
+            except asyncio.CancelledError:
+                self.web_cancelled.append(True)
+                raise
+            return WEB_RESULT
+
+        return (
+            patch.object(speculative_module, 'aretrieve', retrieve),
+            patch.object(speculative_module, 'agrade_documents', grade),
+            patch.object(speculative_module, 'aweb_search', web_search),
+        )
+
+    def test_miss_uses_web_results_without_waiting_for_a_second_pass(self):
+        print("\n--- Testing Speculative Retrieval: out-of-corpus question ---")
+        p1, p2, p3 = self._patches(relevant_docs=[])
+        with p1, p2, p3:
+            start = time.perf_counter()
+            result = asyncio.run(speculative_module.aspeculative_retrieve({"question": "q"}))
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(result, WEB_RESULT)
+        # Search overlapped retrieval + grading: ~max(300, 100 + 100), not the 500ms sum
+        self.assertLess(elapsed, 0.45)
+        self.assertEqual(route_speculation(result), "grade_documents")
+        print(f"✅ Web results ready after {elapsed * 1000:.0f}ms")
+
+    def test_hit_cancels_web_search(self):
+        p1, p2, p3 = self._patches(relevant_docs=["doc1"])
+        with p1, p2, p3:
+            result = asyncio.run(speculative_module.aspeculative_retrieve({"question": "q"}))
+
+        self.assertEqual(result, {"documents": ["doc1"], "document_scores": [0.9], "question": "q",
+                                  "route": "vectorstore"})
+        self.assertEqual(self.web_cancelled, [True])
+        self.assertEqual(route_speculation(result), "generate")
+
+    @patch('src.graph.nodes.speculative.grade_documents')
+    @patch('src.graph.nodes.speculative.retrieve')
+    @patch('src.graph.nodes.speculative.web_search')
+    def test_sync_hit_discards_web_results(self, mock_web, mock_retrieve, mock_grade):
+        mock_web.return_value = WEB_RESULT
+        mock_retrieve.return_value = {"documents": ["doc1"], "question": "q"}
+        mock_grade.return_value = {"documents": ["doc1"], "question": "q"}
+
+        result = speculative_module.speculative_retrieve({"question": "q"})
+
+        self.assertEqual(result["route"], "vectorstore")
+        self.assertEqual(result["documents"], ["doc1"])
+
+    @patch('src.graph.nodes.speculative.grade_documents')
+    @patch('src.graph.nodes.speculative.retrieve')
+    @patch('src.graph.nodes.speculative.web_search')
+    def test_sync_hit_does_not_wait_for_web_search(self, mock_web, mock_retrieve, mock_grade):
+        mock_web.side_effect = lambda state: time.sleep(0.5) or WEB_RESULT
+        mock_retrieve.return_value = {"documents": ["doc1"], "question": "q"}
+        mock_grade.return_value = {"documents": ["doc1"], "question": "q"}
+
+        start = time.perf_counter()
+        result = speculative_module.speculative_retrieve({"question": "q"})
+
+        self.assertEqual(result["route"], "vectorstore")
+        self.assertLess(time.perf_counter() - start, 0.2)
+
+    def test_graph_entry_point(self):
+        self.assertIn("speculative_retrieve", compile_graph(speculative=True).get_graph().nodes)
+        self.assertNotIn("speculative_retrieve", compile_graph(speculative=False).get_graph().nodes)
+
+
+if __name__ == "__main__":
+    unittest.main()
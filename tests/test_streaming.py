@@ -0,0 +1,166 @@
+import unittest
+from contextlib import ExitStack
+from unittest.mock import patch
+import asyncio
+import json
+import sys
+import os
+from typing import List, Optional, TypedDict
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.graph import END, StateGraph
+import src.graph.workflow as workflow_module
+import src.main as main_module
+from src.streaming import stream_graph_events
+
+
+class MiniState(TypedDict):
+    question: str
+    documents: List[str]
+    generation: Optional[str]
+
+
+def build_mini_graph():
+    """retrieve -> generate, with a fake chat model that streams word by word."""
+    model = GenericFakeChatModel(messages=iter([AIMessage(content="Revenue was 4.2B")]))
+
+    def retrieve(state):
+        return {"documents": ["doc1", "doc2"]}
+
+    def generate(state):
+        return {"generation": model.invoke(state["question"]).content}
+
+    workflow = StateGraph(MiniState)
+    workflow.add_node("retrieve", retrieve)
+    workflow.add_node("generate", generate)
+    workflow.set_entry_point("retrieve")
+    workflow.add_edge("retrieve", "generate")
+    workflow.add_edge("generate", END)
+    return workflow.compile()
+
+
+async def collect(graph, inputs):
+    return [pair async for pair in stream_graph_events(graph, inputs)]
+
+
+def compile_stubbed_graph(updates, speculative=False):
+    """
+    The production graph from compile_graph, with each node function replaced by a
+    stub of the same name (so the RunnableLambda wiring is unchanged) that returns
+    the next update from `updates[name]`.
+    """
+    def stub(name, outputs):
+        outputs = iter(outputs)
+
+        def func(state):
+            return next(outputs)
+
+        async def afunc(state):
+            return func(state)
+
+        func.__name__, afunc.__name__ = name, f"a{name}"
+        return func, afunc
+
+    with ExitStack() as stack:
+        for name, outputs in updates.items():
+            func, afunc = stub(name, outputs)
+            stack.enter_context(patch.object(workflow_module, name, func))
+            stack.enter_context(patch.object(workflow_module, f"a{name}", afunc))
+        return workflow_module.compile_graph(speculative=speculative)
+
+
+def progress(events):
+    return [(event, data["node"]) for event, data in events if event in ("start", "node")]
+
+
+class TestStreaming(unittest.TestCase):
+
+    def test_node_token_and_done_events(self):
+        print("\n--- Testing SSE: node progress and tokens ---")
+        events = asyncio.run(collect(build_mini_graph(), {"question": "q"}))
+        kinds = [e for e, _ in events]
+
+        self.assertEqual(kinds[0], "start")
+        self.assertIn(("node", {"node": "retrieve", "summary": {"documents": 2, "route": None}}), events)
+        tokens = "".join(d["content"] for e, d in events if e == "token")
+        self.assertEqual(tokens, "Revenue was 4.2B")
+        # Progress arrives before the answer is complete
+        self.assertLess(kinds.index("node"), kinds.index("token"))
+        self.assertEqual(kinds[-1], "done")
+        self.assertEqual(events[-1][1]["generation"], "Revenue was 4.2B")
+        print(f"✅ {len(events)} events, first: {events[0]}")
+
+    def test_endpoint_streams_sse_frames(self):
+        with patch('src.main.graph_app', build_mini_graph()):
+            response = TestClient(main_module.app).post("/invoke/stream", params={"question": "q"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+        frames = [f for f in response.text.split("\n\n") if f]
+        self.assertTrue(frames[0].startswith("event: start"))
+        last_event, last_data = frames[-1].split("\n", 1)
+        self.assertEqual(last_event, "event: done")
+        self.assertEqual(json.loads(last_data[len("data: "):])["documents"], ["doc1", "doc2"])
+
+
+class TestProductionGraphStreaming(unittest.TestCase):
+
+    def test_each_step_reported_once(self):
+        print("\n--- Testing SSE: compile_graph node wiring ---")
+        graph = compile_stubbed_graph({
+            "retrieve": [{"documents": ["d1"], "route": "vectorstore"}],
+            "grade_documents": [{"documents": ["d1"]}],
+            "compress_context": [{"context": "d1"}],
+            "generate": [{"generation": "answer"}],
+            "check_hallucination": [{"hallucination_grade": "useful"}],
+        })
+        steps = progress(asyncio.run(collect(graph, {"question": "q"})))
+
+        nodes = ["retrieve", "grade_documents", "compress_context", "generate", "hallucination_monitor"]
+        for node in nodes:
+            self.assertEqual(steps.count(("start", node)), 1, node)
+            self.assertEqual(steps.count(("node", node)), 1, node)
+        print(f"✅ {len(steps)} progress events for {len(nodes)} steps")
+
+    def test_exact_progress_sequence_with_web_fallback(self):
+        graph = compile_stubbed_graph({
+            "retrieve": [{"documents": ["d1"], "route": "vectorstore"}],
+            "grade_documents": [{"documents": []}, {"documents": ["w1"]}],
+            "web_search": [{"documents": ["w1"], "route": "web_search"}],
+            "compress_context": [{"context": "w1"}],
+            "generate": [{"generation": "answer"}],
+            "check_hallucination": [{"hallucination_grade": "useful"}],
+        })
+        events = asyncio.run(collect(graph, {"question": "q"}))
+
+        expected = []
+        for node in ["retrieve", "grade_documents", "web_search", "grade_documents",
+                     "compress_context", "generate", "hallucination_monitor"]:
+            expected += [("start", node), ("node", node)]
+        self.assertEqual(progress(events), expected)
+        self.assertIn(("node", {"node": "grade_documents", "summary": {"documents": 0, "route": None}}), events)
+        self.assertEqual(events[-1][0], "done")
+        self.assertEqual(events[-1][1]["generation"], "answer")
+
+    def test_speculative_entry_reported_once(self):
+        graph = compile_stubbed_graph({
+            "speculative_retrieve": [{"documents": ["d1"], "route": "vectorstore"}],
+            "compress_context": [{"context": "d1"}],
+            "generate": [{"generation": "answer"}],
+            "check_hallucination": [{"hallucination_grade": "useful"}],
+        }, speculative=True)
+        steps = progress(asyncio.run(collect(graph, {"question": "q"})))
+        self.assertEqual(steps[:2], [("start", "speculative_retrieve"), ("node", "speculative_retrieve")])
+        self.assertEqual(len(steps), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
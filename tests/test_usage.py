@@ -0,0 +1,123 @@
+import unittest
+from unittest.mock import patch
+from typing import TypedDict
+import asyncio
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from langgraph.graph import END, StateGraph
+import src.main as main_module
+from src.usage import UsageStats, UsageTracker
+
+
+def _model(calls: int, prompt_tokens: int = 100, completion_tokens: int = 10):
+    usage = {"input_tokens": prompt_tokens, "output_tokens": completion_tokens,
+             "total_tokens": prompt_tokens + completion_tokens}
+    return GenericFakeChatModel(messages=iter([AIMessage(content="yes", usage_metadata=usage)] * calls))
+
+
+class State(TypedDict):
+    question: str
+
+
+class TestUsageTracker(unittest.TestCase):
+
+    def _graph(self, model):
+        def grade(state):
+            # Concurrent calls from worker threads, like grade_documents
+            with ContextThreadPoolExecutor(max_workers=3) as executor:
+                list(executor.map(lambda doc: model.invoke(doc), ["d1", "d2", "d3"]))
+            return {}
+
+        async def agenerate(state):
+            await model.ainvoke(state["question"])
+            return {}
+
+        workflow = StateGraph(State)
+        workflow.add_node("grade_documents", grade)
+        workflow.add_node("generate", RunnableLambda(lambda s: {}, afunc=agenerate))
+        workflow.set_entry_point("grade_documents")
+        workflow.add_edge("grade_documents", "generate")
+        workflow.add_edge("generate", END)
+        return workflow.compile()
+
+    def test_calls_attributed_to_nodes(self):
+        print("\n--- Testing Usage Tracker: 3 grader calls + 1 generation ---")
+        tracker = UsageTracker()
+        graph = self._graph(_model(4))
+
+        asyncio.run(graph.ainvoke({"question": "q"}, config={"callbacks": [tracker]}))
+        report = tracker.report()
+
+        self.assertEqual(report["nodes"]["grade_documents"]["calls"], 3)
+        self.assertEqual(report["nodes"]["grade_documents"]["prompt_tokens"], 300)
+        self.assertEqual(report["nodes"]["generate"]["calls"], 1)
+        self.assertEqual(report["total"]["calls"], 4)
+        self.assertEqual(report["total"]["completion_tokens"], 40)
+        self.assertGreaterEqual(report["total"]["latency_ms"], 0)
+        print(f"✅ {report['total']}")
+
+    def test_errors_counted(self):
+        tracker = UsageTracker()
+        model = GenericFakeChatModel(messages=iter([]))
+        with self.assertRaises(Exception):
+            model.invoke("q", config={"callbacks": [tracker], "metadata": {"langgraph_node": "refine_query"}})
+
+        stats = tracker.report()["nodes"]["refine_query"]
+        self.assertEqual((stats["calls"], stats["errors"]), (1, 1))
+
+
+class TestUsageStats(unittest.TestCase):
+
+    def test_aggregates_per_request(self):
+        stats = UsageStats()
+        for calls in (2, 4):
+            tracker = UsageTracker()
+            _model(calls).batch(["q"] * calls, config={"callbacks": [tracker], "metadata": {"langgraph_node": "generate"}})
+            stats.record(tracker.report())
+
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot["requests"], 2)
+        self.assertEqual(snapshot["nodes"]["generate"]["calls"], 6)
+        self.assertEqual(snapshot["total"]["calls_per_request"], 3.0)
+        self.assertEqual(snapshot["total"]["tokens_per_request"], 330.0)
+
+
+class TestInvokeUsage(unittest.TestCase):
+
+    @patch('src.main.RESPONSE_CACHE_ENABLED', False)
+    @patch('src.main.graph_app')
+    def test_usage_in_response_and_aggregate(self, mock_graph):
+        model = _model(2)
+
+        async def ainvoke(inputs, config):
+            trackers = [cb for cb in config["callbacks"] if isinstance(cb, UsageTracker)]
+            await model.ainvoke("q", config={"callbacks": trackers, "metadata": {"langgraph_node": "generate"}})
+            return {"generation": "4.2B", "route": "vectorstore"}
+
+        mock_graph.ainvoke = ainvoke
+        client = TestClient(main_module.app)
+        before = client.get("/stats/usage").json()["requests"]
+
+        plain = client.post("/invoke", params={"question": "q"}).json()
+        detailed = client.post("/invoke", params={"question": "q", "include_usage": "true"}).json()
+
+        self.assertNotIn("usage", plain)
+        self.assertEqual(detailed["usage"]["nodes"]["generate"]["calls"], 1)
+        self.assertEqual(detailed["usage"]["total"]["prompt_tokens"], 100)
+        self.assertEqual(client.get("/stats/usage").json()["requests"], before + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()